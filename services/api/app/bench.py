@@ -0,0 +1,169 @@
+"""Latency/throughput of API endpoints under concurrent load, via an in-process ASGI client.
+
+    python -m app.bench --requests 32 --concurrency 1,4,8
+    python -m app.bench --suite feedback --seconds 10 --concurrency 8 --batch 50
+
+The plan suite polls /health while the load runs to show the event loop stays
+responsive; it bypasses the plan result cache (so every request runs on the
+pool) unless ``--cache`` is given. The feedback suite posts to /feedback/ingest:batch for a fixed
+time and reports the sustained accepted and written KPI rows per second.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+from typing import Dict, List, Sequence
+
+import httpx
+import numpy as np
+
+from app.cache import ResultCache, get_plan_cache
+from app.executor import get_plan_executor, shutdown_plan_executor
+from app.feedback import start_feedback_buffer, stop_feedback_buffer
+from app.main import app
+
+GOAL = {"goal": {"monthly_budget_gbp": 8000, "service_level_target": 0.97}}
+
+
+def _percentiles(latencies: Sequence[float]) -> Dict[str, float]:
+    if not latencies:
+        return {"p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0}
+    p50, p95, p99 = np.percentile(np.asarray(latencies) * 1000, [50, 95, 99])
+    return {
+        "p50_ms": round(float(p50), 1),
+        "p95_ms": round(float(p95), 1),
+        "p99_ms": round(float(p99), 1),
+    }
+
+
+async def _load(client: httpx.AsyncClient, n_requests: int, concurrency: int) -> Dict:
+    latencies: List[float] = []
+    statuses: Dict[int, int] = {}
+    health: List[float] = []
+    queue: asyncio.Queue = asyncio.Queue()
+    for _ in range(n_requests):
+        queue.put_nowait(None)
+
+    async def worker():
+        while not queue.empty():
+            queue.get_nowait()
+            t0 = time.perf_counter()
+            r = await client.post("/plan/generate", json=GOAL)
+            latencies.append(time.perf_counter() - t0)
+            statuses[r.status_code] = statuses.get(r.status_code, 0) + 1
+
+    async def probe(stop: asyncio.Event):
+        while not stop.is_set():
+            t0 = time.perf_counter()
+            await client.get("/health")
+            health.append(time.perf_counter() - t0)
+            await asyncio.sleep(0.05)
+
+    stop = asyncio.Event()
+    prober = asyncio.create_task(probe(stop))
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - t0
+    stop.set()
+    await prober
+    return {
+        "concurrency": concurrency,
+        "requests": n_requests,
+        "statuses": statuses,
+        **_percentiles(latencies),
+        "throughput_rps": round(statuses.get(200, 0) / elapsed, 2),
+        "health": _percentiles(health),
+    }
+
+
+async def bench_generate(
+    n_requests: int, concurrency_levels: Sequence[int], cache: bool = False
+) -> Dict:
+    if not cache:
+        # A fresh cache per request: no hits and no coalescing
+        app.dependency_overrides[get_plan_cache] = ResultCache
+    transport = httpx.ASGITransport(app=app)
+    client = httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None)
+    try:
+        async with client:
+            await client.post("/plan/generate", json=GOAL)  # warm the pool workers
+            runs = [await _load(client, n_requests, c) for c in concurrency_levels]
+    finally:
+        app.dependency_overrides.pop(get_plan_cache, None)
+    return {"pool": get_plan_executor().stats(), "cache": cache, "runs": runs}
+
+
+def _feedback_batch(size: int) -> Dict:
+    kpis = [{"name": "service_level", "value": 0.965}, {"name": "stockouts", "value": 3}]
+    items = [{"plan_name": f"plan-{i % 3}", "kpis": kpis, "notes": "bench"} for i in range(size)]
+    return {"items": items}
+
+
+async def bench_feedback(seconds: float, concurrency_levels: Sequence[int], batch: int) -> Dict:
+    buffer = await start_feedback_buffer()
+    transport = httpx.ASGITransport(app=app)
+    client = httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None)
+    payload = _feedback_batch(batch)
+    runs = []
+    try:
+        async with client:
+            for concurrency in concurrency_levels:
+                latencies: List[float] = []
+                statuses: Dict[int, int] = {}
+                written0 = buffer.counts["written"]
+                deadline = time.perf_counter() + seconds
+
+                async def worker():
+                    while time.perf_counter() < deadline:
+                        t0 = time.perf_counter()
+                        r = await client.post("/feedback/ingest:batch", json=payload)
+                        latencies.append(time.perf_counter() - t0)
+                        statuses[r.status_code] = statuses.get(r.status_code, 0) + 1
+
+                t0 = time.perf_counter()
+                await asyncio.gather(*(worker() for _ in range(concurrency)))
+                accepted_s = time.perf_counter() - t0
+                await buffer.flush()
+                written_s = time.perf_counter() - t0
+                rows = statuses.get(200, 0) * batch * len(payload["items"][0]["kpis"])
+                runs.append(
+                    {
+                        "concurrency": concurrency,
+                        "batch_items": batch,
+                        "statuses": statuses,
+                        **_percentiles(latencies),
+                        "accepted_rows_per_s": round(rows / accepted_s, 1),
+                        "written_rows_per_s": round(
+                            (buffer.counts["written"] - written0) / written_s, 1
+                        ),
+                    }
+                )
+        return {"buffer": buffer.stats(), "runs": runs}
+    finally:
+        await stop_feedback_buffer()
+
+
+def main() -> None:  # pragma: no cover
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--suite", choices=["plan", "feedback"], default="plan")
+    parser.add_argument("--requests", type=int, default=32)
+    parser.add_argument("--concurrency", default="1,4,8")
+    parser.add_argument("--seconds", type=float, default=10.0, help="feedback: duration per level")
+    parser.add_argument("--batch", type=int, default=50, help="feedback: items per request")
+    parser.add_argument("--cache", action="store_true", help="plan: serve repeats from cache")
+    args = parser.parse_args()
+    levels = [int(x) for x in args.concurrency.split(",") if x]
+    try:
+        if args.suite == "feedback":
+            report = asyncio.run(bench_feedback(args.seconds, levels, args.batch))
+        else:
+            report = asyncio.run(bench_generate(args.requests, levels, args.cache))
+    finally:
+        shutdown_plan_executor()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, Type
+
+import orjson
+from dkernel.policies import Policies
+
+from app.redis_client import connect
+
+# Result cache: TTL, in-process memory bound, and whether Redis backs it (env-driven)
+PLAN_CACHE_TTL_S = float(os.getenv("PLAN_CACHE_TTL_S", "600"))
+PLAN_CACHE_MAX_BYTES = int(os.getenv("PLAN_CACHE_MAX_BYTES", str(64 << 20)))
+PLAN_CACHE_REDIS = os.getenv("PLAN_CACHE_REDIS", "0").lower() in ("1", "true", "yes")
+
+# Bump when plan generation changes its output for the same goal and data
+CACHE_KEY_VERSION = 2
+
+
+def canonical_goal(goal: Dict[str, Any]) -> Dict[str, Any]:
+    """What planning reads from a GoalDSL dict, with float noise removed.
+
+    Categories, excludes and constraints enter through the policies the
+    kernel enforces (``Policies.from_goal(...).to_constraints()``), which is
+    already order- and case-insensitive and resolves repeated constraints
+    the way planning does (the last one wins).
+    """
+    return {
+        "monthly_budget_gbp": round(float(goal.get("monthly_budget_gbp") or 0.0), 2),
+        "service_level_target": round(float(goal.get("service_level_target") or 0.0), 4),
+        "policies": Policies.from_goal(goal).to_constraints(),
+    }
+
+
+def plan_cache_key(goal: Dict[str, Any], fingerprint: str, kind: str = "options") -> str:
+    """SHA-256 of the canonical goal, the dataset fingerprint and the result kind."""
+    spec = {"v": CACHE_KEY_VERSION, "kind": kind, "goal": canonical_goal(goal), "data": fingerprint}
+    return hashlib.sha256(json.dumps(spec, sort_keys=True).encode()).hexdigest()
+
+
+class LRUBytes:
+    """In-process LRU of serialized values with a per-entry TTL and a total size bound."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = int(max_bytes)
+        self.bytes = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            self._drop(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        if key in self._entries:
+            self._drop(key)
+        if len(value) > self.max_bytes:
+            return
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self.bytes += len(value)
+        while self.bytes > self.max_bytes:
+            self._drop(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _drop(self, key: str) -> None:
+        self.bytes -= len(self._entries.pop(key)[1])
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class ResultCache:
+    """Two-tier cache of JSON-able results: in-process :class:`LRUBytes`, then Redis (optional).
+
+    :meth:`get_or_compute` de-duplicates concurrent misses for a key within
+    the process (single flight): followers await the leader's result. Redis
+    errors are counted and otherwise ignored, so the cache never fails a
+    request on its own.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = PLAN_CACHE_MAX_BYTES,
+        ttl: float = PLAN_CACHE_TTL_S,
+        redis: Any = None,
+        prefix: str = "dk:plan-cache",
+    ):
+        self.ttl = ttl
+        self.local = LRUBytes(max_bytes)
+        self.redis = redis
+        self.prefix = prefix
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.counts = {"l1_hits": 0, "l2_hits": 0, "misses": 0, "coalesced": 0, "l2_errors": 0}
+
+    async def _l2_get(self, key: str) -> Optional[bytes]:
+        if self.redis is None:
+            return None
+        try:
+            raw = await self.redis.get(f"{self.prefix}:{key}")
+        except Exception:
+            self.counts["l2_errors"] += 1
+            return None
+        return raw.encode() if isinstance(raw, str) else raw
+
+    async def _l2_set(self, key: str, blob: bytes) -> None:
+        if self.redis is None:
+            return
+        try:
+            await self.redis.set(f"{self.prefix}:{key}", blob.decode(), ex=max(1, int(self.ttl)))
+        except Exception:
+            self.counts["l2_errors"] += 1
+
+    async def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        retry_on: Tuple[Type[BaseException], ...] = (),
+    ) -> Tuple[Any, str]:
+        """Return ``(value, source)``; source is ``l1``, ``l2``, ``miss`` or ``coalesced``.
+
+        Failures are not cached and propagate to every waiter, except
+        ``retry_on`` errors of the leader (e.g. its client going away), after
+        which a follower computes instead.
+        """
+        while True:
+            blob = self.local.get(key)
+            if blob is not None:
+                self.counts["l1_hits"] += 1
+                return orjson.loads(blob), "l1"
+            flight = self._inflight.get(key)
+            if flight is None:
+                break
+            try:
+                value = await asyncio.shield(flight)
+            except retry_on:
+                continue
+            self.counts["coalesced"] += 1
+            return value, "coalesced"
+
+        flight = asyncio.get_running_loop().create_future()
+        self._inflight[key] = flight
+        try:
+            blob = await self._l2_get(key)
+            if blob is not None:
+                self.counts["l2_hits"] += 1
+                source = "l2"
+            else:
+                self.counts["misses"] += 1
+                source = "miss"
+                blob = orjson.dumps(await compute())
+                await self._l2_set(key, blob)
+            self.local.set(key, blob, self.ttl)
+            value = orjson.loads(blob)
+            flight.set_result(value)
+            return value, source
+        except BaseException as e:
+            flight.set_exception(e)
+            flight.exception()  # retrieved: followers may not exist
+            raise
+        finally:
+            del self._inflight[key]
+
+    def stats(self) -> Dict[str, Any]:
+        c = self.counts
+        lookups = c["l1_hits"] + c["l2_hits"] + c["misses"] + c["coalesced"]
+        served = c["l1_hits"] + c["l2_hits"] + c["coalesced"]
+        return {
+            **c,
+            "hit_rate": round(served / lookups, 4) if lookups else 0.0,
+            "entries": len(self.local),
+            "bytes": self.local.bytes,
+            "evictions": self.local.evictions,
+            "redis": self.redis is not None,
+        }
+
+
+_cache: Optional[ResultCache] = None
+
+
+def get_plan_cache() -> ResultCache:
+    """Process-wide plan result cache (FastAPI dependency); Redis-backed with PLAN_CACHE_REDIS."""
+    global _cache
+    if _cache is None:
+        _cache = ResultCache(redis=connect() if PLAN_CACHE_REDIS else None)
+    return _cache
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Optional
+
+from sqlalchemy import Column, Float, Index, Integer, MetaData, String, Table, Text, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+# Postgres in docker-compose (POSTGRES_* from .env); SQLite under ./_out when no host is set
+DATABASE_URL = os.getenv("DATABASE_URL")
+POSTGRES_HOST = os.getenv("POSTGRES_HOST")
+POSTGRES_PORT = os.getenv("POSTGRES_PORT", "5432")
+POSTGRES_DB = os.getenv("POSTGRES_DB", "smb_planner")
+POSTGRES_USER = os.getenv("POSTGRES_USER", "postgres")
+POSTGRES_PASSWORD = os.getenv("POSTGRES_PASSWORD", "postgres")
+SQLITE_PATH = os.getenv("SQLITE_PATH", "./_out/api.db")
+
+metadata = MetaData()
+
+# One row per reported KPI value
+feedback_kpis = Table(
+    "feedback_kpis",
+    metadata,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("received_at", Float, nullable=False),
+    Column("plan_name", String(200), nullable=False),
+    Column("kpi", String(200), nullable=False),
+    Column("value", Float, nullable=False),
+    Column("notes", Text, nullable=True),
+    Index("ix_feedback_kpis_plan_received", "plan_name", "received_at"),
+)
+
+
+def database_url() -> str:
+    if DATABASE_URL:
+        return DATABASE_URL
+    if POSTGRES_HOST:
+        return (
+            f"postgresql+asyncpg://{POSTGRES_USER}:{POSTGRES_PASSWORD}"
+            f"@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}"
+        )
+    return f"sqlite+aiosqlite:///{SQLITE_PATH}"
+
+
+def create_engine(url: Optional[str] = None) -> AsyncEngine:
+    """Async engine for ``url`` (default :func:`database_url`); SQLite files run in WAL mode."""
+    url = url or database_url()
+    if make_url(url).get_backend_name() != "sqlite":
+        return create_async_engine(url, pool_pre_ping=True)
+
+    database = make_url(url).database
+    if database and database != ":memory:":
+        Path(database).parent.mkdir(parents=True, exist_ok=True)
+    engine = create_async_engine(url)
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _pragmas(dbapi_conn, _record):
+        cursor = dbapi_conn.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
+
+    return engine
@@ -0,0 +1,235 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import ctypes
+import multiprocessing as mp
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from fastapi import Request
+
+# Pool sizing and admission (env-driven, like API_PORT)
+PLAN_WORKERS = int(os.getenv("PLAN_WORKERS", "2"))
+PLAN_MAX_PENDING = int(os.getenv("PLAN_MAX_PENDING", "8"))
+PLAN_TIMEOUT_S = float(os.getenv("PLAN_TIMEOUT_S", "60"))
+PLAN_START_METHOD = os.getenv("PLAN_START_METHOD", "forkserver")
+
+# How often a waiting request checks whether its client went away
+DISCONNECT_POLL_S = 0.1
+
+# Worker-side: shared cancel flags (one per admission slot), the progress channel,
+# and the slot / job number of the running job
+_FLAGS: Any = None
+_EVENTS: Any = None
+_SLOT: Optional[int] = None
+_JOB: Optional[int] = None
+
+
+class QueueFull(RuntimeError):
+    """All admission slots are taken (maps to 429)."""
+
+
+class ClientDisconnected(RuntimeError):
+    """The client went away while its job was pending (job cancelled)."""
+
+
+def _init_worker(flags: Any, events: Any) -> None:
+    global _FLAGS, _EVENTS
+    _FLAGS, _EVENTS = flags, events
+
+
+def _run_job(slot: int, job: int, fn: Callable[..., Any], args: tuple, kwargs: dict) -> Any:
+    global _SLOT, _JOB
+    _SLOT, _JOB = slot, job
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        # End-of-job marker, written before the result is sent back
+        _EVENTS.put((job, None))
+        _SLOT = _JOB = None
+
+
+def cancelled() -> bool:
+    """True when the job running in this worker was cancelled (timeout or disconnect).
+
+    Long jobs poll this between steps (e.g. as ``Pipeline.run(cancel=...)``);
+    outside a pool job it is always false.
+    """
+    return _FLAGS is not None and _SLOT is not None and bool(_FLAGS[_SLOT])
+
+
+def report_progress(event: Dict[str, Any]) -> None:
+    """Send a progress event (e.g. a pipeline stage record) to the job's ``on_progress``."""
+    if _EVENTS is not None and _JOB is not None:
+        _EVENTS.put((_JOB, event))
+
+
+class PlanExecutor:
+    """Process pool for CPU-heavy planning jobs with bounded admission.
+
+    At most ``max_pending`` jobs are queued or running; further submissions
+    fail fast with :class:`QueueFull`. Each job owns a slot with a shared
+    cancel flag: on timeout or client disconnect a queued job is dropped and a
+    running one sees :func:`cancelled` and stops at its next check. The slot is
+    only released when the worker is done, so admission tracks real pool load.
+    """
+
+    def __init__(
+        self,
+        workers: int = PLAN_WORKERS,
+        max_pending: int = PLAN_MAX_PENDING,
+        timeout: float = PLAN_TIMEOUT_S,
+        start_method: str = PLAN_START_METHOD,
+    ):
+        if workers < 1 or max_pending < 1:
+            raise ValueError("workers and max_pending must be >= 1")
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        ctx = mp.get_context(start_method)
+        self._flags = ctx.Array(ctypes.c_bool, max_pending, lock=False)
+        self._events = ctx.SimpleQueue()
+        self._pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=ctx,
+            initializer=_init_worker,
+            initargs=(self._flags, self._events),
+        )
+        self._free: List[int] = list(range(max_pending))
+        self._lock = threading.Lock()
+        self._jobs = 0
+        self._listeners: Dict[int, Callable[[Optional[dict]], None]] = {}
+        self._drain = threading.Thread(target=self._drain_events, name="plan-progress", daemon=True)
+        self._drain.start()
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.cancellations = 0
+
+    @property
+    def pending(self) -> int:
+        return self.max_pending - len(self._free)
+
+    def _drain_events(self) -> None:
+        while True:
+            job, event = self._events.get()
+            if job < 0:
+                return
+            listener = self._listeners.get(job)
+            if listener is not None:
+                listener(event)
+
+    def _release(self, slot: int) -> None:
+        with self._lock:
+            self._flags[slot] = False
+            self._free.append(slot)
+
+    async def run(
+        self,
+        fn: Callable[..., Any],
+        *args: Any,
+        request: Optional[Request] = None,
+        timeout: Optional[float] = None,
+        on_progress: Optional[Callable[[dict], Any]] = None,
+        **kwargs: Any,
+    ) -> Any:
+        """Run ``fn(*args, **kwargs)`` in the pool without blocking the event loop.
+
+        Raises :class:`QueueFull`, :class:`asyncio.TimeoutError` (after
+        ``timeout``, default the executor's) or :class:`ClientDisconnected`
+        (when ``request``'s client disconnects first). Events the job sends
+        with :func:`report_progress` reach ``on_progress`` on the event loop,
+        all before this returns.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if not self._free:
+                self.rejected += 1
+                raise QueueFull(f"{self.max_pending} planning jobs already pending")
+            slot = self._free.pop()
+            self._jobs += 1
+            job = self._jobs
+        drained = asyncio.Event()
+        if on_progress is not None:
+
+            def deliver(event: Optional[dict]) -> None:
+                if event is None:
+                    drained.set()
+                else:
+                    on_progress(event)
+
+            self._listeners[job] = lambda event: loop.call_soon_threadsafe(deliver, event)
+        try:
+            future = self._pool.submit(_run_job, slot, job, fn, args, kwargs)
+        except BaseException:
+            self._listeners.pop(job, None)
+            self._release(slot)
+            raise
+        future.add_done_callback(lambda _: self._release(slot))
+        waiter = asyncio.wrap_future(future)
+        limit = self.timeout if timeout is None else timeout
+        deadline = loop.time() + limit
+        try:
+            while True:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    self.timeouts += 1
+                    raise asyncio.TimeoutError(f"planning job exceeded {limit}s")
+                done, _ = await asyncio.wait({waiter}, timeout=min(remaining, DISCONNECT_POLL_S))
+                if done:
+                    self.completed += 1
+                    if on_progress is not None:
+                        # The end marker precedes the result on the worker side
+                        with contextlib.suppress(asyncio.TimeoutError):
+                            await asyncio.wait_for(drained.wait(), timeout=1.0)
+                    return waiter.result()
+                if request is not None and await request.is_disconnected():
+                    self.cancellations += 1
+                    raise ClientDisconnected("client disconnected")
+        except BaseException:
+            # Timeout, disconnect or the handler itself being cancelled
+            with self._lock:
+                # Once done, the slot may already be released (and reused)
+                if not future.done():
+                    self._flags[slot] = True
+            future.cancel()
+            waiter.cancel()
+            raise
+        finally:
+            self._listeners.pop(job, None)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+            "cancellations": self.cancellations,
+        }
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self._events.put((-1, None))
+
+
+_executor: Optional[PlanExecutor] = None
+
+
+def get_plan_executor() -> PlanExecutor:
+    """Process-wide executor, created on first use (FastAPI dependency)."""
+    global _executor
+    if _executor is None:
+        _executor = PlanExecutor()
+    return _executor
+
+
+def shutdown_plan_executor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown()
+        _executor = None
@@ -0,0 +1,228 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.exc import DataError, IntegrityError
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.db import create_engine, feedback_kpis, metadata
+
+# Write-behind batching: rows per insert, max wait before a partial batch is written,
+# buffered rows before producers wait, and how long they wait before a 503 (env-driven)
+FEEDBACK_BATCH_SIZE = int(os.getenv("FEEDBACK_BATCH_SIZE", "500"))
+FEEDBACK_FLUSH_INTERVAL_S = float(os.getenv("FEEDBACK_FLUSH_INTERVAL_S", "0.2"))
+FEEDBACK_BUFFER_MAX = int(os.getenv("FEEDBACK_BUFFER_MAX", "20000"))
+FEEDBACK_PUT_TIMEOUT_S = float(os.getenv("FEEDBACK_PUT_TIMEOUT_S", "1.0"))
+
+# Failed attempts before a batch is halved (or a lone row rejected by the database is
+# dead-lettered), and how many dead-lettered rows are kept for inspection
+FEEDBACK_MAX_ATTEMPTS = int(os.getenv("FEEDBACK_MAX_ATTEMPTS", "3"))
+FEEDBACK_DEAD_LETTER_MAX = int(os.getenv("FEEDBACK_DEAD_LETTER_MAX", "1000"))
+
+# Pause after a failed insert (other than a rejected row) before it is retried
+_RETRY_S = 1.0
+
+
+class BufferFull(RuntimeError):
+    """The write-behind buffer had no room within the put timeout, or is not running (503)."""
+
+
+def kpi_rows(feedback: Dict[str, Any], received_at: Optional[float] = None) -> List[Dict[str, Any]]:
+    """``feedback_kpis`` rows of one ``FeedbackIngestRequest`` dict."""
+    received_at = time.time() if received_at is None else received_at
+    return [
+        {
+            "received_at": received_at,
+            "plan_name": feedback["plan_name"],
+            "kpi": kpi["name"],
+            "value": float(kpi["value"]),
+            "notes": feedback.get("notes"),
+        }
+        for kpi in feedback["kpis"]
+    ]
+
+
+class WriteBehindBuffer:
+    """Accept rows in memory and insert them into ``feedback_kpis`` in batches.
+
+    A background writer inserts up to ``batch_size`` rows per statement, as
+    soon as a batch is full or ``interval`` seconds after the writer last
+    found a partial batch. Rows leave the buffer only once their insert has
+    committed; a failed insert is retried, so a database outage fills the
+    buffer and :meth:`put` then waits up to ``put_timeout`` for room before
+    raising :class:`BufferFull`. A batch failing ``max_attempts`` times in a
+    row is halved, isolating bad rows: a single row the database rejects
+    (``DataError``/``IntegrityError``) is moved to :attr:`dead_letters`
+    instead of blocking the rows behind it. :meth:`close` writes out
+    everything buffered.
+    """
+
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        batch_size: int = FEEDBACK_BATCH_SIZE,
+        interval: float = FEEDBACK_FLUSH_INTERVAL_S,
+        max_rows: int = FEEDBACK_BUFFER_MAX,
+        put_timeout: float = FEEDBACK_PUT_TIMEOUT_S,
+        max_attempts: int = FEEDBACK_MAX_ATTEMPTS,
+    ):
+        self.engine = engine
+        self.batch_size = batch_size
+        self.interval = interval
+        self.max_rows = max_rows
+        self.put_timeout = put_timeout
+        self.max_attempts = max_attempts
+        self.dead_letters: Deque[Dict[str, Any]] = deque(maxlen=FEEDBACK_DEAD_LETTER_MAX)
+        self._rows: Deque[Dict[str, Any]] = deque()
+        self._cond = asyncio.Condition()
+        self._task: Optional[asyncio.Task] = None
+        self._schema_ready = False
+        self._closing = False
+        self._flushing = 0
+        self.counts = {
+            "accepted": 0,
+            "written": 0,
+            "batches": 0,
+            "rejected": 0,
+            "write_errors": 0,
+            "dead_lettered": 0,
+        }
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._writer(), name="feedback-writer")
+
+    async def put(self, rows: List[Dict[str, Any]]) -> int:
+        """Buffer ``rows`` (all or none); returns the buffer depth afterwards."""
+        if self._task is None or self._closing:
+            raise BufferFull("Feedback writer is not running")
+        if len(rows) > self.max_rows:
+            raise ValueError(f"{len(rows)} rows exceed the buffer size {self.max_rows}")
+        async with self._cond:
+            try:
+                await asyncio.wait_for(
+                    self._cond.wait_for(lambda: len(self._rows) + len(rows) <= self.max_rows),
+                    self.put_timeout,
+                )
+            except asyncio.TimeoutError:
+                self.counts["rejected"] += len(rows)
+                raise BufferFull(f"Feedback buffer full ({len(self._rows)} rows pending)")
+            self._rows.extend(rows)
+            self.counts["accepted"] += len(rows)
+            self._cond.notify_all()
+            return len(self._rows)
+
+    async def flush(self) -> None:
+        """Write everything buffered so far without waiting out the batch window."""
+        async with self._cond:
+            self._flushing += 1
+            self._cond.notify_all()
+            try:
+                await self._cond.wait_for(lambda: not self._rows or self._task is None)
+            finally:
+                self._flushing -= 1
+
+    async def close(self, timeout: float = 30.0) -> None:
+        """Stop accepting rows, write out the buffer, and dispose of the engine.
+
+        Rows still unwritten after ``timeout`` (e.g. the database is down) are dropped.
+        """
+        if self._task is not None:
+            async with self._cond:
+                self._closing = True
+                self._cond.notify_all()
+            try:
+                # wait_for cancels the writer when the timeout expires
+                await asyncio.wait_for(self._task, timeout)
+            except asyncio.TimeoutError:
+                pass
+            self._task = None
+        await self.engine.dispose()
+
+    def _batch_ready(self) -> bool:
+        return len(self._rows) >= self.batch_size or self._closing or self._flushing > 0
+
+    async def _writer(self) -> None:
+        limit, attempts = self.batch_size, 0
+        while True:
+            async with self._cond:
+                await self._cond.wait_for(lambda: self._rows or self._closing)
+                if not self._rows:
+                    return
+                if not self._batch_ready():
+                    window = self._cond.wait_for(self._batch_ready)
+                    try:
+                        await asyncio.wait_for(window, self.interval)
+                    except asyncio.TimeoutError:
+                        pass
+                batch = [self._rows[i] for i in range(min(len(self._rows), limit))]
+            try:
+                await self._insert(batch)
+            except Exception as e:
+                self.counts["write_errors"] += 1
+                attempts += 1
+                rejected = isinstance(e, (DataError, IntegrityError))
+                if attempts >= self.max_attempts:
+                    attempts = 0
+                    if len(batch) > 1:
+                        limit = (len(batch) + 1) // 2
+                    elif rejected:
+                        async with self._cond:
+                            self.dead_letters.append(self._rows.popleft())
+                            self.counts["dead_lettered"] += 1
+                            self._cond.notify_all()
+                if not rejected:
+                    await asyncio.sleep(_RETRY_S)
+                continue
+            limit, attempts = self.batch_size, 0
+            async with self._cond:
+                for _ in batch:
+                    self._rows.popleft()
+                self.counts["written"] += len(batch)
+                self.counts["batches"] += 1
+                self._cond.notify_all()
+
+    async def _insert(self, batch: List[Dict[str, Any]]) -> None:
+        async with self.engine.begin() as conn:
+            if not self._schema_ready:
+                await conn.run_sync(metadata.create_all)
+                self._schema_ready = True
+            await conn.execute(insert(feedback_kpis), batch)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.counts,
+            "pending": len(self._rows),
+            "max_rows": self.max_rows,
+            "batch_size": self.batch_size,
+            "running": self._task is not None and not self._closing,
+        }
+
+
+_buffer: Optional[WriteBehindBuffer] = None
+
+
+def get_feedback_buffer() -> WriteBehindBuffer:
+    """Process-wide buffer writing to :func:`app.db.database_url` (FastAPI dependency)."""
+    global _buffer
+    if _buffer is None:
+        _buffer = WriteBehindBuffer(create_engine())
+    return _buffer
+
+
+async def start_feedback_buffer() -> WriteBehindBuffer:
+    buffer = get_feedback_buffer()
+    buffer.start()
+    return buffer
+
+
+async def stop_feedback_buffer() -> None:
+    global _buffer
+    if _buffer is not None:
+        await _buffer.close()
+        _buffer = None
@@ -0,0 +1,403 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import heapq
+import itertools
+import json
+import logging
+import os
+import time
+import uuid
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.executor import PlanExecutor, QueueFull, get_plan_executor
+from app.planning import plan_job
+from app.redis_client import REDIS_URL, connect
+
+# Backend (memory|redis), worker concurrency and per-job time limit (env-driven, like API_PORT)
+JOB_BACKEND = os.getenv("JOB_BACKEND", "memory")
+JOB_CONCURRENCY = int(os.getenv("JOB_CONCURRENCY", "2"))
+JOB_TIMEOUT_S = float(os.getenv("JOB_TIMEOUT_S", "1800"))
+JOB_TTL_S = int(os.getenv("JOB_TTL_S", str(24 * 3600)))
+# A claimed job whose worker stops renewing this lease is requeued (Redis backend)
+JOB_LEASE_S = float(os.getenv("JOB_LEASE_S", "60"))
+
+TERMINAL = ("succeeded", "failed")
+
+# How long a worker waits on an empty queue before re-checking for shutdown
+_DEQUEUE_WAIT_S = 1.0
+# Back-off while the process pool is saturated (e.g. by /plan/generate)
+_POOL_FULL_WAIT_S = 0.25
+# Back-off after a backend error (e.g. Redis briefly unavailable)
+_BACKEND_RETRY_S = 1.0
+
+logger = logging.getLogger(__name__)
+
+Event = Tuple[str, Dict[str, Any]]
+
+
+def new_job(goal: Dict[str, Any], priority: int = 0, data: Optional[dict] = None) -> Dict[str, Any]:
+    """A queued job record; ``data`` is the job's :func:`app.planning.data_spec`."""
+    return {
+        "id": uuid.uuid4().hex,
+        "status": "queued",
+        "priority": int(priority),
+        "goal": goal,
+        "data": data,
+        "created_at": time.time(),
+        "started_at": None,
+        "finished_at": None,
+        "result": None,
+        "error": None,
+    }
+
+
+class JobBackend(ABC):
+    """Job records, a priority queue of job ids, and an append-only event log per job.
+
+    Event ids are opaque cursors: :meth:`read_events` returns the events after
+    ``cursor`` (``"0"``: from the start), waiting up to ``timeout`` for one.
+    """
+
+    @abstractmethod
+    async def create(self, job: Dict[str, Any]) -> None:
+        """Store the job and enqueue it (higher ``priority`` first, then FIFO)."""
+
+    @abstractmethod
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]: ...
+
+    @abstractmethod
+    async def update(self, job_id: str, **fields: Any) -> None: ...
+
+    @abstractmethod
+    async def dequeue(self, timeout: float) -> Optional[str]:
+        """Claim the next job id, or None after ``timeout`` seconds."""
+
+    async def renew(self, job_id: str) -> None:
+        """Extend the claim on a running job (worker heartbeat)."""
+
+    async def ack(self, job_id: str) -> None:
+        """Release the claim on a job that reached a terminal status."""
+
+    async def requeue(self, job: Dict[str, Any]) -> None:
+        """Hand a claimed job back to the queue."""
+        await self.create({**job, "status": "queued", "started_at": None})
+
+    async def reap(self) -> List[str]:
+        """Requeue jobs whose worker died; returns their ids."""
+        return []
+
+    @abstractmethod
+    async def publish(self, job_id: str, event: Dict[str, Any]) -> None: ...
+
+    @abstractmethod
+    async def read_events(self, job_id: str, cursor: str, timeout: float) -> List[Event]: ...
+
+    async def close(self) -> None:
+        return None
+
+
+class InMemoryJobBackend(JobBackend):
+    """Single-process backend (tests, local runs)."""
+
+    def __init__(self) -> None:
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._events: Dict[str, List[Dict[str, Any]]] = {}
+        self._queue: List[Tuple[int, int, str]] = []
+        self._seq = itertools.count()
+        self._queued = asyncio.Condition()
+        self._published = asyncio.Condition()
+
+    async def create(self, job: Dict[str, Any]) -> None:
+        self._jobs[job["id"]] = dict(job)
+        self._events.setdefault(job["id"], [])
+        async with self._queued:
+            heapq.heappush(self._queue, (-int(job["priority"]), next(self._seq), job["id"]))
+            self._queued.notify()
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self._jobs.get(job_id)
+        return dict(job) if job is not None else None
+
+    async def update(self, job_id: str, **fields: Any) -> None:
+        self._jobs[job_id].update(fields)
+
+    async def dequeue(self, timeout: float) -> Optional[str]:
+        async with self._queued:
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._queued.wait_for(lambda: bool(self._queue)), timeout)
+            return heapq.heappop(self._queue)[2] if self._queue else None
+
+    async def publish(self, job_id: str, event: Dict[str, Any]) -> None:
+        async with self._published:
+            self._events[job_id].append(event)
+            self._published.notify_all()
+
+    async def read_events(self, job_id: str, cursor: str, timeout: float) -> List[Event]:
+        start = int(cursor)
+        log = self._events.get(job_id, [])
+        async with self._published:
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._published.wait_for(lambda: len(log) > start), timeout)
+        return [(str(i + 1), e) for i, e in enumerate(log[start:], start)]
+
+
+class RedisJobBackend(JobBackend):
+    """Shared backend for several API processes.
+
+    Jobs are JSON strings with a TTL, the queue is a sorted set popped with
+    ``BZPOPMIN`` (score orders by priority, then enqueue time), and events go
+    to one Redis stream per job (``XREAD BLOCK`` for SSE).
+
+    Popped jobs enter a ``processing`` sorted set scored by a lease deadline
+    that the running worker renews; unfinished jobs are also kept in an
+    ``active`` set. :meth:`reap` requeues jobs whose lease expired, and jobs
+    found in neither the queue nor ``processing`` on two consecutive sweeps
+    (a replica that died between the pop and the claim). Delivery is thus
+    at least once: a worker stalled past its lease may see its job re-run.
+    """
+
+    def __init__(
+        self,
+        url: str = REDIS_URL,
+        prefix: str = "dk:jobs",
+        ttl: int = JOB_TTL_S,
+        client: Any = None,
+        lease: float = JOB_LEASE_S,
+    ):
+        self.redis = client if client is not None else connect(url)
+        self.prefix = prefix
+        self.ttl = ttl
+        self.lease = lease
+        self._suspects: set = set()
+
+    def _key(self, *parts: str) -> str:
+        return ":".join((self.prefix, *parts))
+
+    async def create(self, job: Dict[str, Any]) -> None:
+        # Priorities are small ints; within one, earlier jobs pop first
+        score = -int(job["priority"]) * 1e10 + float(job["created_at"])
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.set(self._key(job["id"]), json.dumps(job), ex=self.ttl)
+            pipe.zadd(self._key("queue"), {job["id"]: score})
+            pipe.zrem(self._key("processing"), job["id"])
+            pipe.sadd(self._key("active"), job["id"])
+            await pipe.execute()
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        raw = await self.redis.get(self._key(job_id))
+        return json.loads(raw) if raw is not None else None
+
+    async def update(self, job_id: str, **fields: Any) -> None:
+        # Only the worker running a job writes to it
+        job = await self.get(job_id) or {"id": job_id}
+        job.update(fields)
+        await self.redis.set(self._key(job_id), json.dumps(job), ex=self.ttl)
+
+    async def dequeue(self, timeout: float) -> Optional[str]:
+        popped = await self.redis.bzpopmin(self._key("queue"), timeout=timeout)
+        if not popped:
+            return None
+        await self.renew(popped[1])
+        return popped[1]
+
+    async def renew(self, job_id: str) -> None:
+        await self.redis.zadd(self._key("processing"), {job_id: time.time() + self.lease})
+
+    async def ack(self, job_id: str) -> None:
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.zrem(self._key("processing"), job_id)
+            pipe.srem(self._key("active"), job_id)
+            await pipe.execute()
+
+    async def reap(self) -> List[str]:
+        expired = set(await self.redis.zrangebyscore(self._key("processing"), "-inf", time.time()))
+        active = set(await self.redis.smembers(self._key("active")))
+        seen = set(await self.redis.zrange(self._key("queue"), 0, -1))
+        seen |= set(await self.redis.zrange(self._key("processing"), 0, -1))
+        orphans = active - seen
+        stale = expired | (orphans & self._suspects)
+        self._suspects = orphans - stale
+        requeued = []
+        for job_id in sorted(stale):
+            job = await self.get(job_id)
+            if job is None or job["status"] in TERMINAL:
+                await self.ack(job_id)
+                continue
+            await self.requeue(job)
+            await self.publish(job_id, {"type": "status", "status": "queued"})
+            requeued.append(job_id)
+        return requeued
+
+    async def publish(self, job_id: str, event: Dict[str, Any]) -> None:
+        key = self._key(job_id, "events")
+        await self.redis.xadd(key, {"data": json.dumps(event, default=str)})
+        await self.redis.expire(key, self.ttl)
+
+    async def read_events(self, job_id: str, cursor: str, timeout: float) -> List[Event]:
+        key = self._key(job_id, "events")
+        reply = await self.redis.xread({key: cursor}, block=max(1, int(timeout * 1000)))
+        return [
+            (event_id, json.loads(fields["data"]))
+            for _, entries in reply or []
+            for event_id, fields in entries
+        ]
+
+    async def close(self) -> None:
+        await self.redis.aclose()
+
+
+class JobRunner:
+    """Runs queued jobs on the process pool, ``concurrency`` at a time.
+
+    Each worker task pops the highest-priority job, runs ``job_fn(goal,
+    data)`` on the :class:`PlanExecutor`, and publishes a status event at
+    each transition plus one ``stage`` event per pipeline stage report.
+    While a job runs its claim is renewed every third of ``lease``; a reaper
+    task requeues the jobs of dead workers. Backend errors are logged and
+    retried after a pause rather than ending the worker.
+    """
+
+    def __init__(
+        self,
+        backend: JobBackend,
+        executor: Optional[PlanExecutor] = None,
+        concurrency: int = JOB_CONCURRENCY,
+        timeout: float = JOB_TIMEOUT_S,
+        job_fn: Callable[..., Any] = plan_job,
+        lease: float = JOB_LEASE_S,
+    ):
+        self.backend = backend
+        self.executor = executor
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.job_fn = job_fn
+        self.lease = lease
+        self.errors = 0
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self) -> None:
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.concurrency)]
+        self._tasks.append(asyncio.create_task(self._reap()))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _work(self) -> None:
+        while True:
+            try:
+                job_id = await self.backend.dequeue(_DEQUEUE_WAIT_S)
+                if job_id is None:
+                    continue
+                job = await self.backend.get(job_id)
+                if job is not None and job["status"] == "queued":
+                    await self.execute(job)
+                else:
+                    await self.backend.ack(job_id)  # finished or expired meanwhile
+            except Exception:
+                self.errors += 1
+                logger.exception("Job worker error; retrying in %.1fs", _BACKEND_RETRY_S)
+                await asyncio.sleep(_BACKEND_RETRY_S)
+
+    async def _reap(self) -> None:
+        while True:
+            await asyncio.sleep(self.lease / 2)
+            try:
+                await self.backend.reap()
+            except Exception:
+                self.errors += 1
+                logger.exception("Job reaper error")
+
+    async def _heartbeat(self, job_id: str) -> None:
+        while True:
+            await asyncio.sleep(self.lease / 3)
+            try:
+                await self.backend.renew(job_id)
+            except Exception:
+                logger.exception("Could not renew the claim on job %s", job_id)
+
+    async def _transition(self, job_id: str, status: str, **fields: Any) -> None:
+        await self.backend.update(job_id, status=status, **fields)
+        await self.backend.publish(job_id, {"type": "status", "status": status, **fields})
+
+    async def execute(self, job: Dict[str, Any]) -> None:
+        job_id = job["id"]
+        await self._transition(job_id, "running", started_at=time.time())
+        events: asyncio.Queue = asyncio.Queue()
+
+        async def forward() -> None:
+            # One publisher keeps stage events in order
+            while (event := await events.get()) is not None:
+                await self.backend.publish(job_id, {"type": "stage", **event})
+
+        forwarder = asyncio.create_task(forward())
+        heartbeat = asyncio.create_task(self._heartbeat(job_id))
+        executor = self.executor or get_plan_executor()
+        try:
+            while True:
+                try:
+                    result = await executor.run(
+                        self.job_fn,
+                        job["goal"],
+                        job.get("data"),
+                        timeout=self.timeout,
+                        on_progress=events.put_nowait,
+                    )
+                    break
+                except QueueFull:
+                    await asyncio.sleep(_POOL_FULL_WAIT_S)
+        except asyncio.CancelledError:
+            # Shutting down: hand the job back to the queue for another worker
+            forwarder.cancel()
+            await self.backend.requeue(job)
+            await self.backend.publish(job_id, {"type": "status", "status": "queued"})
+            raise
+        except Exception as e:
+            events.put_nowait(None)
+            await forwarder
+            error = str(e) or type(e).__name__
+            await self._transition(job_id, "failed", finished_at=time.time(), error=error)
+            await self.backend.ack(job_id)
+            return
+        finally:
+            heartbeat.cancel()
+        events.put_nowait(None)
+        await forwarder
+        await self.backend.update(job_id, result=result)
+        await self._transition(job_id, "succeeded", finished_at=time.time())
+        await self.backend.ack(job_id)
+
+
+_backend: Optional[JobBackend] = None
+_runner: Optional[JobRunner] = None
+
+
+def get_job_backend() -> JobBackend:
+    """Process-wide backend chosen by ``JOB_BACKEND`` (FastAPI dependency)."""
+    global _backend
+    if _backend is None:
+        _backend = RedisJobBackend() if JOB_BACKEND == "redis" else InMemoryJobBackend()
+    return _backend
+
+
+async def start_job_runner() -> JobRunner:
+    global _runner
+    if _runner is None:
+        _runner = JobRunner(get_job_backend())
+        _runner.start()
+    return _runner
+
+
+async def stop_job_runner() -> None:
+    global _runner, _backend
+    if _runner is not None:
+        await _runner.stop()
+        _runner = None
+    if _backend is not None:
+        await _backend.close()
+        _backend = None
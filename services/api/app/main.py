@@ -1,26 +1,56 @@
 from __future__ import annotations
 
 import os
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.responses import ORJSONResponse
 
-from app.routers import goals, questions, plan, feedback
+from app.cache import get_plan_cache
+from app.executor import get_plan_executor, shutdown_plan_executor
+from app.feedback import get_feedback_buffer, start_feedback_buffer, stop_feedback_buffer
+from app.jobs import start_job_runner, stop_job_runner
+from app.routers import goals, questions, plan, feedback, sessions
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await start_job_runner()
+    await start_feedback_buffer()
+    yield
+    await stop_job_runner()
+    await stop_feedback_buffer()  # writes out buffered feedback
+    shutdown_plan_executor()
 
 
 def create_app() -> FastAPI:
     app = FastAPI(
         title="SMB Goal→Plan API",
         default_response_class=ORJSONResponse,
+        lifespan=lifespan,
     )
 
     @app.get("/health")
     def health():
         return {"ok": True}
 
+    @app.get("/health/plan-pool")
+    def plan_pool_health():
+        return get_plan_executor().stats()
+
+    @app.get("/health/plan-cache")
+    def plan_cache_health():
+        return get_plan_cache().stats()
+
+    @app.get("/health/feedback")
+    def feedback_health():
+        return get_feedback_buffer().stats()
+
     app.include_router(goals.router)
     app.include_router(questions.router)
     app.include_router(plan.router)
     app.include_router(feedback.router)
+    app.include_router(sessions.router)
 
     return app
 
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import List, Optional
+from typing import List, Literal, Optional
 from pydantic import BaseModel, Field, field_validator
 
 
@@ -36,23 +36,46 @@ class PlanOption(BaseModel):
     estimated_monthly_cost: float
     expected_service_level: float = Field(ge=0, le=1)
     tradeoffs: str
+    summary: Optional[dict] = None  # pipeline summary + KPIs of the planned option
 
 
 class GeneratePlanRequest(BaseModel):
     goal: GoalDSL
+    session_id: Optional[str] = None  # plan on an upload session's data
+
+
+class PlanJobRequest(BaseModel):
+    goal: GoalDSL
+    priority: int = Field(default=0, ge=-10, le=10)  # higher runs first
+    session_id: Optional[str] = None
+
+
+class PlanJob(BaseModel):
+    id: str
+    status: Literal["queued", "running", "succeeded", "failed"]
+    priority: int
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Optional[dict] = None
+    error: Optional[str] = None
 
 
 class KPI(BaseModel):
-    name: str
+    name: str = Field(max_length=200)  # feedback_kpis.kpi is String(200)
     value: float
 
 
 class FeedbackIngestRequest(BaseModel):
-    plan_name: str
+    plan_name: str = Field(max_length=200)
     kpis: List[KPI]
     notes: Optional[str] = None
 
 
+class FeedbackBatchRequest(BaseModel):
+    items: List[FeedbackIngestRequest] = Field(min_length=1, max_length=1000)
+
+
 class Evidence(BaseModel):
     """Minimal evidence representation used by the kernel."""
 
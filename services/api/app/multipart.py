@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import re
+from typing import AsyncIterator, Callable, Dict, Optional, Protocol
+
+# Largest header block accepted for one part
+MAX_PART_HEADER_BYTES = 16 * 1024
+
+_PARAM = re.compile(r';\s*([\w*-]+)=(?:"((?:[^"\\]|\\.)*)"|([^;\s]*))')
+
+
+class MultipartError(ValueError):
+    """Malformed or truncated multipart body."""
+
+
+class PartSink(Protocol):
+    async def write(self, data: bytes) -> None: ...
+
+    async def close(self) -> None: ...
+
+
+def boundary_of(content_type: Optional[str]) -> bytes:
+    """The boundary of a ``multipart/form-data`` Content-Type header."""
+    if not content_type or not content_type.lower().startswith("multipart/form-data"):
+        raise MultipartError("Expected a multipart/form-data body")
+    params = parse_params(content_type)
+    if not params.get("boundary"):
+        raise MultipartError("Missing multipart boundary")
+    return params["boundary"].encode("latin-1")
+
+
+def parse_params(header: str) -> Dict[str, str]:
+    """``key=value`` parameters of a header such as Content-Disposition (keys lowercased)."""
+    params = {}
+    for m in _PARAM.finditer(header):
+        quoted, bare = m.group(2), m.group(3)
+        params[m.group(1).lower()] = re.sub(r"\\(.)", r"\1", quoted) if quoted is not None else bare
+    return params
+
+
+async def stream_multipart(
+    chunks: AsyncIterator[bytes],
+    boundary: bytes,
+    on_part: Callable[[Dict[str, str]], PartSink],
+) -> int:
+    """Feed each part of a multipart body to a sink as the bytes arrive; returns the part count.
+
+    ``on_part`` gets the part headers (names lowercased) and returns the sink
+    for its body, whose ``write``/``close`` are awaited (so disk I/O can run
+    off the event loop). Only a delimiter's worth of bytes is held back between
+    chunks, so memory stays bounded by the chunk size whatever the part size.
+    """
+    delim = b"\r\n--" + boundary
+    keep = len(delim) - 1
+    # The first delimiter has no leading CRLF
+    buf = bytearray(b"\r\n")
+    state = "preamble"
+    sink: Optional[PartSink] = None
+    parts = 0
+    async for chunk in chunks:
+        buf += chunk
+        while True:
+            if state == "preamble":
+                idx = buf.find(delim)
+                if idx < 0:
+                    del buf[: max(0, len(buf) - keep)]
+                    break
+                del buf[: idx + len(delim)]
+                state = "delimiter"
+            elif state == "delimiter":
+                if len(buf) < 2:
+                    break
+                if buf[:2] == b"--":
+                    state = "epilogue"
+                elif buf[:2] == b"\r\n":
+                    del buf[:2]
+                    state = "headers"
+                else:
+                    raise MultipartError("Malformed multipart delimiter")
+            elif state == "headers":
+                end = buf.find(b"\r\n\r\n")
+                if end < 0:
+                    if len(buf) > MAX_PART_HEADER_BYTES:
+                        raise MultipartError("Multipart part headers too large")
+                    break
+                headers = {}
+                for line in bytes(buf[:end]).decode("utf-8", "replace").split("\r\n"):
+                    name, sep, value = line.partition(":")
+                    if not sep:
+                        raise MultipartError(f"Malformed part header: {line!r}")
+                    headers[name.strip().lower()] = value.strip()
+                del buf[: end + 4]
+                sink = on_part(headers)
+                parts += 1
+                state = "body"
+            elif state == "body":
+                idx = buf.find(delim)
+                if idx < 0:
+                    safe = len(buf) - keep
+                    if safe > 0:
+                        await sink.write(bytes(buf[:safe]))  # type: ignore[union-attr]
+                        del buf[:safe]
+                    break
+                await sink.write(bytes(buf[:idx]))  # type: ignore[union-attr]
+                await sink.close()  # type: ignore[union-attr]
+                sink = None
+                del buf[: idx + len(delim)]
+                state = "delimiter"
+            else:  # epilogue
+                buf.clear()
+                break
+    if state != "epilogue":
+        raise MultipartError("Truncated multipart body")
+    return parts
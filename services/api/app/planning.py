@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# Import decision kernel (installed via Docker and local instructions)
+from dkernel.config import get_settings as get_kernel_settings
+from dkernel.dag import ArtifactStore
+from dkernel.data.cache import file_digest
+from dkernel.planning import plan_goal, plan_options
+
+from app.executor import cancelled, report_progress
+from app.sessions import TABLES, SessionStore, get_session_store
+
+# Directory with sales.csv / inventory.csv / offers.csv to plan on (synthetic data when unset)
+PLAN_DATA_DIR = os.getenv("PLAN_DATA_DIR")
+
+_TABLES = {"sales": "sales.csv", "inventory": "inventory.csv", "offers": "offers.csv"}
+
+# File digests keyed by (path, size, mtime): PLAN_DATA_DIR files are rehashed only on change
+_digests: Dict[Tuple[str, int, int], str] = {}
+
+
+def data_sources(data_dir: Optional[str] = PLAN_DATA_DIR) -> Optional[Dict[str, str]]:
+    """Paths of the input tables under ``data_dir``, or None (synthetic data) if any is missing."""
+    if not data_dir:
+        return None
+    paths = {name: Path(data_dir) / fname for name, fname in _TABLES.items()}
+    if not all(p.is_file() for p in paths.values()):
+        return None
+    return {name: str(p) for name, p in paths.items()}
+
+
+def data_spec(
+    session_id: Optional[str] = None, sessions: Optional[SessionStore] = None
+) -> Optional[dict]:
+    """Picklable description of the data a pool job plans on.
+
+    A session (its tables must all be uploaded), else ``PLAN_DATA_DIR``,
+    else None for synthetic data. Raises ``SessionNotFound`` / ``ValueError``.
+    """
+    if session_id:
+        sessions = sessions or get_session_store()
+        tables = sessions.manifest(session_id)["tables"]
+        missing = [k for k in TABLES if k not in tables]
+        if missing:
+            raise ValueError(f"Session {session_id} is missing tables: {missing}")
+        return {"session": session_id, "root": str(sessions.root)}
+    paths = data_sources()
+    return {"paths": paths} if paths else None
+
+
+def data_fingerprint(spec: Optional[dict], sessions: Optional[SessionStore] = None) -> str:
+    """Content identity of a :func:`data_spec`, for result cache keys (blocking on first hash).
+
+    Session tables carry their upload hashes; data-dir files are hashed once
+    per (size, mtime); synthetic data is fixed by the kernel seed.
+    """
+    if spec and "session" in spec:
+        sessions = sessions or SessionStore(spec["root"])
+        tables = sessions.manifest(spec["session"])["tables"]
+        return "session:" + ",".join(f"{k}={tables[k]['sha256']}" for k in TABLES)
+    if spec and spec.get("paths"):
+        parts = []
+        for name in sorted(spec["paths"]):
+            path = spec["paths"][name]
+            st = os.stat(path)
+            ident = (path, st.st_size, st.st_mtime_ns)
+            if ident not in _digests:
+                _digests[ident] = file_digest(path)
+            parts.append(f"{name}={_digests[ident]}")
+        return "files:" + ",".join(parts)
+    return f"synthetic:{get_kernel_settings().SEED}"
+
+
+def _open(spec: Optional[dict]) -> Tuple[Optional[dict], Optional[dict], Optional[ArtifactStore]]:
+    """(sources, source keys, store) for a :func:`data_spec` in the worker process."""
+    if spec and "session" in spec:
+        # Session tables are memory-mapped; load/features come precomputed from its store
+        return SessionStore(spec["root"]).open(spec["session"])
+    settings = get_kernel_settings()
+    store = (
+        ArtifactStore(settings.PIPELINE_CACHE_DIR, max_bytes=settings.PIPELINE_CACHE_MAX_BYTES)
+        if settings.PIPELINE_CACHE_DIR
+        else None
+    )
+    return (spec or {}).get("paths"), None, store
+
+
+def options_job(goal: Dict, spec: Optional[dict]) -> List[dict]:
+    """Pool job: the goal's three plan options (``/plan/generate``)."""
+    sources, keys, store = _open(spec)
+    return plan_options(goal, sources, store=store, cancel=cancelled, source_keys=keys)
+
+
+def plan_job(goal: Dict, spec: Optional[dict]) -> dict:
+    """Pool job: one full plan for the goal, reporting each pipeline stage (``/plan/jobs``)."""
+    sources, keys, store = _open(spec)
+    return plan_goal(
+        goal, sources, store=store, cancel=cancelled, progress=report_progress, source_keys=keys
+    )
+
+
+def features_job(spec: dict) -> None:
+    """Pool job: precompute a session's load/features stages after its upload."""
+    SessionStore(spec["root"]).precompute(spec["session"], cancel=cancelled)
@@ -0,0 +1,16 @@
+from __future__ import annotations
+
+import os
+from typing import Any
+
+# Redis for shared job queues and caches (REDIS_HOST/PORT come from docker-compose)
+REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
+REDIS_PORT = os.getenv("REDIS_PORT", "6379")
+REDIS_URL = os.getenv("REDIS_URL", f"redis://{REDIS_HOST}:{REDIS_PORT}/0")
+
+
+def connect(url: str = REDIS_URL) -> Any:
+    """An asyncio Redis client returning ``str`` values (connections are made lazily)."""
+    import redis.asyncio as aioredis
+
+    return aioredis.from_url(url, decode_responses=True)
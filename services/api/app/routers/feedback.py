@@ -1,15 +1,41 @@
 from __future__ import annotations
 
-from fastapi import APIRouter
+from typing import Dict, List
+
+from fastapi import APIRouter, Depends, HTTPException
 from fastapi.responses import ORJSONResponse
 
-from app.models.goal_dsl import FeedbackIngestRequest
+from app.feedback import BufferFull, WriteBehindBuffer, get_feedback_buffer, kpi_rows
+from app.models.goal_dsl import FeedbackBatchRequest, FeedbackIngestRequest
 
 
 router = APIRouter(prefix="/feedback", tags=["feedback"], default_response_class=ORJSONResponse)
 
 
+async def buffer_rows(buffer: WriteBehindBuffer, rows: List[Dict]) -> None:
+    try:
+        await buffer.put(rows)
+    except BufferFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except ValueError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+
 @router.post("/ingest")
-def ingest_feedback(req: FeedbackIngestRequest) -> ORJSONResponse:
-    return ORJSONResponse({"ok": True, "received": req.model_dump()})
+async def ingest_feedback(
+    req: FeedbackIngestRequest, buffer: WriteBehindBuffer = Depends(get_feedback_buffer)
+) -> ORJSONResponse:
+    """Queue the KPIs for the database; they are written behind in batches."""
+    feedback = req.model_dump()
+    await buffer_rows(buffer, kpi_rows(feedback))
+    return ORJSONResponse({"ok": True, "received": feedback})
+
 
+@router.post("/ingest:batch")
+async def ingest_feedback_batch(
+    req: FeedbackBatchRequest, buffer: WriteBehindBuffer = Depends(get_feedback_buffer)
+) -> ORJSONResponse:
+    """Queue many feedback items at once (all or none under backpressure)."""
+    rows = [row for item in req.items for row in kpi_rows(item.model_dump())]
+    await buffer_rows(buffer, rows)
+    return ORJSONResponse({"ok": True, "items": len(req.items), "kpis": len(rows)})
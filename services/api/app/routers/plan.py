@@ -1,21 +1,63 @@
 from __future__ import annotations
 
-from fastapi import APIRouter
-from fastapi.responses import ORJSONResponse
+import asyncio
+import json
+from typing import AsyncIterator, Optional
 
-from app.models.goal_dsl import GeneratePlanRequest, PlanOption
+from fastapi import APIRouter, Depends, Header, HTTPException, Request
+from fastapi.responses import ORJSONResponse, StreamingResponse
 
-# Import decision kernel (installed via Docker and local instructions)
-from dkernel import optimizer as dk_optimizer
+from app.cache import ResultCache, get_plan_cache, plan_cache_key
+from app.executor import ClientDisconnected, PlanExecutor, QueueFull, get_plan_executor
+from app.jobs import TERMINAL, JobBackend, get_job_backend, new_job
+from app.models.goal_dsl import GeneratePlanRequest, PlanJob, PlanJobRequest, PlanOption
+from app.planning import data_fingerprint, data_spec, options_job
+from app.sessions import SessionNotFound, SessionStore, get_session_store
+
+# Idle interval after which the event stream sends a keep-alive comment
+SSE_KEEPALIVE_S = 15.0
 
 
 router = APIRouter(prefix="/plan", tags=["plan"], default_response_class=ORJSONResponse)
 
 
+def resolve_data(session_id: Optional[str], sessions: SessionStore) -> Optional[dict]:
+    try:
+        return data_spec(session_id, sessions)
+    except SessionNotFound:
+        raise HTTPException(status_code=404, detail=f"Unknown session: {session_id}")
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
 @router.post("/generate", response_model=list[PlanOption])
-def generate_plan(req: GeneratePlanRequest) -> ORJSONResponse:
+async def generate_plan(
+    req: GeneratePlanRequest,
+    request: Request,
+    executor: PlanExecutor = Depends(get_plan_executor),
+    sessions: SessionStore = Depends(get_session_store),
+    cache: ResultCache = Depends(get_plan_cache),
+) -> ORJSONResponse:
+    """Three plan options for the goal, served from the result cache when the
+    same canonical goal was planned on the same data (``X-Cache`` tells which tier).
+    """
     goal_dict = req.goal.model_dump()
-    raw_options = dk_optimizer.build_plan(goal_dict)
+    spec = resolve_data(req.session_id, sessions)
+    fingerprint = await asyncio.to_thread(data_fingerprint, spec, sessions)
+    key = plan_cache_key(goal_dict, fingerprint)
+    try:
+        raw_options, source = await cache.get_or_compute(
+            key,
+            lambda: executor.run(options_job, goal_dict, spec, request=request),
+            retry_on=(ClientDisconnected,),
+        )
+    except QueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "1"})
+    except asyncio.TimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e) or "planning timed out")
+    except ClientDisconnected:
+        # Nobody is listening; 499 (client closed request) for the access log
+        return ORJSONResponse({"detail": "client disconnected"}, status_code=499)
 
     options: list[PlanOption] = []
     for ro in raw_options:
@@ -26,8 +68,67 @@ def generate_plan(req: GeneratePlanRequest) -> ORJSONResponse:
                 estimated_monthly_cost=ro["estimated_monthly_cost"],
                 expected_service_level=ro["expected_service_level"],
                 tradeoffs=ro.get("tradeoffs", ""),
+                summary=ro.get("summary"),
             )
         )
 
-    return ORJSONResponse([o.model_dump() for o in options])
+    return ORJSONResponse([o.model_dump() for o in options], headers={"X-Cache": source})
+
+
+@router.post("/jobs", status_code=202)
+async def create_plan_job(
+    req: PlanJobRequest,
+    backend: JobBackend = Depends(get_job_backend),
+    sessions: SessionStore = Depends(get_session_store),
+) -> ORJSONResponse:
+    data = resolve_data(req.session_id, sessions)
+    job = new_job(req.goal.model_dump(), priority=req.priority, data=data)
+    await backend.create(job)
+    await backend.publish(job["id"], {"type": "status", "status": "queued"})
+    return ORJSONResponse(
+        {"id": job["id"], "status": job["status"]},
+        status_code=202,
+        headers={"Location": f"{router.prefix}/jobs/{job['id']}"},
+    )
+
+
+@router.get("/jobs/{job_id}", response_model=PlanJob)
+async def get_plan_job(
+    job_id: str, backend: JobBackend = Depends(get_job_backend)
+) -> ORJSONResponse:
+    job = await backend.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    return ORJSONResponse(PlanJob(**job).model_dump())
+
+
+@router.get("/jobs/{job_id}/events")
+async def stream_plan_job(
+    job_id: str,
+    request: Request,
+    last_event_id: Optional[str] = Header(default=None),
+    backend: JobBackend = Depends(get_job_backend),
+) -> StreamingResponse:
+    """Server-Sent Events: status transitions and per-stage progress until the job ends.
+
+    Reconnecting clients resume after ``Last-Event-ID``.
+    """
+    if await backend.get(job_id) is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+
+    async def events() -> AsyncIterator[str]:
+        cursor = last_event_id or "0"
+        while not await request.is_disconnected():
+            batch = await backend.read_events(job_id, cursor, timeout=SSE_KEEPALIVE_S)
+            if not batch:
+                yield ": keep-alive\n\n"
+                continue
+            for cursor, event in batch:
+                data = json.dumps(event, default=str)
+                yield f"id: {cursor}\nevent: {event['type']}\ndata: {data}\n\n"
+                if event["type"] == "status" and event["status"] in TERMINAL:
+                    return
 
+    return StreamingResponse(
+        events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"}
+    )
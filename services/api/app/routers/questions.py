@@ -1,15 +1,30 @@
 from __future__ import annotations
 
-from typing import Dict, List
-from fastapi import APIRouter
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException
 from fastapi.responses import ORJSONResponse
 
+# Import decision kernel (installed via Docker and local instructions)
+from dkernel.planning import run_plan
+from dkernel.voi import VoIEngine, VoIInputs, pick_questions
+
+from app.sessions import SessionNotFound, SessionStore, get_session_store
+
 
 router = APIRouter(prefix="/questions", tags=["questions"], default_response_class=ORJSONResponse)
 
 
 _REQUIRED_FILES = ["sales.csv", "inventory.csv", "offers.csv"]
 
+# VoI engines of recently queried sessions (building one samples every SKU)
+_MAX_ENGINES = 16
+_engines: "OrderedDict[tuple, VoIEngine]" = OrderedDict()
+_engines_lock = threading.Lock()
+
 
 def _voi_rationale(name: str) -> str:
     why = {
@@ -20,12 +35,46 @@ def _voi_rationale(name: str) -> str:
     return why.get(name, "Improves plan quality via reduced uncertainty.")
 
 
+def session_engine(sessions: SessionStore, session_id: str, provided: Dict[str, bool]) -> VoIEngine:
+    """VoI engine on the session's precomputed features (blocking; cached per data + answers)."""
+    manifest = sessions.manifest(session_id)
+    key = (
+        session_id,
+        tuple(sorted((k, t["sha256"]) for k, t in manifest["tables"].items())),
+        tuple(sorted(provided.items())),
+    )
+    with _engines_lock:
+        if key in _engines:
+            _engines.move_to_end(key)
+            return _engines[key]
+    sources, keys, store = sessions.open(session_id)
+    feats = run_plan(sources, store=store, targets=("features",), source_keys=keys)["features"]
+    engine = VoIEngine(VoIInputs.from_features(feats, provided))
+    with _engines_lock:
+        _engines[key] = engine
+        while len(_engines) > _MAX_ENGINES:
+            _engines.popitem(last=False)
+    return engine
+
+
 @router.post("/next")
-def next_questions(payload: Dict[str, bool] | None = None) -> ORJSONResponse:
+async def next_questions(
+    payload: Dict[str, bool] | None = None,
+    session_id: Optional[str] = None,
+    sessions: SessionStore = Depends(get_session_store),
+) -> ORJSONResponse:
     provided = payload or {}
+    if session_id:
+        try:
+            manifest = sessions.manifest(session_id)
+        except SessionNotFound:
+            raise HTTPException(status_code=404, detail=f"Unknown session: {session_id}")
+        provided = {**sessions.provided(session_id), **provided}
+        if manifest["features"]:
+            engine = await asyncio.to_thread(session_engine, sessions, session_id, provided)
+            return ORJSONResponse(pick_questions(provided, engine=engine))
     missing = [f for f in _REQUIRED_FILES if not provided.get(f, False)]
     items: List[dict] = [
         {"id": f, "text": f"Please provide {f}", "why": _voi_rationale(f)} for f in missing
     ]
     return ORJSONResponse(items)
-
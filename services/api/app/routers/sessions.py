@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Dict, List, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import ORJSONResponse
+
+from app.executor import ClientDisconnected, PlanExecutor, QueueFull, get_plan_executor
+from app.multipart import MultipartError, boundary_of, parse_params, stream_multipart
+from app.planning import features_job
+from app.sessions import (
+    TABLES,
+    FileTooLarge,
+    RawUpload,
+    SessionNotFound,
+    SessionStore,
+    get_session_store,
+    table_kind,
+)
+
+router = APIRouter(prefix="/sessions", tags=["sessions"], default_response_class=ORJSONResponse)
+
+
+def session_or_404(store: SessionStore, session_id: str) -> Dict:
+    try:
+        return store.manifest(session_id)
+    except SessionNotFound:
+        raise HTTPException(status_code=404, detail=f"Unknown session: {session_id}")
+
+
+@router.post("", status_code=201)
+def create_session(store: SessionStore = Depends(get_session_store)) -> ORJSONResponse:
+    return ORJSONResponse(store.create(), status_code=201)
+
+
+@router.get("/{session_id}")
+def get_session(
+    session_id: str, store: SessionStore = Depends(get_session_store)
+) -> ORJSONResponse:
+    return ORJSONResponse(session_or_404(store, session_id))
+
+
+@router.delete("/{session_id}", status_code=204)
+def delete_session(session_id: str, store: SessionStore = Depends(get_session_store)) -> None:
+    session_or_404(store, session_id)
+    store.delete(session_id)
+
+
+@router.post("/{session_id}/files")
+async def upload_files(
+    session_id: str,
+    request: Request,
+    store: SessionStore = Depends(get_session_store),
+    executor: PlanExecutor = Depends(get_plan_executor),
+) -> ORJSONResponse:
+    """Stream ``sales``/``inventory``/``offers`` CSV parts to disk, then validate each.
+
+    Parts are matched by field name or file name (``sales.csv``). Bodies are
+    written chunk by chunk as they arrive; nothing is buffered whole. Once
+    the session holds every table, its features are precomputed in the plan
+    pool; if the pool is busy, the first plan computes them instead.
+    """
+    session_or_404(store, session_id)
+    uploads: List[Tuple[str, RawUpload]] = []
+
+    def on_part(headers: Dict[str, str]) -> RawUpload:
+        disposition = parse_params(headers.get("content-disposition", ""))
+        kind = table_kind(disposition.get("name"), disposition.get("filename"))
+        if kind is None:
+            raise MultipartError(
+                f"Unexpected part {disposition.get('name')!r}; expected sales, inventory or offers"
+            )
+        if any(k == kind for k, _ in uploads):
+            raise MultipartError(f"Duplicate {kind} part; upload each table once")
+        upload = store.raw_upload(session_id, kind)
+        uploads.append((kind, upload))
+        return upload
+
+    try:
+        try:
+            boundary = boundary_of(request.headers.get("content-type"))
+            await stream_multipart(request.stream(), boundary, on_part)
+        except FileTooLarge as e:
+            raise HTTPException(status_code=413, detail=str(e))
+        except MultipartError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if not uploads:
+            raise HTTPException(status_code=400, detail="No files in upload")
+
+        manifest: Dict = {}
+        errors = {}
+        for kind, upload in uploads:
+            try:
+                # Parsing and validation are CPU-bound: keep them off the event loop
+                manifest = await asyncio.to_thread(store.ingest, session_id, kind, upload)
+            except ValueError as e:
+                errors[kind] = str(e)
+    finally:
+        # Raw files are removed once ingested; drop whatever an error or disconnect left behind
+        for _, upload in uploads:
+            upload.discard()
+    if errors:
+        detail = {"errors": errors, "session": store.manifest(session_id)}
+        raise HTTPException(status_code=422, detail=detail)
+    if all(k in manifest["tables"] for k in TABLES):
+        spec = {"session": session_id, "root": str(store.root)}
+        try:
+            await executor.run(features_job, spec, request=request)
+        except (QueueFull, asyncio.TimeoutError, ClientDisconnected):
+            pass
+        else:
+            manifest = store.mark_features(session_id)
+    return ORJSONResponse(manifest)
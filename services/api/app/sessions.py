@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import pandas as pd
+
+# Import decision kernel (installed via Docker and local instructions)
+from dkernel.dag import ArtifactStore
+from dkernel.data.adapters import load_inventory_csv, load_offers_csv, load_sales_csv
+from dkernel.data.cache import read_columns, schema_version, write_columns
+from dkernel.planning import run_plan
+
+# Where sessions live, how long they are kept, and the per-file upload limit (env-driven)
+SESSION_DIR = os.getenv("SESSION_DIR", "./_out/sessions")
+SESSION_TTL_S = float(os.getenv("SESSION_TTL_S", str(24 * 3600)))
+SESSION_MAX_FILE_BYTES = int(os.getenv("SESSION_MAX_FILE_BYTES", str(2 << 30)))
+SESSION_STORE_MAX_BYTES = int(os.getenv("SESSION_STORE_MAX_BYTES", str(1 << 30)))
+
+TABLES = ("sales", "inventory", "offers")
+# Upload bytes gathered before one disk write (hashing and writing run in a worker thread)
+_WRITE_BUFFER = 1 << 20
+_LOADERS = {"sales": load_sales_csv, "inventory": load_inventory_csv, "offers": load_offers_csv}
+
+
+class SessionNotFound(KeyError):
+    """Unknown or expired session id."""
+
+
+class FileTooLarge(ValueError):
+    """An uploaded file exceeded ``SESSION_MAX_FILE_BYTES`` (maps to 413)."""
+
+
+def table_kind(field: Optional[str], filename: Optional[str]) -> Optional[str]:
+    """The table a multipart part carries: its field name, else its file name (``sales.csv``)."""
+    for name in (field, Path(filename).stem if filename else None):
+        if name and name.lower() in TABLES:
+            return name.lower()
+    return None
+
+
+class RawUpload:
+    """Multipart sink streaming one table to ``<session>/raw/<kind>.csv`` while hashing it.
+
+    Chunks are gathered into ``_WRITE_BUFFER``-sized blocks that are hashed
+    and written in a worker thread, keeping disk I/O off the event loop.
+    """
+
+    def __init__(self, path: Path, max_bytes: int = SESSION_MAX_FILE_BYTES):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.sha256 = hashlib.sha256()
+        self._pending = bytearray()
+        self._file = open(path, "wb")
+
+    async def write(self, data: bytes) -> None:
+        self.bytes += len(data)
+        if self.bytes > self.max_bytes:
+            raise FileTooLarge(f"{self.path.name} exceeds {self.max_bytes} bytes")
+        self._pending += data
+        if len(self._pending) >= _WRITE_BUFFER:
+            await self._drain()
+
+    async def close(self) -> None:
+        if self._pending:
+            await self._drain()
+        self._file.close()
+
+    async def _drain(self) -> None:
+        block, self._pending = bytes(self._pending), bytearray()
+        await asyncio.to_thread(self._write_block, block)
+
+    def _write_block(self, block: bytes) -> None:
+        self.sha256.update(block)
+        self._file.write(block)
+
+    def discard(self) -> None:
+        self._file.close()
+        self.path.unlink(missing_ok=True)
+
+
+class SessionStore:
+    """Per-session dataset store.
+
+    Each uploaded table is validated with the kernel loaders and kept
+    column-wise (``dkernel.data.cache.write_columns``, memory-mapped on read);
+    the raw CSV is dropped. Once all tables are present the pipeline's load
+    and features stages can be precomputed (:meth:`precompute`, run in the
+    plan pool) into the session's own :class:`ArtifactStore`, so plans and
+    VoI on the session start from them.
+    ``session.json`` records each table's rows, bytes and content hash.
+    """
+
+    def __init__(self, root: str | Path = SESSION_DIR, ttl: float = SESSION_TTL_S):
+        self.root = Path(root)
+        self.ttl = ttl
+        self._lock = threading.Lock()
+
+    def path(self, session_id: str) -> Path:
+        # ids are uuid hex: reject anything that could escape the root
+        if not session_id.isalnum() or not (self.root / session_id / "session.json").exists():
+            raise SessionNotFound(session_id)
+        return self.root / session_id
+
+    def create(self) -> Dict[str, Any]:
+        self.purge_expired()
+        session_id = uuid.uuid4().hex
+        manifest = {"id": session_id, "created_at": time.time(), "tables": {}, "features": False}
+        (self.root / session_id).mkdir(parents=True)  # creates the root on first use
+        self._write(session_id, manifest)
+        return manifest
+
+    def manifest(self, session_id: str) -> Dict[str, Any]:
+        return json.loads((self.path(session_id) / "session.json").read_text())
+
+    def _write(self, session_id: str, manifest: Dict[str, Any]) -> None:
+        dest = self.root / session_id / "session.json"
+        tmp = dest.with_suffix(".tmp")
+        tmp.write_text(json.dumps(manifest))
+        os.replace(tmp, dest)
+
+    def raw_upload(self, session_id: str, kind: str) -> RawUpload:
+        return RawUpload(self.path(session_id) / "raw" / f"{kind}.csv")
+
+    def ingest(self, session_id: str, kind: str, upload: RawUpload) -> Dict[str, Any]:
+        """Validate an uploaded CSV into the columnar table store (blocking; run off the loop).
+
+        Raises ``ValueError`` (schema or parse errors) with the raw file removed.
+        """
+        base = self.path(session_id)
+        try:
+            df = _LOADERS[kind](str(upload.path))
+        finally:
+            upload.discard()
+        tmp = base / "tables" / f".{kind}.tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        write_columns(df, tmp)
+        dest = base / "tables" / kind
+        shutil.rmtree(dest, ignore_errors=True)
+        os.replace(tmp, dest)
+        entry = {
+            "rows": int(len(df)),
+            "bytes": upload.bytes,
+            "sha256": upload.sha256.hexdigest(),
+            "columns": [str(c) for c in df.columns],
+        }
+        with self._lock:
+            manifest = self.manifest(session_id)
+            manifest["tables"][kind] = entry
+            manifest["features"] = False
+            self._write(session_id, manifest)
+        return manifest
+
+    def precompute(
+        self, session_id: str, cancel: Optional[Callable[[], bool]] = None
+    ) -> None:
+        """Run the load and features stages into the session's store (blocking, CPU-bound)."""
+        sources, keys, store = self.open(session_id)
+        run_plan(sources, store=store, targets=("features",), cancel=cancel, source_keys=keys)
+
+    def mark_features(self, session_id: str) -> Dict[str, Any]:
+        """Record that :meth:`precompute` ran; returns the manifest."""
+        with self._lock:
+            manifest = self.manifest(session_id)
+            manifest["features"] = True
+            self._write(session_id, manifest)
+        return manifest
+
+    def open(
+        self, session_id: str
+    ) -> Tuple[Dict[str, pd.DataFrame], Dict[str, str], ArtifactStore]:
+        """Pipeline sources (memory-mapped tables), their content keys, and the session's store."""
+        base = self.path(session_id)
+        manifest = self.manifest(session_id)
+        missing = [k for k in TABLES if k not in manifest["tables"]]
+        if missing:
+            raise ValueError(f"Session {session_id} is missing tables: {missing}")
+        sources = {k: read_columns(base / "tables" / k) for k in TABLES}
+        keys = {
+            k: f"session:{k}:{schema_version(k)}:{manifest['tables'][k]['sha256']}" for k in TABLES
+        }
+        store = ArtifactStore(base / "pipeline", max_bytes=SESSION_STORE_MAX_BYTES)
+        return sources, keys, store
+
+    def provided(self, session_id: str) -> Dict[str, bool]:
+        """``/questions/next`` context: which CSVs the session holds."""
+        tables = self.manifest(session_id)["tables"]
+        return {f"{k}.csv": k in tables for k in TABLES}
+
+    def delete(self, session_id: str) -> None:
+        shutil.rmtree(self.path(session_id), ignore_errors=True)
+
+    def purge_expired(self) -> int:
+        cutoff = time.time() - self.ttl
+        purged = 0
+        for meta in self.root.glob("*/session.json"):
+            if meta.stat().st_mtime < cutoff:
+                shutil.rmtree(meta.parent, ignore_errors=True)
+                purged += 1
+        return purged
+
+
+_store: Optional[SessionStore] = None
+
+
+def get_session_store() -> SessionStore:
+    """Process-wide session store under ``SESSION_DIR`` (FastAPI dependency)."""
+    global _store
+    if _store is None:
+        _store = SessionStore()
+    return _store
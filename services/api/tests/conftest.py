@@ -0,0 +1,105 @@
+import asyncio
+import time
+
+import pytest
+
+
+class MemoryRedis:
+    """In-process stand-in for the redis.asyncio calls the cache and job backend make."""
+
+    def __init__(self):
+        self.data = {}
+        self.zsets = {}
+        self.sets = {}
+        self.streams = {}
+        self._seq = 0
+
+    async def get(self, key):
+        value, expires = self.data.get(key, (None, 0))
+        return value if expires > time.monotonic() else None
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = (value, time.monotonic() + (ex or 1e9))
+
+    async def expire(self, key, seconds):
+        pass
+
+    async def zadd(self, key, mapping):
+        self.zsets.setdefault(key, {}).update(mapping)
+
+    async def zrem(self, key, *members):
+        for member in members:
+            self.zsets.get(key, {}).pop(member, None)
+
+    async def zrange(self, key, start, end):
+        members = sorted(self.zsets.get(key, {}).items(), key=lambda kv: (kv[1], kv[0]))
+        return [m for m, _ in members][start : None if end == -1 else end + 1]
+
+    async def zrangebyscore(self, key, low, high):
+        low, high = float(low), float(high)
+        return [m for m in await self.zrange(key, 0, -1) if low <= self.zsets[key][m] <= high]
+
+    async def bzpopmin(self, key, timeout=0):
+        deadline = time.monotonic() + timeout
+        while not self.zsets.get(key):
+            if time.monotonic() >= deadline:
+                return None
+            await asyncio.sleep(0.005)
+        member = (await self.zrange(key, 0, 0))[0]
+        return key, member, self.zsets[key].pop(member)
+
+    async def sadd(self, key, *members):
+        self.sets.setdefault(key, set()).update(members)
+
+    async def srem(self, key, *members):
+        self.sets.get(key, set()).difference_update(members)
+
+    async def smembers(self, key):
+        return set(self.sets.get(key, set()))
+
+    async def xadd(self, key, fields):
+        self._seq += 1
+        self.streams.setdefault(key, []).append((f"{self._seq}-0", dict(fields)))
+
+    async def xread(self, streams, block=None):
+        deadline = time.monotonic() + (block or 0) / 1000
+        while True:
+            reply = []
+            for key, cursor in streams.items():
+                after = int(str(cursor).split("-")[0])
+                entries = [e for e in self.streams.get(key, []) if int(e[0].split("-")[0]) > after]
+                if entries:
+                    reply.append([key, entries])
+            if reply or time.monotonic() >= deadline:
+                return reply
+            await asyncio.sleep(0.005)
+
+    def pipeline(self, transaction=True):
+        return _MemoryPipeline(self)
+
+    async def aclose(self):
+        pass
+
+
+class _MemoryPipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.calls = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __getattr__(self, name):
+        method = getattr(self.redis, name)
+        return lambda *args, **kwargs: self.calls.append(method(*args, **kwargs))
+
+    async def execute(self):
+        return [await call for call in self.calls]
+
+
+@pytest.fixture
+def memory_redis():
+    return MemoryRedis()
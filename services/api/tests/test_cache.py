@@ -0,0 +1,121 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.cache import ResultCache, get_plan_cache, plan_cache_key
+from app.executor import ClientDisconnected
+from app.main import app
+
+GOAL = {
+    "monthly_budget_gbp": 8000,
+    "service_level_target": 0.97,
+    "categories": ["Supplies", "cleaning"],
+    "excludes": ["Supplier E"],
+    "constraints": [],
+}
+
+
+def test_cache_key_ignores_order_case_and_float_noise():
+    noisy = {
+        **GOAL,
+        "monthly_budget_gbp": 8000.0000001,
+        "categories": ["cleaning", "supplies", "SUPPLIES"],
+        "excludes": [" supplier e"],
+    }
+    assert plan_cache_key(noisy, "synthetic:42") == plan_cache_key(GOAL, "synthetic:42")
+    assert plan_cache_key(GOAL, "synthetic:42") != plan_cache_key(GOAL, "session:abc")
+    assert plan_cache_key({**GOAL, "service_level_target": 0.95}, "synthetic:42") != plan_cache_key(
+        GOAL, "synthetic:42"
+    )
+
+
+def test_cache_key_follows_the_constraint_planning_applies():
+    def goal(*constraints):
+        return {**GOAL, "constraints": [{"name": n, "details": d} for n, d in constraints]}
+
+    # The last max_lead_time wins in planning, so order matters here
+    first = goal(("max_lead_time", "7"), ("max_lead_time", "14"))
+    swapped = goal(("max_lead_time", "14"), ("max_lead_time", "7"))
+    assert plan_cache_key(first, "synthetic:42") != plan_cache_key(swapped, "synthetic:42")
+    last_only = goal(("Max Lead Time", "14"))
+    assert plan_cache_key(first, "synthetic:42") == plan_cache_key(last_only, "synthetic:42")
+    # Vendor bans accumulate, so their order does not
+    bans = goal(("banned_vendors", "Supplier A"), ("banned_vendors", "supplier b"))
+    reordered = goal(("banned_vendors", "Supplier B"), ("banned_vendors", "Supplier A"))
+    assert plan_cache_key(bans, "synthetic:42") == plan_cache_key(reordered, "synthetic:42")
+
+
+def test_two_tiers_single_flight_ttl_and_eviction(memory_redis):
+    async def scenario():
+        redis = memory_redis
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return {"options": [1, 2, 3]}
+
+        cache = ResultCache(redis=redis, ttl=60)
+        results = await asyncio.gather(*(cache.get_or_compute("k", compute) for _ in range(5)))
+        assert len(calls) == 1
+        assert sorted(src for _, src in results) == ["coalesced"] * 4 + ["miss"]
+        assert await cache.get_or_compute("k", compute) == ({"options": [1, 2, 3]}, "l1")
+
+        # A second process shares the result through Redis
+        other = ResultCache(redis=redis, ttl=60)
+        assert (await other.get_or_compute("k", compute))[1] == "l2"
+        assert (await other.get_or_compute("k", compute))[1] == "l1"
+        assert len(calls) == 1
+        assert cache.stats()["hit_rate"] == pytest.approx(5 / 6, abs=1e-3)
+
+        # Expired entries are recomputed
+        short = ResultCache(ttl=0.01)
+        await short.get_or_compute("k", compute)
+        await asyncio.sleep(0.02)
+        assert (await short.get_or_compute("k", compute))[1] == "miss"
+
+        # The byte bound evicts least recently used entries
+        small = ResultCache(max_bytes=64)
+        for i in range(4):
+            await small.get_or_compute(f"k{i}", lambda: asyncio.sleep(0, result="x" * 20))
+        assert small.stats()["evictions"] == 2 and small.local.bytes <= 64
+
+    asyncio.run(scenario())
+
+
+def test_followers_recompute_when_the_leader_disconnects():
+    async def scenario():
+        cache = ResultCache()
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.02)
+            if len(calls) == 1:
+                raise ClientDisconnected()
+            return "ok"
+
+        leader = asyncio.ensure_future(cache.get_or_compute("k", compute, (ClientDisconnected,)))
+        await asyncio.sleep(0)
+        follower = await cache.get_or_compute("k", compute, (ClientDisconnected,))
+        with pytest.raises(ClientDisconnected):
+            await leader
+        assert follower == ("ok", "miss") and len(calls) == 2
+
+    asyncio.run(scenario())
+
+
+def test_plan_generate_serves_repeat_goals_from_cache():
+    cache = ResultCache()
+    app.dependency_overrides[get_plan_cache] = lambda: cache
+    try:
+        with TestClient(app) as client:
+            first = client.post("/plan/generate", json={"goal": GOAL})
+            reordered = {**GOAL, "categories": ["cleaning", "supplies"]}
+            second = client.post("/plan/generate", json={"goal": reordered})
+        assert first.headers["x-cache"] == "miss" and second.headers["x-cache"] == "l1"
+        assert first.json() == second.json()
+        assert cache.stats()["misses"] == 1
+    finally:
+        app.dependency_overrides.clear()
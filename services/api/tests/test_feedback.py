@@ -0,0 +1,114 @@
+import asyncio
+import sqlite3
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.exc import DataError
+
+from app import feedback as feedback_mod
+from app.db import create_engine
+from app.feedback import BufferFull, WriteBehindBuffer, kpi_rows
+from app.main import app
+
+ITEM = {"plan_name": "balanced", "kpis": [{"name": "service_level", "value": 0.965}], "notes": "ok"}
+
+
+def _count(db) -> int:
+    with sqlite3.connect(db) as conn:
+        return conn.execute("SELECT COUNT(*) FROM feedback_kpis").fetchone()[0]
+
+
+def test_ingest_endpoints_persist_on_shutdown(tmp_path, monkeypatch):
+    db = tmp_path / "feedback.db"
+    buffer = WriteBehindBuffer(create_engine(f"sqlite+aiosqlite:///{db}"), interval=30)
+    monkeypatch.setattr(feedback_mod, "_buffer", buffer)
+    with TestClient(app) as client:
+        r = client.post("/feedback/ingest", json=ITEM)
+        assert r.status_code == 200 and r.json()["received"]["plan_name"] == "balanced"
+        batch = {"items": [ITEM, {**ITEM, "kpis": ITEM["kpis"] * 3}]}
+        r = client.post("/feedback/ingest:batch", json=batch)
+        assert r.json() == {"ok": True, "items": 2, "kpis": 4}
+        assert client.post("/feedback/ingest:batch", json={"items": []}).status_code == 422
+        assert client.get("/health/feedback").json()["pending"] == 5
+    # Shutdown wrote out the partial batch despite the long window
+    assert _count(db) == 5 and buffer.counts["batches"] == 1
+
+
+def test_buffer_batches_by_size_and_window(tmp_path):
+    async def scenario():
+        db = tmp_path / "feedback.db"
+        buffer = WriteBehindBuffer(
+            create_engine(f"sqlite+aiosqlite:///{db}"), batch_size=10, interval=0.05
+        )
+        buffer.start()
+        await buffer.put(kpi_rows({**ITEM, "kpis": ITEM["kpis"] * 25}))
+        for _ in range(100):
+            if buffer.counts["written"] == 25:
+                break
+            await asyncio.sleep(0.01)
+        # two full batches, then the remainder once the window passed
+        assert buffer.counts["batches"] == 3 and _count(db) == 25
+        await buffer.close()
+
+    asyncio.run(scenario())
+
+
+def test_buffer_applies_backpressure_while_writes_fail(tmp_path):
+    async def scenario():
+        buffer = WriteBehindBuffer(
+            create_engine(f"sqlite+aiosqlite:///{tmp_path / 'f.db'}"),
+            batch_size=2,
+            max_rows=4,
+            put_timeout=0.05,
+        )
+
+        async def down(batch):
+            raise ConnectionError("database unavailable")
+
+        buffer._insert = down
+        with pytest.raises(BufferFull):
+            await buffer.put(kpi_rows(ITEM))  # not started
+        buffer.start()
+        await buffer.put(kpi_rows({**ITEM, "kpis": ITEM["kpis"] * 4}))
+        with pytest.raises(BufferFull):
+            await buffer.put(kpi_rows(ITEM))
+        await asyncio.sleep(0.01)
+        stats = buffer.stats()
+        assert stats["pending"] == 4 and stats["rejected"] == 1 and stats["write_errors"] >= 1
+        await buffer.close(timeout=0.05)
+        assert not buffer.stats()["running"]
+
+    asyncio.run(scenario())
+
+
+def test_writer_isolates_and_dead_letters_rejected_rows(tmp_path):
+    async def scenario():
+        db = tmp_path / "feedback.db"
+        buffer = WriteBehindBuffer(
+            create_engine(f"sqlite+aiosqlite:///{db}"), batch_size=8, interval=0.01
+        )
+        insert = buffer._insert
+
+        async def strict(batch):
+            # SQLite does not enforce String(200); Postgres raises DataError
+            if any(len(row["plan_name"]) > 200 for row in batch):
+                raise DataError("INSERT INTO feedback_kpis", {}, Exception("value too long"))
+            await insert(batch)
+
+        buffer._insert = strict
+        buffer.start()
+        rows = kpi_rows({**ITEM, "kpis": ITEM["kpis"] * 20})
+        rows[5] = {**rows[5], "plan_name": "x" * 201}
+        await buffer.put(rows)
+        await buffer.flush()
+        assert _count(db) == 19 and buffer.counts["dead_lettered"] == 1
+        assert buffer.dead_letters[0]["plan_name"] == "x" * 201
+        await buffer.close()
+
+    asyncio.run(scenario())
+
+
+def test_ingest_rejects_names_longer_than_the_column():
+    with TestClient(app) as client:
+        r = client.post("/feedback/ingest", json={**ITEM, "plan_name": "x" * 201})
+        assert r.status_code == 422
@@ -0,0 +1,154 @@
+import asyncio
+import json
+
+from fastapi.testclient import TestClient
+
+from app import jobs as jobs_mod
+from app.executor import PlanExecutor
+from app.jobs import InMemoryJobBackend, JobRunner, RedisJobBackend, new_job
+from app.main import app
+
+GOAL = {"monthly_budget_gbp": 8000, "service_level_target": 0.97, "excludes": ["Supplier E"]}
+
+
+def _sse(lines):
+    events, event = [], {}
+    for line in lines:
+        if not line:
+            if event:
+                events.append(event)
+            event = {}
+        elif not line.startswith(":"):
+            field, _, value = line.partition(": ")
+            event[field] = value
+    return events
+
+
+def test_plan_job_streams_stage_progress_and_stores_result():
+    with TestClient(app) as client:
+        r = client.post("/plan/jobs", json={"goal": GOAL, "priority": 1})
+        assert r.status_code == 202
+        job_id = r.json()["id"]
+        with client.stream("GET", f"/plan/jobs/{job_id}/events") as stream:
+            events = _sse(stream.iter_lines())
+        data = [json.loads(e["data"]) for e in events]
+        stages = [d["stage"] for d in data if d["type"] == "stage" and d["status"] != "running"]
+        assert stages == ["load", "features", "forecast", "optimize", "score"]
+        statuses = [d["status"] for d in data if d["type"] == "status"]
+        assert statuses == ["queued", "running", "succeeded"]
+
+        job = client.get(f"/plan/jobs/{job_id}").json()
+        assert job["status"] == "succeeded" and job["priority"] == 1
+        assert job["result"]["summary"]["total_cost"] > 0
+        assert "policy" in job["result"]["summary"]  # goal excludes applied as policies
+        assert client.get("/plan/jobs/missing").status_code == 404
+
+
+def test_in_memory_backend_pops_by_priority_then_fifo():
+    async def scenario():
+        backend = InMemoryJobBackend()
+        jobs = [new_job(GOAL, 0), new_job(GOAL, 5), new_job(GOAL, 0)]
+        for job in jobs:
+            await backend.create(job)
+        order = [await backend.dequeue(0.01) for _ in range(3)]
+        assert order == [jobs[1]["id"], jobs[0]["id"], jobs[2]["id"]]
+        assert await backend.dequeue(0.01) is None
+
+    asyncio.run(scenario())
+
+
+def test_runner_marks_failed_jobs():
+    async def scenario():
+        backend = InMemoryJobBackend()
+        ex = PlanExecutor(workers=1, max_pending=1)
+        try:
+            job = new_job(GOAL)
+            await backend.create(job)
+            # divmod(goal, sources) raises TypeError in the worker
+            await JobRunner(backend, executor=ex, job_fn=divmod).execute(job)
+            stored = await backend.get(job["id"])
+            assert stored["status"] == "failed" and "unsupported operand" in stored["error"]
+            events = await backend.read_events(job["id"], "0", timeout=0)
+            assert [e["status"] for _, e in events] == ["running", "failed"]
+        finally:
+            ex.shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_redis_backend_orders_claims_and_streams_events(memory_redis):
+    async def scenario():
+        backend = RedisJobBackend(client=memory_redis)
+        jobs = [new_job(GOAL, 0), new_job(GOAL, 5), new_job(GOAL, 0)]
+        for job in jobs:
+            await backend.create(job)
+        order = [await backend.dequeue(0.01) for _ in range(3)]
+        assert order == [jobs[1]["id"], jobs[0]["id"], jobs[2]["id"]]
+        assert await backend.dequeue(0.01) is None
+        assert set(await memory_redis.zrange("dk:jobs:processing", 0, -1)) == set(order)
+
+        await backend.update(jobs[0]["id"], status="succeeded")
+        await backend.publish(jobs[0]["id"], {"type": "status", "status": "succeeded"})
+        await backend.ack(jobs[0]["id"])
+        assert (await backend.get(jobs[0]["id"]))["status"] == "succeeded"
+        events = await backend.read_events(jobs[0]["id"], "0", timeout=0)
+        assert [e["status"] for _, e in events] == ["succeeded"]
+        assert await backend.read_events(jobs[0]["id"], events[-1][0], timeout=0) == []
+        assert jobs[0]["id"] not in await memory_redis.smembers("dk:jobs:active")
+
+    asyncio.run(scenario())
+
+
+def test_redis_backend_requeues_jobs_of_dead_workers(memory_redis):
+    async def scenario():
+        backend = RedisJobBackend(client=memory_redis, lease=0.05)
+        leased, orphaned, waiting = new_job(GOAL), new_job(GOAL), new_job(GOAL)
+        for job in (leased, orphaned, waiting):
+            await backend.create(job)
+        # A replica claims one job, then dies without renewing or acking it
+        assert await backend.dequeue(0.01) == leased["id"]
+        await backend.update(leased["id"], status="running")
+        # Another dies between BZPOPMIN and recording its claim
+        await memory_redis.bzpopmin("dk:jobs:queue")
+        assert await backend.reap() == []  # lease still valid; orphan only suspected
+
+        await asyncio.sleep(0.06)
+        assert sorted(await backend.reap()) == sorted([leased["id"], orphaned["id"]])
+        assert (await backend.get(leased["id"]))["status"] == "queued"
+        claimed = {await backend.dequeue(0.01) for _ in range(3)}
+        assert claimed == {leased["id"], orphaned["id"], waiting["id"]}
+        assert await backend.reap() == []  # freshly claimed
+
+    asyncio.run(scenario())
+
+
+def test_runner_survives_backend_errors(monkeypatch):
+    class Flaky(InMemoryJobBackend):
+        failures = 2
+
+        async def dequeue(self, timeout):
+            if self.failures:
+                self.failures -= 1
+                raise ConnectionError("backend unavailable")
+            return await super().dequeue(timeout)
+
+    async def scenario():
+        monkeypatch.setattr(jobs_mod, "_BACKEND_RETRY_S", 0.01)
+        backend = Flaky()
+        ex = PlanExecutor(workers=1, max_pending=1)
+        runner = JobRunner(backend, executor=ex, concurrency=1, job_fn=divmod)
+        try:
+            job = new_job(GOAL)
+            await backend.create(job)
+            runner.start()
+            for _ in range(500):
+                if (await backend.get(job["id"]))["status"] == "failed":
+                    break
+                await asyncio.sleep(0.01)
+            assert (await backend.get(job["id"]))["status"] == "failed"
+            assert runner.errors == 2
+        finally:
+            await runner.stop()
+            ex.shutdown()
+
+    asyncio.run(scenario())
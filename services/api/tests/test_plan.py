@@ -1,8 +1,19 @@
+import asyncio
+import time
+
+import pytest
 from fastapi.testclient import TestClient
 
+from app.cache import ResultCache, get_plan_cache
+from app.executor import (
+    ClientDisconnected,
+    PlanExecutor,
+    QueueFull,
+    cancelled,
+    get_plan_executor,
+)
 from app.main import app
 
-
 client = TestClient(app)
 
 
@@ -24,4 +35,82 @@ def test_plan_generate_returns_three_options():
     for o in options:
         assert "estimated_monthly_cost" in o
         assert "expected_service_level" in o
+        assert o["summary"]["total_cost"] == o["estimated_monthly_cost"]
+
+
+
+def wait_until_cancelled(limit: float) -> str:
+    start = time.monotonic()
+    while time.monotonic() - start < limit:
+        if cancelled():
+            return "cancelled"
+        time.sleep(0.01)
+    return "finished"
+
+
+def test_executor_bounds_queue_and_cancels_on_timeout():
+    async def scenario():
+        ex = PlanExecutor(workers=1, max_pending=1, timeout=5)
+        try:
+            first = asyncio.ensure_future(ex.run(time.sleep, 0.5))
+            await asyncio.sleep(0.05)
+            with pytest.raises(QueueFull):
+                await ex.run(time.sleep, 0)
+            await first
+            with pytest.raises(asyncio.TimeoutError):
+                await ex.run(wait_until_cancelled, 30, timeout=0.3)
+            # the running job saw its cancel flag and freed the slot
+            for _ in range(100):
+                if ex.pending == 0:
+                    break
+                await asyncio.sleep(0.02)
+            assert ex.stats()["pending"] == 0 and ex.rejected == 1 and ex.timeouts == 1
+        finally:
+            ex.shutdown()
+
+    asyncio.run(scenario())
+
+
+class DisconnectingRequest:
+    """Stands in for a Starlette request whose client goes away after ``polls`` checks."""
+
+    def __init__(self, polls: int):
+        self.polls = polls
+
+    async def is_disconnected(self) -> bool:
+        self.polls -= 1
+        return self.polls < 0
+
+
+def test_executor_cancels_the_job_when_the_client_disconnects():
+    async def scenario():
+        ex = PlanExecutor(workers=1, max_pending=1, timeout=30)
+        try:
+            job = ex.run(wait_until_cancelled, 30, request=DisconnectingRequest(polls=2))
+            with pytest.raises(ClientDisconnected):
+                await job
+            assert ex.cancellations == 1
+            # The running job saw its cancel flag well before its 30s limit
+            for _ in range(100):
+                if ex.pending == 0:
+                    break
+                await asyncio.sleep(0.02)
+            assert ex.pending == 0 and not any(ex._flags)
+            assert await ex.run(time.sleep, 0) is None  # the slot is reusable
+        finally:
+            ex.shutdown()
+
+    asyncio.run(scenario())
+
 
+def test_plan_generate_times_out_with_504():
+    ex = PlanExecutor(workers=1, max_pending=2, timeout=0.001)
+    app.dependency_overrides[get_plan_executor] = lambda: ex
+    app.dependency_overrides[get_plan_cache] = ResultCache  # no earlier result to serve
+    try:
+        goal = {"monthly_budget_gbp": 8000, "service_level_target": 0.97}
+        r = client.post("/plan/generate", json={"goal": goal})
+        assert r.status_code == 504
+    finally:
+        app.dependency_overrides.clear()
+        ex.shutdown()
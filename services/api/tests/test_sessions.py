@@ -0,0 +1,123 @@
+import asyncio
+import hashlib
+
+import pytest
+from dkernel.data.synth import make_synthetic_data
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.multipart import MultipartError, stream_multipart
+from app.sessions import RawUpload, SessionStore, get_session_store
+
+
+@pytest.fixture()
+def client(tmp_path):
+    store = SessionStore(tmp_path / "sessions")
+    app.dependency_overrides[get_session_store] = lambda: store
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+def _csvs():
+    sales, inventory, offers = make_synthetic_data(n_skus=30, days=60)
+    return {
+        name: (f"{name}.csv", df.to_csv(index=False).encode(), "text/csv")
+        for name, df in (("sales", sales), ("inventory", inventory), ("offers", offers))
+    }
+
+
+def test_upload_session_feeds_questions_and_plans(client):
+    session_id = client.post("/sessions").json()["id"]
+    files = _csvs()
+    r = client.post(f"/sessions/{session_id}/files", files={"sales": files["sales"]})
+    assert r.status_code == 200 and r.json()["features"] is False
+    questions = client.post(f"/questions/next?session_id={session_id}", json={}).json()
+    ids = {q["id"] for q in questions}
+    assert ids == {"inventory.csv", "offers.csv"}
+
+    notes = ("notes.txt", b"hello", "text/plain")
+    url = f"/sessions/{session_id}/files"
+    r = client.post(url, files={"inventory": files["inventory"], "notes": notes})
+    assert r.status_code == 400
+    assert "inventory" not in client.get(f"/sessions/{session_id}").json()["tables"]
+    r = client.post(url, files={"inventory": files["inventory"], "offers": files["offers"]})
+    manifest = r.json()
+    assert r.status_code == 200 and manifest["features"] is True
+    assert manifest["tables"]["sales"]["rows"] == 30 * 60
+
+    questions = client.post(f"/questions/next?session_id={session_id}", json={}).json()
+    uploaded = ("sales.csv", "inventory.csv", "offers.csv")
+    assert questions and all(q["id"] not in uploaded for q in questions)
+
+    goal = {"monthly_budget_gbp": 5000, "service_level_target": 0.9}
+    r = client.post("/plan/generate", json={"goal": goal, "session_id": session_id})
+    assert r.status_code == 200 and len(r.json()) == 3
+    r = client.post("/plan/generate", json={"goal": goal, "session_id": "nope"})
+    assert r.status_code == 404
+
+
+def test_upload_rejects_invalid_tables(client):
+    session_id = client.post("/sessions").json()["id"]
+    bad = ("sales.csv", b"date,sku,qty\n2024-01-01,A,-3\n", "text/csv")
+    r = client.post(f"/sessions/{session_id}/files", files={"sales": bad})
+    assert r.status_code == 422 and "sales" in r.json()["detail"]["errors"]
+    goal = {"monthly_budget_gbp": 1, "service_level_target": 0.9}
+    r = client.post("/plan/generate", json={"goal": goal, "session_id": session_id})
+    assert r.status_code == 409
+    assert client.get("/sessions/missing").status_code == 404
+
+    # The same table twice is a client error, and no partial raw file is left behind
+    sales = _csvs()["sales"]
+    r = client.post(f"/sessions/{session_id}/files", files=[("sales", sales), ("sales", sales)])
+    assert r.status_code == 400 and "Duplicate" in r.json()["detail"]
+    raw = app.dependency_overrides[get_session_store]().root / session_id / "raw"
+    assert not any(raw.iterdir())
+
+
+def test_multipart_parser_handles_any_chunking():
+    body = (
+        b"preamble\r\n--XyZ\r\n"
+        b"Content-Disposition: form-data; name=\"a\"; filename=\"a.csv\"\r\n\r\n"
+        + b"x,y\r\n1,2\r\n--Xy not a delimiter\r\n" * 50
+        + b"\r\n--XyZ\r\nContent-Disposition: form-data; name=\"b\"\r\n\r\n\r\n--XyZ--\r\n"
+    )
+
+    class Sink:
+        def __init__(self, headers):
+            self.headers, self.data = headers, bytearray()
+            parts.append(self)
+
+        async def write(self, data):
+            self.data += data
+
+        async def close(self):
+            pass
+
+    async def chunks(size):
+        for i in range(0, len(body), size):
+            yield body[i : i + size]
+
+    for size in (1, 3, 7, 64, len(body)):
+        parts = []
+        assert asyncio.run(stream_multipart(chunks(size), b"XyZ", Sink)) == 2
+        assert bytes(parts[0].data) == b"x,y\r\n1,2\r\n--Xy not a delimiter\r\n" * 50
+        assert 'filename="a.csv"' in parts[0].headers["content-disposition"]
+        assert parts[1].data == b""
+
+    with pytest.raises(MultipartError):
+        asyncio.run(stream_multipart(chunks(5), b"Other", Sink))
+
+
+def test_raw_upload_writes_blocks_off_the_loop(tmp_path):
+    data = bytes(range(256)) * 12_000  # ~3 MB: several buffered blocks and a tail
+
+    async def scenario():
+        upload = RawUpload(tmp_path / "raw" / "sales.csv")
+        for i in range(0, len(data), 65_536):
+            await upload.write(data[i : i + 65_536])
+        await upload.close()
+        return upload
+
+    upload = asyncio.run(scenario())
+    assert upload.path.read_bytes() == data and upload.bytes == len(data)
+    assert upload.sha256.hexdigest() == hashlib.sha256(data).hexdigest()
@@ -0,0 +1,409 @@
+from __future__ import annotations
+
+import time
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+from dkernel.config import get_settings
+
+
+def _write_loader_inputs(n_rows: int, out: Path) -> Dict[str, Path]:
+    """Write vectorized synthetic sales/inventory/offers CSVs with ``n_rows`` rows each."""
+    rng = np.random.default_rng(get_settings().SEED)
+    out.mkdir(parents=True, exist_ok=True)
+    n_skus = max(1, n_rows // 100)
+    skus = np.char.add("SKU-", np.arange(n_skus).astype(str))
+    dates = pd.date_range("2024-01-01", periods=730, freq="D").strftime("%Y-%m-%d").to_numpy()
+    validity = pd.Timestamp("2030-01-01").strftime("%Y-%m-%d")
+    paths = {kind: out / f"{kind}_{n_rows}.csv" for kind in ("sales", "inventory", "offers")}
+    pd.DataFrame(
+        {
+            "date": dates[rng.integers(0, len(dates), n_rows)],
+            "sku": skus[rng.integers(0, n_skus, n_rows)],
+            "qty": rng.integers(0, 50, n_rows),
+            "price": rng.uniform(5, 25, n_rows).round(2),
+        }
+    ).to_csv(paths["sales"], index=False)
+    pd.DataFrame(
+        {
+            "sku": np.char.add("SKU-", np.arange(n_rows).astype(str)),
+            "on_hand": rng.integers(0, 500, n_rows),
+            "safety_stock": rng.integers(1, 100, n_rows),
+        }
+    ).to_csv(paths["inventory"], index=False)
+    pd.DataFrame(
+        {
+            "supplier": np.char.add("Supplier ", rng.integers(0, 50, n_rows).astype(str)),
+            "sku": skus[rng.integers(0, n_skus, n_rows)],
+            "price": rng.uniform(5, 25, n_rows).round(2),
+            "moq": rng.integers(10, 100, n_rows),
+            "lead_time_days": rng.integers(5, 21, n_rows),
+            "validity_to": validity,
+        }
+    ).to_csv(paths["offers"], index=False)
+    return paths
+
+
+def bench_loaders(sizes: Sequence[int], workdir: str | Path = "./_out/bench_data") -> List[Dict]:
+    """Rows/second of the CSV loaders (parse + validation) at each size."""
+    from dkernel.data.adapters import load_inventory_csv, load_offers_csv, load_sales_csv
+
+    loaders = {
+        "load_sales_csv": ("sales", load_sales_csv),
+        "load_inventory_csv": ("inventory", load_inventory_csv),
+        "load_offers_csv": ("offers", load_offers_csv),
+    }
+    results = []
+    for n in sizes:
+        paths = _write_loader_inputs(int(n), Path(workdir))
+        for name, (kind, loader) in loaders.items():
+            t0 = time.perf_counter()
+            df = loader(paths[kind])
+            elapsed = time.perf_counter() - t0
+            results.append(
+                {
+                    "loader": name,
+                    "rows": int(len(df)),
+                    "seconds": round(elapsed, 4),
+                    "rows_per_sec": round(len(df) / max(elapsed, 1e-9), 1),
+                }
+            )
+    return results
+
+
+def _synthetic_demand_daily(n_skus: int, n_days: int, density: float) -> pd.DataFrame:
+    rng = np.random.default_rng(get_settings().SEED)
+    mask = rng.random((n_days, n_skus)) < density
+    day_idx, sku_idx = np.nonzero(mask)
+    skus = np.char.add("SKU-", np.arange(n_skus).astype(str)).astype(object)
+    dates = pd.date_range("2024-01-01", periods=n_days, freq="D")
+    return pd.DataFrame(
+        {
+            "date": dates[day_idx],
+            "sku": skus[sku_idx],
+            "demand": rng.poisson(20, len(day_idx)).astype(float),
+        }
+    )
+
+
+def bench_demand_matrix(
+    sku_counts: Sequence[int], n_days: int = 730, density: float = 0.8
+) -> List[Dict]:
+    """Memory and per-SKU statistics time: long-format groupby vs DemandMatrix rows."""
+    from dkernel.features.matrix import DemandMatrix
+
+    results = []
+    for n_skus in sku_counts:
+        dd = _synthetic_demand_daily(int(n_skus), n_days, density)
+        t0 = time.perf_counter()
+        g = dd.groupby("sku")["demand"]
+        _ = (g.sum(), g.mean(), g.std())
+        long_s = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        m = DemandMatrix.from_long(dd)
+        build_s = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        _ = (m.totals(), m.row_stats())
+        matrix_s = time.perf_counter() - t0
+        m32 = DemandMatrix.from_long(dd, dtype=np.float32)
+        results.append(
+            {
+                "skus": int(n_skus),
+                "days": n_days,
+                "rows": int(len(dd)),
+                "long_mb": round(dd.memory_usage(deep=True).sum() / 2**20, 1),
+                "matrix_mb": round(m.nbytes / 2**20, 1),
+                "matrix32_mb": round(m32.nbytes / 2**20, 1),
+                "long_groupby_s": round(long_s, 4),
+                "matrix_build_s": round(build_s, 4),
+                "matrix_rowwise_s": round(matrix_s, 4),
+            }
+        )
+    return results
+
+
+def bench_parallel_forecast(
+    sku_counts: Sequence[int],
+    workers: Sequence[int] = (1, 2, 4, 8),
+    model: str = "fallback",
+    n_days: int = 365,
+    horizon: int = 30,
+) -> List[Dict]:
+    """Wall time and speedup of per-SKU forecasting across process-pool sizes."""
+    from dkernel.features.matrix import DemandMatrix
+    from dkernel.forecasting.parallel import parallel_forecast
+
+    results = []
+    for n_skus in sku_counts:
+        m = DemandMatrix.from_long(_synthetic_demand_daily(int(n_skus), n_days, 0.8))
+        baseline = None
+        base_s = None
+        for w in workers:
+            t0 = time.perf_counter()
+            out, fallbacks = parallel_forecast(m, horizon, model=model, n_workers=int(w))
+            elapsed = time.perf_counter() - t0
+            if baseline is None:
+                baseline, base_s = out, elapsed
+            results.append(
+                {
+                    "skus": int(n_skus),
+                    "model": model,
+                    "workers": int(w),
+                    "seconds": round(elapsed, 4),
+                    "speedup": round(base_s / max(elapsed, 1e-9), 2),
+                    "fallbacks": int(fallbacks),
+                    "identical": bool(np.array_equal(out, baseline)),
+                }
+            )
+    return results
+
+
+def _synthetic_catalog(n_skus: int, offers_per_sku: int = 4, n_suppliers: int = 200):
+    """Per-SKU forecast totals plus ``offers_per_sku`` offers each, built without Python loops."""
+    rng = np.random.default_rng(get_settings().SEED)
+    skus = np.char.add("SKU-", np.arange(n_skus).astype(str)).astype(object)
+    forecast = pd.DataFrame({"sku": skus, "forecast_qty": rng.gamma(2.0, 50.0, n_skus)})
+    n_offers = n_skus * offers_per_sku
+    base = rng.uniform(5, 25, n_skus)
+    offers = pd.DataFrame(
+        {
+            "supplier": np.char.add("Supplier ", rng.integers(0, n_suppliers, n_offers).astype(str)).astype(object),
+            "sku": np.repeat(skus, offers_per_sku),
+            "price": (np.repeat(base, offers_per_sku) * rng.uniform(0.9, 1.1, n_offers)).round(2),
+            "moq": rng.integers(10, 100, n_offers).astype(float),
+            "lead_time_days": rng.integers(5, 21, n_offers),
+        }
+    )
+    return forecast, offers
+
+
+def bench_optimizer(
+    sku_counts: Sequence[int],
+    offers_per_sku: int = 4,
+    methods: Sequence[str] = ("greedy",),
+    budget_share: float = 0.5,
+    time_limit: float = 10.0,
+) -> List[Dict]:
+    """Allocation time over synthetic catalogs; budget is ``budget_share`` of the greedy spend."""
+    from dkernel.optimization.ortools_optimizer import optimize_plan
+
+    results = []
+    for n_skus in sku_counts:
+        forecast, offers = _synthetic_catalog(int(n_skus), offers_per_sku)
+        budget = None
+        for method in methods:
+            if budget is None:
+                full = optimize_plan(forecast, offers, service_target=0.97, budget=float("inf"))
+                budget = full["summary"]["total_cost"] * budget_share
+            t0 = time.perf_counter()
+            res = optimize_plan(
+                forecast, offers, service_target=0.97, budget=budget, method=method, time_limit=time_limit
+            )
+            elapsed = time.perf_counter() - t0
+            summary = res["summary"]
+            results.append(
+                {
+                    "skus": int(n_skus),
+                    "offers": int(len(offers)),
+                    "method": method,
+                    "seconds": round(elapsed, 4),
+                    "allocated": int(len(res["allocation"])),
+                    "total_cost": summary["total_cost"],
+                    "within_budget": summary["within_budget"],
+                    "status": summary.get("status", "n/a"),
+                    "expected_service": summary.get("expected_service"),
+                }
+            )
+    return results
+
+
+def bench_frontier(sku_counts: Sequence[int], offers_per_sku: int = 4, n_points: int = 200) -> List[Dict]:
+    """Time to build the budget/service frontier and sample ``n_points`` budgets off it."""
+    from dkernel.optimization.frontier import compute_frontier
+
+    results = []
+    for n_skus in sku_counts:
+        forecast, offers = _synthetic_catalog(int(n_skus), offers_per_sku)
+        t0 = time.perf_counter()
+        frontier = compute_frontier(forecast, offers)
+        built = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        frontier.points(n_points)
+        sampled = time.perf_counter() - t0
+        results.append(
+            {
+                "skus": int(n_skus),
+                "offers": int(len(offers)),
+                "build_seconds": round(built, 4),
+                "sample_seconds": round(sampled, 4),
+                "points": n_points,
+                "max_cost": round(frontier.max_cost, 2),
+            }
+        )
+    return results
+
+
+def bench_simulation(sku_counts: Sequence[int], n_days: int = 90, offers_per_sku: int = 4) -> List[Dict]:
+    """Day-by-day replay of the greedy plan over ``n_days`` of forecast demand."""
+    from dkernel.optimization.ortools_optimizer import optimize_plan
+    from dkernel.simulation import simulate_plan
+
+    results = []
+    for n_skus in sku_counts:
+        forecast, offers = _synthetic_catalog(int(n_skus), offers_per_sku)
+        alloc = optimize_plan(forecast, offers, service_target=0.97, budget=float("inf"))["allocation"]
+        skus = forecast["sku"].to_numpy()
+        daily = forecast["forecast_qty"].to_numpy() / n_days
+        rng = np.random.default_rng(get_settings().SEED)
+        demand = rng.poisson(np.repeat(daily[:, None], n_days, axis=1)).astype(float)
+        t0 = time.perf_counter()
+        sim = simulate_plan(alloc, demand, skus=skus)
+        elapsed = time.perf_counter() - t0
+        results.append(
+            {
+                "skus": int(n_skus),
+                "days": n_days,
+                "seconds": round(elapsed, 4),
+                "service_level": sim.kpis()["service_level"],
+            }
+        )
+    return results
+
+
+def bench_scenarios(sku_counts: Sequence[int], n_samples: int = 1000, horizon: int = 30) -> List[Dict]:
+    """Scenario tensor draw and batched risk scoring of the greedy plan."""
+    from dkernel.features.matrix import DemandMatrix
+    from dkernel.forecasting.scenarios import sample_scenarios
+    from dkernel.optimization.ortools_optimizer import optimize_plan
+    from dkernel.scoring import scenario_kpis
+
+    results = []
+    for n_skus in sku_counts:
+        forecast, offers = _synthetic_catalog(int(n_skus))
+        daily = forecast["forecast_qty"].to_numpy() / horizon
+        point = DemandMatrix(
+            skus=forecast["sku"].to_numpy(),
+            dates=pd.date_range("2025-01-01", periods=horizon, freq="D"),
+            values=np.repeat(daily[:, None], horizon, axis=1),
+            value_col="forecast_qty",
+        )
+        plan = optimize_plan(forecast, offers, service_target=0.97, budget=float("inf"))
+        t0 = time.perf_counter()
+        scenarios = sample_scenarios(point, np.sqrt(daily), n_samples)
+        drawn = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        kpis, _ = scenario_kpis(plan, scenarios)
+        scored = time.perf_counter() - t0
+        results.append(
+            {
+                "skus": int(n_skus),
+                "horizon": horizon,
+                "samples": int(n_samples),
+                "tensor_mb": round(scenarios.nbytes / 1e6, 1),
+                "sample_seconds": round(drawn, 4),
+                "score_seconds": round(scored, 4),
+                **kpis,
+            }
+        )
+        del scenarios
+    return results
+
+
+def bench_policies(row_counts: Sequence[int], n_banned: int = 1000, n_suppliers: int = 5000) -> List[Dict]:
+    """Policy enforcement over a greedy plan of ``rows`` SKUs with ``n_banned`` banned vendors.
+
+    Times vendor bans alone and the full rule set (bans, excluded category,
+    lead time cap, spend share cap, supplier count).
+    """
+    from dkernel.features.offerbook import OfferBook
+    from dkernel.optimization.ortools_optimizer import optimize_plan
+    from dkernel.policies import apply_policies
+
+    results = []
+    for n_rows in row_counts:
+        forecast, offers = _synthetic_catalog(int(n_rows), n_suppliers=n_suppliers)
+        offers["category"] = np.where(np.arange(len(offers)) // 4 % 10 == 0, "frozen", "ambient")
+        book = OfferBook.from_frame(offers)
+        plan = optimize_plan(forecast, book, service_target=0.97, budget=float("inf"))
+        plan["offer_book"] = book
+        banned = [f"Supplier {i}" for i in range(n_banned)]
+        full = {
+            "banned_vendors": banned,
+            "excluded_categories": ["frozen"],
+            "max_lead_time": 14,
+            "max_spend_share": 1.5 / (n_suppliers - n_banned),
+            "min_suppliers": 2,
+        }
+        for name, constraints in (("vendors", {"banned_vendors": banned}), ("all", full)):
+            t0 = time.perf_counter()
+            out = apply_policies(plan, constraints)
+            elapsed = time.perf_counter() - t0
+            results.append(
+                {
+                    "rows": int(len(plan["allocation"])),
+                    "banned_vendors": n_banned,
+                    "rules": name,
+                    "seconds": round(elapsed, 4),
+                    **{k: v for k, v in out["summary"]["policy"].items() if k != "unenforced"},
+                }
+            )
+    return results
+
+
+def bench_voi(sku_counts: Sequence[int], n_days: int = 90, n_samples: int = 256) -> List[Dict]:
+    """VoI engine build (sample + score every SKU) and incremental re-rank after one answer."""
+    from dkernel.features.matrix import DemandMatrix
+    from dkernel.voi import VoIEngine, VoIInputs
+
+    results = []
+    for n_skus in sku_counts:
+        matrix = DemandMatrix.from_long(_synthetic_demand_daily(int(n_skus), n_days, 0.7))
+        provided = {"sales.csv": True}
+        t0 = time.perf_counter()
+        engine = VoIEngine(VoIInputs.from_features({"demand_matrix": matrix}, provided), n_samples=n_samples)
+        engine.rank(provided)
+        built = time.perf_counter() - t0
+        answered = matrix.skus[: max(1, len(matrix.skus) // 100)]
+        t0 = time.perf_counter()
+        engine.observe("on_hand", values=np.zeros(len(answered)), skus=answered)
+        engine.rank(provided)
+        rerank = time.perf_counter() - t0
+        results.append(
+            {
+                "skus": int(n_skus),
+                "samples": n_samples,
+                "build_seconds": round(built, 4),
+                "answered_skus": int(len(answered)),
+                "rerank_seconds": round(rerank, 4),
+            }
+        )
+    return results
+
+
+def bench_pipeline(sku_counts: Sequence[int], workdir: str | Path = "./_out/bench_pipeline") -> List[Dict]:
+    """Plan pipeline cold, fully memoized, and after a budget change (only optimize + score re-run)."""
+    import shutil
+
+    from dkernel.dag import ArtifactStore
+    from dkernel.data.synth import make_synthetic_data
+    from dkernel.planning import run_plan
+
+    results = []
+    for n_skus in sku_counts:
+        root = Path(workdir) / str(n_skus)
+        shutil.rmtree(root, ignore_errors=True)
+        s, i, o = make_synthetic_data(n_skus=int(n_skus))
+        sources = {"sales": s, "inventory": i, "offers": o}
+        store = ArtifactStore(root)
+        row: Dict = {"skus": int(n_skus)}
+        for label, params in (("cold", {}), ("warm", {}), ("budget_change", {"budget": 12000.0})):
+            t0 = time.perf_counter()
+            run = run_plan(sources, params, store=store)
+            row[f"{label}_seconds"] = round(time.perf_counter() - t0, 4)
+            row[f"{label}_executed"] = run.executed
+        results.append(row)
+    return results
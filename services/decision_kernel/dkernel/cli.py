@@ -10,16 +10,18 @@ import typer
 from dkernel.config import get_settings
 from dkernel.data.synth import make_synthetic_data
 from dkernel.data.adapters import load_sales_csv, load_inventory_csv, load_offers_csv
+from dkernel.data.cache import TableCache
+from dkernel.dag import ArtifactStore
+from dkernel.evidence import build_evidence_graph
 from dkernel.features.pipeline import build_feature_tables
+from dkernel.forecasting.batch import METHODS
 from dkernel.forecasting.darts_forecaster import forecast_demand
-from dkernel.optimization.ortools_optimizer import optimize_plan
-from dkernel.scoring import compute_kpis, score_plan
+from dkernel.planning import net_and_optimize, run_plan
 from dkernel.learner.trainer import train_llm, evaluate_llm
 
 
 app = typer.Typer(add_completion=False, no_args_is_help=True)
 
-
 @app.command("synth")
 def cmd_synth(out: str = typer.Option("./_out/data", help="Output directory for CSVs")):
     outp = Path(out)
@@ -39,20 +41,176 @@ def cmd_plan(
     budget: float = typer.Option(8000.0, help="Monthly budget GBP"),
     slt: float = typer.Option(0.97, help="Service level target [0-1]"),
     out: str = typer.Option("./_out/plan.json", help="Where to save plan JSON"),
+    stream: bool = typer.Option(False, "--stream", help="Fold sales.csv in chunks instead of loading it whole"),
+    chunksize: int = typer.Option(500_000, help="Rows per chunk with --stream"),
+    cache_dir: Optional[str] = typer.Option(None, help="Validated-table cache dir (default: CACHE_DIR)"),
+    forecast_method: str = typer.Option(
+        "moving_average", help="moving_average|ses|holt|seasonal_naive|fallback|exponential_smoothing|global"
+    ),
+    state: Optional[str] = typer.Option(None, help="Incremental forecast state file (.npz), updated in place"),
+    optimizer: str = typer.Option("greedy", help="greedy|milp|decomposed"),
+    max_lead_time: Optional[int] = typer.Option(None, help="Drop offers with a longer lead time (milp)"),
+    time_limit: float = typer.Option(10.0, help="Solver time limit in seconds (milp)"),
+    shards: int = typer.Option(8, help="SKU shards (decomposed)"),
+    shard_by: str = typer.Option("hash", help="hash or an offers column such as ABC (decomposed)"),
+    netting: str = typer.Option(
+        "none", help="Plan gross (none), or net forecast against on_hand: inventory|dynamic safety stock"
+    ),
+    review_days: int = typer.Option(0, help="Review period added to lead time when netting"),
+    kpi_backend: str = typer.Option("ratio", help="ratio (bought/demand) or simulation (day-by-day replay)"),
+    allocation_out: Optional[str] = typer.Option(None, help="Also write the allocation CSV here"),
+    samples: int = typer.Option(0, help="Demand scenarios to sample for risk KPIs (0: point forecast only)"),
+    policies: Optional[str] = typer.Option(
+        None, help="Policy constraints JSON (banned_vendors, excluded_categories, max_spend_share, ...)"
+    ),
+    pipeline_cache: Optional[str] = typer.Option(
+        None, help="Memoize stage outputs here (default: PIPELINE_CACHE_DIR); only changed stages re-run"
+    ),
 ):
-    s = load_sales_csv(sales)
-    i = load_inventory_csv(inventory)
-    o = load_offers_csv(offers)
-    feats = build_feature_tables(s, i, o)
-    forecast = forecast_demand(feats["demand_daily"], horizon=30)
-    result = optimize_plan(forecast, feats["joined_offers"], service_target=slt, budget=budget)
-    result["offers"] = feats["joined_offers"]
-    kpis = compute_kpis(result, forecast)
-    summary = {**result["summary"], **kpis}
+    if state and forecast_method not in METHODS:
+        raise typer.BadParameter(
+            f"needs a batch --forecast-method ({'|'.join(METHODS)}), not {forecast_method}",
+            param_hint="--state",
+        )
+    settings = get_settings()
+    cache_root = cache_dir or settings.CACHE_DIR
+    cache = TableCache(cache_root, max_bytes=settings.CACHE_MAX_BYTES) if cache_root else None
+    store_root = pipeline_cache or settings.PIPELINE_CACHE_DIR
+    store = ArtifactStore(store_root, max_bytes=settings.PIPELINE_CACHE_MAX_BYTES) if store_root else None
+    params = dict(
+        forecast_method=forecast_method,
+        slt=slt,
+        budget=budget,
+        netting=netting,
+        review_days=review_days,
+        optimizer=optimizer,
+        max_lead_time=max_lead_time,
+        time_limit=time_limit,
+        shards=shards,
+        shard_by=shard_by,
+        policies=json.loads(Path(policies).read_text()) if policies else None,
+        kpi_backend=kpi_backend,
+        samples=samples,
+    )
+    options = dict(load=cache.load if cache else None, stream=stream, chunksize=chunksize, state=state)
+    run = run_plan({"sales": sales, "inventory": inventory, "offers": offers}, params, store=store, options=options)
+    summary = run["score"]
+    if allocation_out:
+        Path(allocation_out).parent.mkdir(parents=True, exist_ok=True)
+        run["optimize"]["allocation"].to_csv(allocation_out, index=False)
+    evidence = build_evidence_graph(
+        {"monthly_budget_gbp": budget, "service_level_target": slt},
+        {"sales.csv": True, "inventory.csv": True, "offers.csv": True},
+        {"forecaster": forecast_method, "optimizer": optimizer, "policies": policies, "scoring": kpi_backend},
+        {"summary": summary},
+        run=run,
+    )
     outp = Path(out)
     outp.parent.mkdir(parents=True, exist_ok=True)
-    outp.write_text(json.dumps({"summary": summary}, indent=2))
+    outp.write_text(json.dumps({"summary": summary, "evidence": evidence}, indent=2, default=str))
     typer.echo(json.dumps(summary, indent=2))
+    if cache is not None:
+        typer.echo(json.dumps({"cache": cache.report()}), err=True)
+    if store is not None:
+        typer.echo(json.dumps({"pipeline": {**run.report(), **store.report()}}), err=True)
+
+
+@app.command("simulate")
+def cmd_simulate(
+    sales: str = typer.Option(..., help="Path to sales.csv"),
+    inventory: str = typer.Option(..., help="Path to inventory.csv"),
+    offers: str = typer.Option(..., help="Path to offers.csv"),
+    allocation: Optional[str] = typer.Option(None, help="Allocation CSV to replay (default: plan one now)"),
+    budget: float = typer.Option(8000.0, help="Monthly budget GBP (when planning)"),
+    slt: float = typer.Option(0.97, help="Service level target [0-1] (when planning)"),
+    horizon: int = typer.Option(90, help="Days to simulate"),
+    forecast_method: str = typer.Option("moving_average", help="Forecast method (see plan)"),
+    netting: str = typer.Option("none", help="Netting mode when planning (see plan)"),
+    out: Optional[str] = typer.Option(None, help="Write per-SKU simulation results CSV here"),
+):
+    from dkernel.simulation import simulate_plan
+
+    feats = build_feature_tables(load_sales_csv(sales), load_inventory_csv(inventory), load_offers_csv(offers))
+    forecast = forecast_demand(feats["demand_matrix"], horizon=horizon, method=forecast_method)
+    if allocation:
+        alloc = pd.read_csv(allocation)
+    else:
+        alloc = net_and_optimize(feats, forecast, slt, budget, netting=netting)[0]["allocation"]
+    sim = simulate_plan(alloc, forecast, inventory=feats["inventory"])
+    if out:
+        Path(out).parent.mkdir(parents=True, exist_ok=True)
+        sim.to_frame().to_csv(out, index=False)
+    typer.echo(json.dumps({"days": sim.days, "skus": int(len(sim.skus)), **sim.kpis()}, indent=2))
+
+
+@app.command("frontier")
+def cmd_frontier(
+    sales: str = typer.Option(..., help="Path to sales.csv"),
+    inventory: str = typer.Option(..., help="Path to inventory.csv"),
+    offers: str = typer.Option(..., help="Path to offers.csv"),
+    budget: float = typer.Option(8000.0, help="Monthly budget GBP"),
+    slt: float = typer.Option(0.97, help="Service level target [0-1]"),
+    points: int = typer.Option(50, help="Budget points on the returned curve"),
+    forecast_method: str = typer.Option("moving_average", help="Forecast method (see plan)"),
+):
+    from dkernel.optimization.frontier import compute_frontier, frontier_options
+
+    feats = build_feature_tables(load_sales_csv(sales), load_inventory_csv(inventory), load_offers_csv(offers))
+    forecast = forecast_demand(feats["demand_matrix"], horizon=30, method=forecast_method)
+    frontier = compute_frontier(forecast, feats["offer_book"])
+    report = {
+        "options": frontier_options(frontier, budget, slt),
+        "frontier": frontier.points(points).round(4).to_dict(orient="records"),
+    }
+    typer.echo(json.dumps(report, indent=2))
+
+
+@app.command("compare")
+def cmd_compare(
+    sales: str = typer.Option(..., help="Path to sales.csv"),
+    inventory: str = typer.Option(..., help="Path to inventory.csv"),
+    offers: str = typer.Option(..., help="Path to offers.csv"),
+    budgets: str = typer.Option("8000", help="Comma-separated monthly budgets to plan"),
+    slts: str = typer.Option("0.97", help="Comma-separated service level targets to plan"),
+    optimizers: str = typer.Option("greedy", help="Comma-separated optimizers to plan with (see plan)"),
+    allocations: Optional[str] = typer.Option(None, help="Comma-separated allocation CSVs to score as well"),
+    netting: str = typer.Option("none", help="Netting mode when planning (see plan)"),
+    weights: Optional[str] = typer.Option(None, help="Score weights, e.g. cost=0.3,service=0.5,diversity=0.2"),
+    forecast_method: str = typer.Option("moving_average", help="Forecast method (see plan)"),
+):
+    """Plan a budget x target x optimizer grid (plus saved allocations) and rank all plans in one batch."""
+    from dkernel.scoring import batch_score, demand_vector
+
+    feats = build_feature_tables(load_sales_csv(sales), load_inventory_csv(inventory), load_offers_csv(offers))
+    forecast = forecast_demand(feats["demand_matrix"], horizon=30, method=forecast_method)
+    names, plans = [], []
+    for method in [m for m in optimizers.split(",") if m]:
+        for slt in [float(x) for x in slts.split(",") if x]:
+            for budget in [float(x) for x in budgets.split(",") if x]:
+                result = net_and_optimize(feats, forecast, slt, budget, netting=netting, method=method)[0]
+                names.append(f"{method}/slt={slt:g}/budget={budget:g}")
+                plans.append(result["allocation"])
+    for path in [p for p in (allocations or "").split(",") if p]:
+        names.append(Path(path).name)
+        plans.append(pd.read_csv(path))
+    w = {k: float(v) for k, v in (kv.split("=") for kv in weights.split(",") if kv)} if weights else None
+    ranked = batch_score(demand_vector(forecast), plans, weights=w, names=names)
+    typer.echo(json.dumps(ranked.to_dict(orient="records"), indent=2))
+
+
+@app.command("train-forecaster")
+def cmd_train_forecaster(
+    sales: str = typer.Option(..., help="Path to sales.csv"),
+    out: Optional[str] = typer.Option(None, help="Artifact dir (default: FORECAST_MODEL_DIR)"),
+    lags: int = typer.Option(14, help="Autoregressive lags"),
+    holdout: int = typer.Option(14, help="Days held out to score against the fallback"),
+):
+    from dkernel.data.streaming import aggregate_sales
+    from dkernel.forecasting.global_model import train_global_model
+
+    demand = aggregate_sales(load_sales_csv(sales)).demand_daily
+    report = train_global_model(demand, out or get_settings().FORECAST_MODEL_DIR, lags=lags, holdout=holdout)
+    typer.echo(json.dumps(report, indent=2))
 
 
 @app.command("train-llm")
@@ -74,25 +232,82 @@ def cmd_eval_llm(
 
 
 @app.command("bench")
-def cmd_bench(runs: int = typer.Option(3, help="Number of runs"), seed: Optional[int] = None):
+def cmd_bench(
+    runs: int = typer.Option(3, help="Number of runs"),
+    seed: Optional[int] = None,
+    suite: str = typer.Option(
+        "plan", help="Benchmark suite: plan|loaders|matrix|parallel|optimizer|frontier|simulation|scenarios|policies|voi|pipeline"
+    ),
+    sizes: Optional[str] = typer.Option(None, help="Comma-separated sizes (rows for loaders, SKUs otherwise)"),
+    days: Optional[int] = typer.Option(None, help="History days (matrix, default 730) or horizon (simulation, default 90)"),
+    workers: str = typer.Option("1,2,4,8", help="Comma-separated worker counts (parallel)"),
+    model: str = typer.Option("fallback", help="Per-SKU forecast model (parallel)"),
+    methods: str = typer.Option("greedy,milp", help="Comma-separated allocation methods (optimizer)"),
+    samples: int = typer.Option(1000, help="Demand scenarios per SKU (scenarios)"),
+    banned: int = typer.Option(1000, help="Banned vendors (policies)"),
+):
     from dkernel.config import Settings
 
     if seed is not None:
         # Update cached settings seed for determinism per run
         Settings(SEED=seed)
-    results = []
-    for _ in range(runs):
-        s, i, o = make_synthetic_data()
-        feats = build_feature_tables(s, i, o)
-        fc = forecast_demand(feats["demand_daily"], horizon=30)
-        res = optimize_plan(fc, feats["joined_offers"], service_target=0.97, budget=8000)
-        res["offers"] = feats["joined_offers"]
-        kpis = compute_kpis(res, fc)
-        results.append(kpis)
+    def _sizes(default: str) -> list[int]:
+        return [int(x) for x in (sizes or default).split(",") if x]
+
+    if suite == "loaders":
+        from dkernel.benchmarks import bench_loaders
+
+        report = {"loaders": bench_loaders(_sizes("10000,1000000,10000000"))}
+    elif suite == "matrix":
+        from dkernel.benchmarks import bench_demand_matrix
+
+        report = {"matrix": bench_demand_matrix(_sizes("100000"), n_days=days or 730)}
+    elif suite == "parallel":
+        from dkernel.benchmarks import bench_parallel_forecast
+
+        worker_counts = [int(x) for x in workers.split(",") if x]
+        report = {"parallel": bench_parallel_forecast(_sizes("20000"), worker_counts, model=model)}
+    elif suite == "optimizer":
+        from dkernel.benchmarks import bench_optimizer
+
+        report = {"optimizer": bench_optimizer(_sizes("1000,10000,100000"), methods=methods.split(","))}
+    elif suite == "frontier":
+        from dkernel.benchmarks import bench_frontier
+
+        report = {"frontier": bench_frontier(_sizes("1000,10000,100000"))}
+    elif suite == "simulation":
+        from dkernel.benchmarks import bench_simulation
+
+        report = {"simulation": bench_simulation(_sizes("10000,100000"), n_days=days or 90)}
+    elif suite == "scenarios":
+        from dkernel.benchmarks import bench_scenarios
+
+        report = {"scenarios": bench_scenarios(_sizes("10000"), n_samples=samples)}
+    elif suite == "policies":
+        from dkernel.benchmarks import bench_policies
+
+        report = {"policies": bench_policies(_sizes("100000"), n_banned=banned)}
+    elif suite == "voi":
+        from dkernel.benchmarks import bench_voi
+
+        report = {"voi": bench_voi(_sizes("1000,10000"))}
+    elif suite == "pipeline":
+        from dkernel.benchmarks import bench_pipeline
+
+        report = {"pipeline": bench_pipeline(_sizes("2000"))}
+    elif suite == "plan":
+        results = []
+        for _ in range(runs):
+            s, i, o = make_synthetic_data()
+            run = run_plan({"sales": s, "inventory": i, "offers": o}, {"netting": "none"}, targets=("score",))
+            results.append(run["score"])
+        report = {"runs": results}
+    else:
+        raise typer.BadParameter(f"Unknown suite: {suite}", param_hint="--suite")
     outp = Path("./_out/bench.json")
     outp.parent.mkdir(parents=True, exist_ok=True)
-    outp.write_text(json.dumps({"runs": results}, indent=2))
-    typer.echo(json.dumps({"runs": results}, indent=2))
+    outp.write_text(json.dumps(report, indent=2))
+    typer.echo(json.dumps(report, indent=2))
 
 
 def _main() -> None:  # pragma: no cover
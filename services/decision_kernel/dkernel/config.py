@@ -15,6 +15,24 @@ class Settings(BaseSettings):
     N_WORKERS: int = 1
     CPU_ONLY: bool = True
 
+    # Storage of the SKU x day demand matrix; float32 halves it (counts stay exact to 2**24)
+    DEMAND_MATRIX_DTYPE: Literal["float64", "float32"] = "float64"
+
+    # Validated input table cache (disabled when unset)
+    CACHE_DIR: Optional[str] = None
+    CACHE_MAX_BYTES: int = 1 << 30
+
+    # Memoized plan pipeline stage outputs (disabled when unset)
+    PIPELINE_CACHE_DIR: Optional[str] = None
+    PIPELINE_CACHE_MAX_BYTES: int = 2 << 30
+
+    # Larger catalogs asked for "milp" are planned with "decomposed": past this
+    # size SCIP does not finish a budgeted plan within its time limit
+    MILP_MAX_SKUS: int = 1000
+
+    # Versioned artifacts of the global darts forecaster
+    FORECAST_MODEL_DIR: str = "./_out/models/forecast"
+
     # LLM provider
     LLM_PROVIDER: Literal["mock", "ollama", "lmstudio", "hf", "azure", "openai"] = "mock"
 
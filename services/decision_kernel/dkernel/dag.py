@@ -0,0 +1,307 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from dkernel.data.cache import file_digest
+
+# Stage function: (inputs by name, hashed params, unhashed execution options) -> output
+StageFn = Callable[[Dict[str, Any], Dict[str, Any], Dict[str, Any]], Any]
+
+
+@dataclass(frozen=True)
+class Stage:
+    """One pipeline step.
+
+    ``inputs`` name upstream stages or run sources; ``params`` name the run
+    parameters the output depends on (only these enter the stage key). Bump
+    ``version`` when the function's output changes for the same inputs.
+    """
+
+    name: str
+    fn: StageFn
+    inputs: Tuple[str, ...] = ()
+    params: Tuple[str, ...] = ()
+    version: str = "1"
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def source_key(value: Any) -> str:
+    """Content hash of a run source: file contents for paths, row hashes for frames."""
+    if isinstance(value, (str, Path)) and Path(value).is_file():
+        return "file:" + file_digest(value)
+    if isinstance(value, pd.DataFrame):
+        rows = pd.util.hash_pandas_object(value, index=False).to_numpy()
+        return "frame:" + _digest(rows.tobytes() + json.dumps(list(map(str, value.columns))).encode())
+    return "obj:" + _digest(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+class PipelineCancelled(RuntimeError):
+    """Raised by :meth:`Pipeline.run` when its ``cancel`` check fires before a stage."""
+
+
+class ArtifactStore:
+    """Size-bounded on-disk memo of stage outputs, keyed by stage key.
+
+    Each entry is a pickle plus a small JSON sidecar (artifact hash, size), so
+    hits can be reported without unpickling. When the total size exceeds
+    ``max_bytes`` the least recently used entries are evicted.
+    """
+
+    def __init__(self, root: str | Path, max_bytes: int = 1 << 30):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = int(max_bytes)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _paths(self, key: str) -> Tuple[Path, Path]:
+        return self.root / f"{key}.pkl", self.root / f"{key}.json"
+
+    def meta(self, key: str) -> Optional[Dict[str, Any]]:
+        data, meta = self._paths(key)
+        if not (data.exists() and meta.exists()):
+            return None
+        os.utime(meta)  # LRU touch
+        return json.loads(meta.read_text())
+
+    def load(self, key: str) -> Any:
+        with open(self._paths(key)[0], "rb") as f:
+            return pickle.load(f)
+
+    def put(self, key: str, blob: bytes, meta: Dict[str, Any]) -> None:
+        data, meta_path = self._paths(key)
+        for dest, payload in ((data, blob), (meta_path, json.dumps(meta).encode())):
+            fd, tmp = tempfile.mkstemp(dir=self.root, prefix=".tmp-")
+            with os.fdopen(fd, "wb") as f:
+                f.write(payload)
+            os.replace(tmp, dest)
+        self.evict()
+
+    def evict(self) -> None:
+        entries = []
+        for meta in self.root.glob("*.json"):
+            data = meta.with_suffix(".pkl")
+            size = meta.stat().st_size + (data.stat().st_size if data.exists() else 0)
+            entries.append((meta, data, size, meta.stat().st_mtime))
+        total = sum(e[2] for e in entries)
+        for meta, data, size, _ in sorted(entries, key=lambda e: e[3]):
+            if total <= self.max_bytes:
+                break
+            meta.unlink(missing_ok=True)
+            data.unlink(missing_ok=True)
+            total -= size
+            self.evictions += 1
+
+    def report(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+
+class MemoryStore(ArtifactStore):
+    """In-process :class:`ArtifactStore` (pickles kept in a dict), for reuse within one job."""
+
+    def __init__(self, max_bytes: int = 1 << 28):
+        self.max_bytes = int(max_bytes)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: Dict[str, Tuple[bytes, Dict[str, Any]]] = {}
+
+    def meta(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return None
+        self._entries[key] = entry  # LRU touch
+        return entry[1]
+
+    def load(self, key: str) -> Any:
+        return pickle.loads(self._entries[key][0])
+
+    def put(self, key: str, blob: bytes, meta: Dict[str, Any]) -> None:
+        self._entries[key] = (blob, meta)
+        self.evict()
+
+    def evict(self) -> None:
+        total = sum(len(blob) for blob, _ in self._entries.values())
+        for key in list(self._entries):
+            if total <= self.max_bytes:
+                break
+            total -= len(self._entries.pop(key)[0])
+            self.evictions += 1
+
+
+@dataclass
+class PipelineRun:
+    """Outputs of the requested stages plus a per-stage record of the run."""
+
+    values: Dict[str, Any]
+    stages: List[Dict[str, Any]]
+    sources: Dict[str, str] = field(default_factory=dict)
+
+    def __getitem__(self, name: str) -> Any:
+        return self.values[name]
+
+    @property
+    def hits(self) -> List[str]:
+        return [s["stage"] for s in self.stages if s["hit"]]
+
+    @property
+    def executed(self) -> List[str]:
+        return [s["stage"] for s in self.stages if s["executed"]]
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "stages": self.stages,
+            "hits": self.hits,
+            "executed": self.executed,
+            "seconds": round(sum(s["seconds"] for s in self.stages), 4),
+        }
+
+
+class Pipeline:
+    """Declarative DAG of :class:`Stage` objects with memoized, content-addressed outputs.
+
+    A stage's key hashes its name, version, declared params and the keys of
+    its inputs (source content hashes or upstream stage keys), so a change
+    only invalidates the stages downstream of it. With an
+    :class:`ArtifactStore`, stages whose key is stored are not run, and their
+    outputs are only unpickled when a target or a re-run stage needs them.
+    Without a store outputs are never pickled (records carry no artifact hash).
+    """
+
+    def __init__(self, stages: Sequence[Stage]):
+        self.stages: Dict[str, Stage] = {}
+        names = {s.name for s in stages}
+        for stage in stages:
+            if stage.name in self.stages:
+                raise ValueError(f"Duplicate stage: {stage.name}")
+            late = [i for i in stage.inputs if i in names and i not in self.stages]
+            if late:
+                raise ValueError(f"Stage {stage.name} must come after its inputs: {late}")
+            self.stages[stage.name] = stage
+
+    def sources(self) -> List[str]:
+        """Inputs that are not stages (must be passed to :meth:`run`)."""
+        names = []
+        for stage in self.stages.values():
+            names += [i for i in stage.inputs if i not in self.stages and i not in names]
+        return names
+
+    def keys(self, source_keys: Dict[str, str], params: Dict[str, Any]) -> Dict[str, str]:
+        keys: Dict[str, str] = {}
+        for stage in self.stages.values():
+            spec = {
+                "stage": stage.name,
+                "version": stage.version,
+                "params": {p: params.get(p) for p in stage.params},
+                "inputs": {i: keys.get(i, source_keys.get(i)) for i in stage.inputs},
+            }
+            keys[stage.name] = _digest(json.dumps(spec, sort_keys=True, default=str).encode())
+        return keys
+
+    def run(
+        self,
+        sources: Dict[str, Any],
+        params: Optional[Dict[str, Any]] = None,
+        targets: Optional[Iterable[str]] = None,
+        store: Optional[ArtifactStore] = None,
+        options: Optional[Dict[str, Any]] = None,
+        refresh: Iterable[str] = (),
+        cancel: Optional[Callable[[], bool]] = None,
+        progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+        source_keys: Optional[Dict[str, str]] = None,
+    ) -> PipelineRun:
+        """Compute ``targets`` (default: the last stage), reusing stored stage outputs.
+
+        ``options`` reach every stage unhashed (e.g. caches, worker counts);
+        stages in ``refresh`` always run (e.g. ones with side effects).
+        ``cancel`` is polled before each stage that has to run; when it
+        returns true the run stops with :class:`PipelineCancelled`.
+        ``progress`` receives ``{"stage", "status": "running"}`` before each
+        stage that runs and its run record (``status`` done or cached) after.
+        ``source_keys`` supply known content keys for sources (skipping hashing).
+        """
+        params = params or {}
+        missing = [s for s in self.sources() if s not in sources]
+        if missing:
+            raise ValueError(f"Missing pipeline sources: {missing}")
+        known = source_keys or {}
+        src_keys = {name: known.get(name) or source_key(value) for name, value in sources.items()}
+        keys = self.keys(src_keys, params)
+        targets = list(targets or [list(self.stages)[-1]])
+        refresh = set(refresh)
+
+        # Walk back from the targets: a stage runs unless stored; its inputs are then needed.
+        # Stored outputs that are needed (targets, inputs of stages that run) are loaded
+        # now, before any put can evict them; one that vanished is recomputed instead.
+        values: Dict[str, Any] = dict(sources)
+        metas: Dict[str, Optional[Dict[str, Any]]] = {}
+        run_set, needed = set(), set(targets)
+        for name in reversed(list(self.stages)):
+            if name not in needed:
+                continue
+            meta = store.meta(keys[name]) if store is not None and name not in refresh else None
+            if meta is not None:
+                try:
+                    values[name] = store.load(keys[name])  # type: ignore[union-attr]
+                except (FileNotFoundError, KeyError):
+                    meta = None
+            metas[name] = meta
+            if meta is None:
+                run_set.add(name)
+                needed.update(i for i in self.stages[name].inputs if i in self.stages)
+
+        records = []
+        for name, stage in self.stages.items():
+            if name not in needed:
+                continue
+            t0 = time.perf_counter()
+            if name in run_set:
+                if cancel is not None and cancel():
+                    raise PipelineCancelled(name)
+                if progress is not None:
+                    progress({"stage": name, "status": "running"})
+                inputs = {i: values[i] for i in stage.inputs}
+                values[name] = stage.fn(inputs, {p: params.get(p) for p in stage.params}, options or {})
+                meta = None
+                if store is not None:
+                    blob = pickle.dumps(values[name], protocol=pickle.HIGHEST_PROTOCOL)
+                    meta = {"stage": name, "artifact": _digest(blob), "bytes": len(blob)}
+                    store.misses += 1
+                    store.put(keys[name], blob, meta)
+            else:
+                meta = metas[name]
+                store.hits += 1  # type: ignore[union-attr]
+            records.append(
+                {
+                    "stage": name,
+                    "status": "done" if name in run_set else "cached",
+                    "key": keys[name][:16],
+                    "hit": name not in run_set,
+                    "executed": name in run_set,
+                    "seconds": round(time.perf_counter() - t0, 4),
+                    "artifact": meta["artifact"][:16] if meta else None,
+                    "bytes": meta["bytes"] if meta else None,
+                    "inputs": list(stage.inputs),
+                }
+            )
+            if progress is not None:
+                progress(records[-1])
+        return PipelineRun(
+            values={t: values[t] for t in targets},
+            stages=records,
+            sources={k: v[:21] for k, v in src_keys.items()},
+        )
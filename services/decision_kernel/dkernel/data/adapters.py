@@ -1,11 +1,13 @@
 from __future__ import annotations
 
-from typing import Sequence
+from typing import Iterator, Sequence
 
 import pandas as pd
-from pydantic import BaseModel, Field, ValidationError
+from pydantic import BaseModel, Field
 from datetime import datetime
 
+from dkernel.data.validation import validate_frame
+
 
 class SalesRow(BaseModel):
     date: datetime
@@ -30,28 +32,15 @@ class OfferRow(BaseModel):
 
 
 def _validate_frame(df: pd.DataFrame, model: type[BaseModel], required_cols: Sequence[str]) -> pd.DataFrame:
-    missing = [c for c in required_cols if c not in df.columns]
-    if missing:
-        raise ValueError(f"Missing required columns: {missing}")
-    # Normalize dtypes
-    if "date" in df.columns:
-        df["date"] = pd.to_datetime(df["date"], errors="coerce")
-    if "validity_to" in df.columns:
-        df["validity_to"] = pd.to_datetime(df["validity_to"], errors="coerce")
-    # Drop rows with NA in required
-    df = df.dropna(subset=list(required_cols)).copy()
-    # Row-level validation to catch negatives, etc.
-    for idx, row in df.iterrows():
-        try:
-            model(**row.to_dict())
-        except ValidationError as e:
-            raise ValueError(f"Row {idx} invalid: {e}")
-    return df.reset_index(drop=True)
+    # Column-wise checks driven by the row model's field constraints
+    return validate_frame(df, model, required_cols)
 
 
-def load_sales_csv(path: str) -> pd.DataFrame:
-    df = pd.read_csv(path)
-    df = _validate_frame(df, SalesRow, ["date", "sku", "qty", "price"])
+SALES_COLUMNS = ["date", "sku", "qty", "price"]
+
+
+def _normalize_sales(df: pd.DataFrame) -> pd.DataFrame:
+    df = _validate_frame(df, SalesRow, SALES_COLUMNS)
     # Normalize types
     df["sku"] = df["sku"].astype(str)
     df["qty"] = df["qty"].astype(float)
@@ -59,6 +48,17 @@ def load_sales_csv(path: str) -> pd.DataFrame:
     return df
 
 
+def load_sales_csv(path: str) -> pd.DataFrame:
+    return _normalize_sales(pd.read_csv(path))
+
+
+def iter_sales_csv(path: str, chunksize: int = 500_000) -> Iterator[pd.DataFrame]:
+    """Yield validated, type-normalized sales chunks of at most ``chunksize`` rows."""
+    with pd.read_csv(path, chunksize=chunksize) as reader:
+        for chunk in reader:
+            yield _normalize_sales(chunk)
+
+
 def load_inventory_csv(path: str) -> pd.DataFrame:
     df = pd.read_csv(path)
     df = _validate_frame(df, InventoryRow, ["sku", "on_hand", "safety_stock"])
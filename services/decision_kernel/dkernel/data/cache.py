@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from dkernel.data.adapters import (
+    InventoryRow,
+    OfferRow,
+    SalesRow,
+    load_inventory_csv,
+    load_offers_csv,
+    load_sales_csv,
+)
+
+# Bump when loader normalization changes in a way the row models don't capture.
+LOADER_VERSION = 1
+
+_LOADERS: Dict[str, tuple[Callable[[str], pd.DataFrame], type]] = {
+    "sales": (load_sales_csv, SalesRow),
+    "inventory": (load_inventory_csv, InventoryRow),
+    "offers": (load_offers_csv, OfferRow),
+}
+
+
+def schema_version(kind: str) -> str:
+    """Version tag for a table kind: loader version plus a hash of its row model schema."""
+    model = _LOADERS[kind][1]
+    schema = json.dumps(model.model_json_schema(), sort_keys=True).encode()
+    return f"{LOADER_VERSION}-{hashlib.sha256(schema).hexdigest()[:12]}"
+
+
+def file_digest(path: str | Path, block_size: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _dir_size(path: Path) -> int:
+    return sum(p.stat().st_size for p in path.iterdir() if p.is_file())
+
+
+def write_columns(df: pd.DataFrame, dest: Path) -> None:
+    """Write ``df`` as one ``.npy`` file per column plus a ``meta.json`` manifest."""
+    dest.mkdir(parents=True, exist_ok=True)
+    columns = []
+    for i, name in enumerate(df.columns):
+        col = df[name]
+        entry = {"name": str(name), "file": f"c{i}.npy"}
+        if pd.api.types.is_numeric_dtype(col) or pd.api.types.is_datetime64_any_dtype(col):
+            values = col.to_numpy()
+        else:
+            nulls = col.isna().to_numpy()
+            if nulls.any():
+                np.save(dest / f"c{i}.null.npy", nulls)
+                entry["nulls"] = f"c{i}.null.npy"
+            # Fixed-width unicode keeps strings mappable without pickling
+            values = col.astype(str).to_numpy().astype(str)
+            entry["string"] = str(col.dtype)
+        np.save(dest / entry["file"], values, allow_pickle=False)
+        columns.append(entry)
+    (dest / "meta.json").write_text(json.dumps({"rows": int(len(df)), "columns": columns}))
+
+
+def read_columns(src: Path) -> pd.DataFrame:
+    """Memory-map a table written by :func:`write_columns` back into a DataFrame."""
+    meta = json.loads((src / "meta.json").read_text())
+    data = {}
+    for entry in meta["columns"]:
+        values = np.load(src / entry["file"], mmap_mode="r", allow_pickle=False)
+        if entry.get("string"):
+            values = values.astype(object)
+            if "nulls" in entry:
+                values[np.load(src / entry["nulls"])] = None
+            values = pd.array(values, dtype=entry["string"])
+        data[entry["name"]] = values
+    return pd.DataFrame(data, copy=False)
+
+
+class TableCache:
+    """Content-addressed, size-bounded on-disk cache of validated input tables.
+
+    Entries are keyed by (table kind, file SHA-256, schema version) and stored
+    column-wise as ``.npy`` files that are memory-mapped on read. When the total
+    size exceeds ``max_bytes`` the least recently used entries are evicted.
+    """
+
+    def __init__(self, root: str | Path, max_bytes: int = 1 << 30):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = int(max_bytes)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._events: list[dict] = []
+
+    def key(self, path: str | Path, kind: str) -> str:
+        return f"{kind}-{schema_version(kind)}-{file_digest(path)}"
+
+    def get(self, key: str) -> Optional[pd.DataFrame]:
+        entry = self.root / key
+        if not (entry / "meta.json").exists():
+            return None
+        os.utime(entry / "meta.json")  # LRU touch
+        return read_columns(entry)
+
+    def put(self, key: str, df: pd.DataFrame) -> None:
+        tmp = Path(tempfile.mkdtemp(dir=self.root, prefix=".tmp-"))
+        try:
+            write_columns(df, tmp)
+            target = self.root / key
+            if target.exists():
+                shutil.rmtree(target)
+            tmp.rename(target)
+        finally:
+            if tmp.exists():
+                shutil.rmtree(tmp, ignore_errors=True)
+        self.evict()
+
+    def evict(self) -> None:
+        entries = [p for p in self.root.iterdir() if p.is_dir() and not p.name.startswith(".")]
+        sized = [(p, _dir_size(p), (p / "meta.json").stat().st_mtime) for p in entries]
+        total = sum(s for _, s, _ in sized)
+        for path, size, _ in sorted(sized, key=lambda t: t[2]):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            self.evictions += 1
+
+    def load(self, path: str | Path, kind: str) -> pd.DataFrame:
+        """Return the validated table for ``path``, parsing the CSV only on a miss."""
+        t0 = time.perf_counter()
+        key = self.key(path, kind)
+        df = self.get(key)
+        hit = df is not None
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+            df = _LOADERS[kind][0](str(path))
+            self.put(key, df)
+        self._events.append(
+            {"table": kind, "hit": hit, "ms": round((time.perf_counter() - t0) * 1000, 2)}
+        )
+        return df
+
+    def report(self) -> Dict[str, object]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "tables": list(self._events),
+        }
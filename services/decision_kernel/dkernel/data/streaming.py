@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Sequence
+
+import pandas as pd
+
+from dkernel.data.adapters import iter_sales_csv
+
+
+@dataclass
+class SalesAggregates:
+    """Sales folded to what the feature pipeline needs.
+
+    demand_daily: DataFrame[date, sku, demand] summed per (date, sku)
+    revenue: Series of qty * price summed per sku (index: sku)
+    """
+
+    demand_daily: pd.DataFrame
+    revenue: pd.Series
+
+    @classmethod
+    def empty(cls) -> "SalesAggregates":
+        return cls(
+            demand_daily=pd.DataFrame(
+                {
+                    "date": pd.Series(dtype="datetime64[ns]"),
+                    "sku": pd.Series(dtype=str),
+                    "demand": pd.Series(dtype=float),
+                }
+            ),
+            revenue=pd.Series(dtype=float, name="rev", index=pd.Index([], name="sku", dtype=str)),
+        )
+
+    @classmethod
+    def combine(cls, parts: Sequence["SalesAggregates"]) -> "SalesAggregates":
+        """Fold several partial aggregates with a single concat and group-by."""
+        if len(parts) == 1:
+            return parts[0]
+        demand_daily = (
+            pd.concat([p.demand_daily for p in parts], ignore_index=True)
+            .groupby(["date", "sku"], as_index=False)["demand"]
+            .sum()
+        )
+        revenue = pd.concat([p.revenue for p in parts]).groupby(level=0).sum()
+        revenue.index.name = "sku"
+        return cls(demand_daily=demand_daily, revenue=revenue.rename("rev"))
+
+    def merge(self, other: "SalesAggregates") -> "SalesAggregates":
+        """Fold another partial aggregate into this one."""
+        return SalesAggregates.combine([self, other])
+
+
+def aggregate_sales(sales: pd.DataFrame) -> SalesAggregates:
+    """Aggregate a validated sales frame into daily demand and per-SKU revenue."""
+    demand_daily = (
+        sales.groupby(["date", "sku"], as_index=False)["qty"].sum().rename(columns={"qty": "demand"})
+    )
+    revenue = sales.assign(rev=lambda d: d["qty"] * d["price"]).groupby("sku")["rev"].sum()
+    return SalesAggregates(demand_daily=demand_daily, revenue=revenue)
+
+
+def stream_sales_aggregates(path: str, chunksize: int = 500_000) -> SalesAggregates:
+    """Read sales.csv in bounded chunks, validating and folding each into running sums.
+
+    Each chunk's (date, sku) demand and per-SKU revenue are added into one
+    running pair of indexed sums, so peak memory is one raw chunk plus the
+    aggregate (and the add's transient copy of it), never the full file.
+    """
+    demand = revenue = None
+    for chunk in iter_sales_csv(path, chunksize=chunksize):
+        part = chunk.groupby(["date", "sku"])["qty"].sum()
+        rev = chunk["qty"].mul(chunk["price"]).groupby(chunk["sku"]).sum()
+        demand = part if demand is None else demand.add(part, fill_value=0)
+        revenue = rev if revenue is None else revenue.add(rev, fill_value=0)
+    if demand is None:
+        return SalesAggregates.empty()
+    demand_daily = demand.sort_index().rename("demand").reset_index()
+    revenue = revenue.sort_index().rename("rev")
+    revenue.index.name = "sku"
+    return SalesAggregates(demand_daily=demand_daily, revenue=revenue)
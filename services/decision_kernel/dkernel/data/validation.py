@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import operator
+from datetime import date, datetime
+from typing import Callable, Dict, List, Sequence, Tuple
+
+import annotated_types as at
+import numpy as np
+import pandas as pd
+from pydantic import BaseModel
+
+
+# Bound constraints understood by the column-wise engine, mapped to the
+# comparison a *valid* value must satisfy.
+_BOUNDS: Dict[type, Tuple[str, Callable, str]] = {
+    at.Ge: ("ge", operator.ge, "greater than or equal to"),
+    at.Gt: ("gt", operator.gt, "greater than"),
+    at.Le: ("le", operator.le, "less than or equal to"),
+    at.Lt: ("lt", operator.lt, "less than"),
+}
+
+
+class SchemaValidationError(ValueError):
+    """Raised when one or more rows violate a row model.
+
+    ``errors`` is a DataFrame[row, column, reason] listing every offending
+    row index (as labelled in the source frame) and why it failed.
+    """
+
+    def __init__(self, model: type[BaseModel], errors: pd.DataFrame, max_listed: int = 10):
+        self.model = model
+        self.errors = errors
+        n_rows = errors["row"].nunique()
+        head = "; ".join(
+            f"row {r.row} {r.column}: {r.reason}" for r in errors.head(max_listed).itertuples()
+        )
+        more = f" (+{len(errors) - max_listed} more)" if len(errors) > max_listed else ""
+        super().__init__(f"{n_rows} invalid {model.__name__} row(s): {head}{more}")
+
+
+def _field_rules(model: type[BaseModel]) -> List[Tuple[str, type, list]]:
+    """Return (column, python type, bound constraints) derived from the model."""
+    rules = []
+    for name, field in model.model_fields.items():
+        bounds = [m for m in field.metadata if type(m) in _BOUNDS]
+        rules.append((name, field.annotation, bounds))
+    return rules
+
+
+def _check_bounds(values: pd.Series, bounds: list) -> List[Tuple[np.ndarray, str]]:
+    failures = []
+    for constraint in bounds:
+        attr, op, text = _BOUNDS[type(constraint)]
+        limit = getattr(constraint, attr)
+        ok = (op(values, limit) | values.isna()).to_numpy(dtype=bool)
+        failures.append((~ok, f"Input should be {text} {limit}"))
+    return failures
+
+
+def validate_frame(
+    df: pd.DataFrame, model: type[BaseModel], required_cols: Sequence[str]
+) -> pd.DataFrame:
+    """Validate ``df`` column-wise against the field rules of ``model``.
+
+    Rows with missing required values or unparseable dates are dropped (as
+    before); any remaining rule violation is collected across all rows and
+    raised as a single :class:`SchemaValidationError`.
+    """
+    missing = [c for c in required_cols if c not in df.columns]
+    if missing:
+        raise ValueError(f"Missing required columns: {missing}")
+
+    rules = [r for r in _field_rules(model) if r[0] in df.columns]
+    # Normalize dtypes
+    for col, typ, _ in rules:
+        if typ in (datetime, date):
+            df[col] = pd.to_datetime(df[col], errors="coerce")
+    # Drop rows with NA in required
+    df = df.dropna(subset=list(required_cols)).copy()
+
+    failures: List[Tuple[str, np.ndarray, str]] = []
+    for col, typ, bounds in rules:
+        if typ not in (int, float):
+            continue
+        raw = df[col]
+        values = pd.to_numeric(raw, errors="coerce")
+        bad_parse = values.isna().to_numpy() & raw.notna().to_numpy()
+        if bad_parse.any():
+            kind = "an integer" if typ is int else "a valid number"
+            failures.append((col, bad_parse, f"Input should be {kind}"))
+        if typ is int:
+            frac = ((values % 1 != 0) & values.notna()).to_numpy(dtype=bool)
+            if frac.any():
+                failures.append((col, frac, "Input should be a valid integer"))
+        for mask, reason in _check_bounds(values, bounds):
+            if mask.any():
+                failures.append((col, mask, reason))
+        df[col] = values
+
+    if failures:
+        index = df.index.to_numpy()
+        errors = pd.concat(
+            [
+                pd.DataFrame({"row": index[mask], "column": col, "reason": reason})
+                for col, mask, reason in failures
+            ],
+            ignore_index=True,
+        ).sort_values(["row", "column"], kind="stable", ignore_index=True)
+        raise SchemaValidationError(model, errors)
+    return df.reset_index(drop=True)
@@ -2,16 +2,21 @@ from __future__ import annotations
 
 from typing import Dict, Optional
 
+from dkernel.dag import PipelineRun
+
 
 def build_evidence_graph(
     goal: Dict,
     inputs: Dict,
     model_versions: Optional[Dict[str, str]] = None,
     plan: Optional[Dict] = None,
+    run: Optional[PipelineRun] = None,
 ) -> Dict:
     """Return a provenance graph as nodes/edges dict.
 
     Nodes include goal, data nodes, forecaster, optimizer, policy, scoring.
+    With a pipeline ``run``, also one node per source (content hash) and per
+    stage (key, cache hit, timing, artifact hash), linked by their inputs.
     """
     nodes = [{"id": "goal", "type": "goal", "data": goal}]
     for name, present in (inputs or {}).items():
@@ -30,6 +35,17 @@ def build_evidence_graph(
     ]
     if plan is not None:
         edges.append({"source": "scoring", "target": "plan", "why": "produce summary"})
+    if run is not None:
+        for name, key in run.sources.items():
+            nodes.append({"id": f"source:{name}", "type": "source", "key": key})
+        stages = {s["stage"] for s in run.stages}
+        for rec in run.stages:
+            nodes.append({"id": f"stage:{rec['stage']}", "type": "stage", **{k: v for k, v in rec.items() if k != "inputs"}})
+            for i in rec["inputs"]:
+                src = f"stage:{i}" if i in stages else f"source:{i}"
+                edges.append({"source": src, "target": f"stage:{rec['stage']}", "why": "stage input"})
+        if plan is not None and "score" in stages:
+            edges.append({"source": "stage:score", "target": "plan", "why": "produce summary"})
     return {"nodes": nodes, "edges": edges}
 
 
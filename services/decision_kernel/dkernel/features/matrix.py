@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Tuple
+
+import numpy as np
+import numpy.typing as npt
+import pandas as pd
+
+
+@dataclass
+class DemandMatrix:
+    """Dense SKU x day demand grid with interned index arrays.
+
+    ``values[i, j]`` is the quantity for ``skus[i]`` on ``dates[j]``; NaN marks
+    days with no record for that SKU (as opposed to a recorded zero). ``dates``
+    is the contiguous daily calendar between the first and last record.
+    ``values`` may be float32 to halve memory on large catalogs; row
+    reductions accumulate in float64 either way.
+    """
+
+    skus: np.ndarray
+    dates: pd.DatetimeIndex
+    values: np.ndarray
+    value_col: str = "demand"
+
+    @classmethod
+    def from_long(
+        cls, df: pd.DataFrame, value_col: str = "demand", dtype: npt.DTypeLike = np.float64
+    ) -> "DemandMatrix":
+        """Pivot a long frame with one row per (date, sku) into a matrix of ``dtype``."""
+        sku_codes, skus = pd.factorize(df["sku"], sort=True)
+        days = pd.to_datetime(df["date"]).to_numpy().astype("datetime64[D]")
+        if len(days):
+            start, end = days.min(), days.max()
+            dates = pd.date_range(start, end, freq="D")
+            day_codes = (days - start).astype(np.int64)
+        else:
+            dates = pd.DatetimeIndex([])
+            day_codes = np.empty(0, dtype=np.int64)
+        values = np.full((len(skus), len(dates)), np.nan, dtype=dtype)
+        values[sku_codes, day_codes] = df[value_col].to_numpy(dtype=float)
+        return cls(skus=np.asarray(skus, dtype=object), dates=dates, values=values, value_col=value_col)
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.values.shape  # type: ignore[return-value]
+
+    @property
+    def observed(self) -> np.ndarray:
+        return ~np.isnan(self.values)
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.values.nbytes + self.skus.nbytes + self.dates.asi8.nbytes)
+
+    def counts(self) -> np.ndarray:
+        """Number of recorded days per SKU."""
+        return self.observed.sum(axis=1)
+
+    def totals(self) -> np.ndarray:
+        """Summed quantity per SKU."""
+        return np.nansum(self.values, axis=1, dtype=np.float64)
+
+    def row_stats(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Per-SKU mean and sample std (ddof=1) over recorded days; std is NaN below 2 records."""
+        n = self.counts()
+        mean = np.divide(self.totals(), n, out=np.full(len(n), np.nan), where=n > 0)
+        sq = np.nansum((self.values - mean[:, None]) ** 2, axis=1)
+        std = np.sqrt(np.divide(sq, n - 1, out=np.full(len(n), np.nan), where=n > 1))
+        return mean, std
+
+    def to_series(self) -> pd.Series:
+        """Per-SKU totals as a Series indexed by SKU."""
+        return pd.Series(self.totals(), index=pd.Index(self.skus, name="sku"), name=self.value_col)
+
+    def to_sparse(self):
+        """CSR view with missing days stored as implicit zeros."""
+        from scipy import sparse
+
+        return sparse.csr_matrix(np.nan_to_num(self.values, nan=0.0))
+
+    def to_long(self) -> pd.DataFrame:
+        """Back to the long [date, sku, <value_col>] frame, ordered by (date, sku)."""
+        day_idx, sku_idx = np.nonzero(self.observed.T)
+        return pd.DataFrame(
+            {
+                "date": self.dates[day_idx],
+                "sku": self.skus[sku_idx],
+                self.value_col: self.values[sku_idx, day_idx],
+            }
+        )
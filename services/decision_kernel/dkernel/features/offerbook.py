@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Offer columns held as typed arrays; any other column is kept in ``extra``
+_CORE = ("sku", "supplier", "price", "moq", "lead_time_days")
+
+
+@dataclass
+class OfferBook:
+    """Offers sorted by (sku, price) in flat arrays with CSR per-SKU offsets.
+
+    Offers of ``skus[i]`` are rows ``offsets[i]:offsets[i + 1]``, cheapest
+    first (price ties keep input order). Suppliers are interned:
+    ``supplier_id[j]`` indexes ``suppliers``. Other offer columns (e.g. ABC)
+    sit in ``extra`` in the same row order. SKU and supplier lookups go
+    through indexes built once per book.
+    """
+
+    skus: np.ndarray
+    offsets: np.ndarray
+    suppliers: np.ndarray
+    supplier_id: np.ndarray
+    price: np.ndarray
+    moq: np.ndarray
+    lead_time: np.ndarray
+    extra: Dict[str, np.ndarray] = field(default_factory=dict)
+
+    @classmethod
+    def from_frame(cls, offers: pd.DataFrame) -> "OfferBook":
+        sku_codes, skus = pd.factorize(offers["sku"], sort=True)
+        sup_codes, suppliers = pd.factorize(offers["supplier"], sort=True)
+        price = offers["price"].to_numpy(dtype=float)
+        order = np.lexsort((price, sku_codes))
+        counts = np.bincount(sku_codes, minlength=len(skus))
+        return cls(
+            skus=np.asarray(skus, dtype=object),
+            offsets=np.r_[0, np.cumsum(counts)].astype(np.int64),
+            suppliers=np.asarray(suppliers, dtype=object),
+            supplier_id=sup_codes[order].astype(np.int32),
+            price=price[order],
+            moq=offers["moq"].to_numpy(dtype=float)[order],
+            lead_time=offers["lead_time_days"].to_numpy(dtype=np.int64)[order],
+            extra={c: offers[c].to_numpy()[order] for c in offers.columns if c not in _CORE},
+        )
+
+    @classmethod
+    def of(cls, offers: "pd.DataFrame | OfferBook") -> "OfferBook":
+        """``offers`` itself if already a book, else a book built from the frame."""
+        return offers if isinstance(offers, OfferBook) else cls.from_frame(offers)
+
+    @property
+    def n_skus(self) -> int:
+        return len(self.skus)
+
+    @property
+    def n_offers(self) -> int:
+        return len(self.price)
+
+    @property
+    def offer_sku(self) -> np.ndarray:
+        """SKU position of every offer (non-decreasing)."""
+        return np.repeat(np.arange(self.n_skus), np.diff(self.offsets))
+
+    @property
+    def supplier(self) -> np.ndarray:
+        return self.suppliers[self.supplier_id]
+
+    def column(self, name: str) -> np.ndarray:
+        """Per-offer values of any offer column, in book order."""
+        core = {"sku": lambda: self.skus[self.offer_sku], "supplier": lambda: self.supplier,
+                "price": lambda: self.price, "moq": lambda: self.moq, "lead_time_days": lambda: self.lead_time}
+        if name in core:
+            return core[name]()
+        if name not in self.extra:
+            raise KeyError(f"Offer book has no column: {name}")
+        return self.extra[name]
+
+    @cached_property
+    def sku_index(self) -> pd.Index:
+        """SKU -> position lookup (hashed on first use, then reused)."""
+        return pd.Index(self.skus)
+
+    @cached_property
+    def supplier_index(self) -> pd.Index:
+        """Supplier name -> interned id lookup."""
+        return pd.Index(self.suppliers)
+
+    def sku_positions(self, skus: Iterable) -> np.ndarray:
+        """Position of each SKU in ``skus`` (-1 for SKUs without offers)."""
+        return self.sku_index.get_indexer(pd.Index(skus))
+
+    def supplier_ids(self, suppliers: Iterable) -> np.ndarray:
+        """Interned ids of known suppliers (unknown names are dropped)."""
+        ids = self.supplier_index.get_indexer(pd.Index(list(suppliers)))
+        return ids[ids >= 0]
+
+    def supplier_mask(self, suppliers: Iterable) -> np.ndarray:
+        """Per-offer mask of offers from any of ``suppliers``."""
+        hit = np.zeros(len(self.suppliers), dtype=bool)
+        hit[self.supplier_ids(suppliers)] = True
+        return hit[self.supplier_id]
+
+    def expand(self, sku_pos: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """All offers of the given SKU positions: (offer rows, index into ``sku_pos``).
+
+        Rows keep book order within each SKU; negative positions contribute nothing.
+        """
+        sku_pos = np.asarray(sku_pos, dtype=np.int64)
+        valid = sku_pos >= 0
+        starts = np.where(valid, self.offsets[np.maximum(sku_pos, 0)], 0)
+        lengths = np.where(valid, self.offsets[np.maximum(sku_pos, 0) + 1] - starts, 0)
+        owner = np.repeat(np.arange(len(sku_pos)), lengths)
+        first = np.r_[0, np.cumsum(lengths)[:-1]] if len(lengths) else np.zeros(0, dtype=np.int64)
+        rows = np.arange(int(lengths.sum())) - first[owner] + starts[owner]
+        return rows.astype(np.int64), owner
+
+    def first_allowed(self, allowed: Optional[np.ndarray] = None) -> np.ndarray:
+        """Cheapest offer row per SKU among offers where ``allowed`` is True (-1: none).
+
+        One backward pass finds, for every row, the next allowed row; each
+        SKU's answer is then that of its first row.
+        """
+        starts, ends = self.offsets[:-1], self.offsets[1:]
+        if allowed is None:
+            return np.where(ends > starts, starts, -1)
+        nxt = np.where(allowed, np.arange(self.n_offers), self.n_offers)
+        nxt = np.minimum.accumulate(nxt[::-1])[::-1] if self.n_offers else nxt
+        first = nxt[np.minimum(starts, max(self.n_offers - 1, 0))] if self.n_offers else starts
+        return np.where((ends > starts) & (first < ends), first, -1)
+
+    def cheapest(self, skus: Iterable, allowed: Optional[np.ndarray] = None) -> np.ndarray:
+        """Bulk lookup: cheapest allowed offer row for each SKU in ``skus`` (-1: none)."""
+        pos = self.sku_positions(skus)
+        best = self.first_allowed(allowed)
+        return np.where(pos >= 0, best[np.maximum(pos, 0)] if self.n_skus else -1, -1)
+
+    def cheapest_allowed(self, sku, exclude: Iterable = ()) -> int:
+        """Cheapest offer row for one SKU skipping suppliers in ``exclude`` (-1: none).
+
+        Scans the SKU's price-ordered slice from the front, so the cost is the
+        number of excluded offers cheaper than the answer, not the book size.
+        """
+        try:
+            pos = self.sku_index.get_loc(sku)
+        except KeyError:
+            return -1
+        banned = {self.supplier_index.get_loc(s) for s in exclude if s in self.supplier_index}
+        for row in range(self.offsets[pos], self.offsets[pos + 1]):
+            if self.supplier_id[row] not in banned:
+                return int(row)
+        return -1
+
+    def take(self, rows: np.ndarray) -> pd.DataFrame:
+        """Offer rows as a frame with the source offer columns."""
+        rows = np.asarray(rows, dtype=np.int64)
+        sku_of = np.searchsorted(self.offsets, rows, side="right") - 1
+        frame = pd.DataFrame(
+            {
+                "sku": self.skus[sku_of],
+                "supplier": self.suppliers[self.supplier_id[rows]],
+                "price": self.price[rows],
+                "moq": self.moq[rows],
+                "lead_time_days": self.lead_time[rows],
+            }
+        )
+        for name, values in self.extra.items():
+            frame[name] = values[rows]
+        return frame
@@ -1,22 +1,34 @@
 from __future__ import annotations
 
-from typing import Dict
+from typing import Any, Dict, Optional
 
 import numpy as np
 import pandas as pd
 
+from dkernel.config import get_settings
+from dkernel.data.streaming import SalesAggregates, aggregate_sales
+from dkernel.features.matrix import DemandMatrix
+from dkernel.features.offerbook import OfferBook
+
 
 def build_feature_tables(
-    sales: pd.DataFrame, inventory: pd.DataFrame, offers: pd.DataFrame
-) -> Dict[str, pd.DataFrame]:
+    sales: pd.DataFrame | SalesAggregates,
+    inventory: pd.DataFrame,
+    offers: pd.DataFrame,
+    matrix_dtype: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Build planning feature tables.
+
+    ``sales`` is either the validated sales frame or its pre-folded
+    :class:`SalesAggregates` (e.g. from ``stream_sales_aggregates``).
+    ``matrix_dtype`` stores the demand matrix (default ``DEMAND_MATRIX_DTYPE``).
+    """
+    agg = sales if isinstance(sales, SalesAggregates) else aggregate_sales(sales)
     # demand_daily
-    demand_daily = (
-        sales.groupby(["date", "sku"], as_index=False)["qty"].sum().rename(columns={"qty": "demand"})
-    )
+    demand_daily = agg.demand_daily
 
     # sku_stats with ABC by revenue share
-    revenue = sales.assign(rev=lambda d: d["qty"] * d["price"]).groupby("sku")["rev"].sum()
-    revenue = revenue.sort_values(ascending=False)
+    revenue = agg.revenue.sort_values(ascending=False)
     cum_share = (revenue / revenue.sum()).cumsum()
     def abc(score: float) -> str:
         if score <= 0.8:
@@ -44,9 +56,13 @@ def build_feature_tables(
 
     return {
         "demand_daily": demand_daily,
+        "demand_matrix": DemandMatrix.from_long(
+            demand_daily, dtype=matrix_dtype or get_settings().DEMAND_MATRIX_DTYPE
+        ),
         "sku_stats": sku_stats,
         "supplier_reliability": rel,
         "joined_offers": joined_offers,
+        "offer_book": OfferBook.from_frame(joined_offers),
         "inventory": inventory.copy(),
     }
 
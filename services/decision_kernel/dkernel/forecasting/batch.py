@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+from typing import Callable, Dict, Tuple
+
+import numpy as np
+
+from dkernel.config import get_settings
+from dkernel.features.matrix import DemandMatrix
+
+MA_WINDOW = 14
+MA_MIN_WINDOW = 3
+SES_ALPHA = 0.3
+HOLT_BETA = 0.1
+SEASON_LENGTH = 7
+
+
+def seeded_noise(horizon: int) -> np.ndarray:
+    """Multiplicative noise shared by every SKU, as drawn by ``_fallback_forecast``."""
+    rng = np.random.default_rng(get_settings().SEED)
+    return rng.normal(0, 0.05, size=horizon)
+
+
+def tail_mean(values: np.ndarray, window: int = MA_WINDOW, min_window: int = MA_MIN_WINDOW) -> np.ndarray:
+    """Row-wise mean of the last ``min(window, max(min_window, n))`` recorded values.
+
+    Mirrors ``series.tail(window).mean()`` per SKU; rows with no record give 0.
+    """
+    obs = ~np.isnan(values)
+    n = obs.sum(axis=1)
+    k = np.minimum(window, np.maximum(min_window, n))
+    # rank of each recorded value counted from the most recent one
+    rank_from_end = np.cumsum(obs[:, ::-1], axis=1)[:, ::-1]
+    take = obs & (rank_from_end <= k[:, None])
+    total = np.where(take, values, 0.0).sum(axis=1, dtype=np.float64)
+    count = take.sum(axis=1)
+    return np.divide(total, count, out=np.zeros(len(n)), where=count > 0)
+
+
+def smooth_step(
+    level: np.ndarray, trend: np.ndarray, x: np.ndarray, alpha: float, beta: float
+) -> Tuple[np.ndarray, np.ndarray]:
+    """One Holt update over all SKUs; NaN observations leave state untouched.
+
+    A NaN level means "not yet initialised" and is set from the first record.
+    """
+    seen = ~np.isnan(x)
+    fresh = seen & np.isnan(level)
+    upd = seen & ~fresh
+    new_level = np.where(fresh, x, level)
+    smoothed = alpha * x + (1.0 - alpha) * (level + trend)
+    new_level = np.where(upd, smoothed, new_level)
+    new_trend = np.where(upd, beta * (new_level - level) + (1.0 - beta) * trend, trend)
+    return new_level, new_trend
+
+
+def smooth(values: np.ndarray, alpha: float, beta: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Run :func:`smooth_step` across all days; returns final (level, trend)."""
+    level = np.full(values.shape[0], np.nan)
+    trend = np.zeros(values.shape[0])
+    for t in range(values.shape[1]):
+        level, trend = smooth_step(level, trend, values[:, t], alpha, beta)
+    return level, trend
+
+
+def project_mean(avg: np.ndarray, horizon: int) -> np.ndarray:
+    """Flat per-SKU mean with the shared SEED noise applied."""
+    return np.maximum(0.0, avg[:, None] * (1.0 + seeded_noise(horizon)[None, :]))
+
+
+def project_trend(level: np.ndarray, trend: np.ndarray, horizon: int) -> np.ndarray:
+    """Holt projection ``level + h * trend``; SKUs without a record forecast 0."""
+    steps = np.arange(1, horizon + 1)
+    return np.maximum(0.0, np.nan_to_num(level)[:, None] + trend[:, None] * steps[None, :])
+
+
+def project_season(season: np.ndarray, horizon: int) -> np.ndarray:
+    """Repeat the last observed season (missing days as zero) over the horizon."""
+    season = np.nan_to_num(season).astype(np.float64, copy=False)
+    if season.shape[1] == 0:
+        return np.zeros((season.shape[0], horizon))
+    reps = -(-horizon // season.shape[1])
+    return np.tile(season, reps)[:, :horizon]
+
+
+def _moving_average(values: np.ndarray, horizon: int) -> np.ndarray:
+    return project_mean(tail_mean(values), horizon)
+
+
+def _ses(values: np.ndarray, horizon: int) -> np.ndarray:
+    level, _ = smooth(values, SES_ALPHA, 0.0)
+    return project_trend(level, np.zeros(len(level)), horizon)
+
+
+def _holt(values: np.ndarray, horizon: int) -> np.ndarray:
+    level, trend = smooth(values, SES_ALPHA, HOLT_BETA)
+    return project_trend(level, trend, horizon)
+
+
+def _seasonal_naive(values: np.ndarray, horizon: int) -> np.ndarray:
+    season = values[:, -SEASON_LENGTH:]
+    short = SEASON_LENGTH - season.shape[1]
+    if short > 0:
+        # Days before the history count as missing (zero), like ForecastState's empty season
+        season = np.pad(season, ((0, 0), (short, 0)), constant_values=np.nan)
+    return project_season(season, horizon)
+
+
+METHODS: Dict[str, Callable[[np.ndarray, int], np.ndarray]] = {
+    "moving_average": _moving_average,
+    "ses": _ses,
+    "holt": _holt,
+    "seasonal_naive": _seasonal_naive,
+}
+
+
+def batch_forecast(matrix: DemandMatrix, horizon: int, method: str = "moving_average") -> np.ndarray:
+    """Forecast every SKU at once; returns a (n_skus, horizon) array.
+
+    ``moving_average`` reproduces ``_fallback_forecast`` exactly (including its
+    SEED-driven noise); the smoothing and seasonal methods are deterministic.
+    """
+    try:
+        fn = METHODS[method]
+    except KeyError:
+        raise ValueError(f"Unknown forecast method: {method}") from None
+    return fn(matrix.values, horizon)
@@ -6,6 +6,10 @@ import numpy as np
 import pandas as pd
 
 from dkernel.config import get_settings
+from dkernel.features.matrix import DemandMatrix
+from dkernel.forecasting.batch import batch_forecast
+from dkernel.forecasting.incremental import ForecastState
+from dkernel.forecasting.parallel import SKU_MODELS, parallel_forecast
 
 
 def _fallback_forecast(series: pd.Series, horizon: int) -> np.ndarray:
@@ -18,18 +22,75 @@ def _fallback_forecast(series: pd.Series, horizon: int) -> np.ndarray:
     return forecast
 
 
-def forecast_demand(demand_daily: pd.DataFrame, horizon: int = 30) -> pd.DataFrame:
-    """Per-SKU forecast over horizon. Fallback to moving average.
+def _as_matrix(demand_daily: pd.DataFrame | DemandMatrix) -> DemandMatrix:
+    if isinstance(demand_daily, DemandMatrix):
+        return demand_daily
+    return DemandMatrix.from_long(demand_daily)
 
-    Returns DataFrame[sku, date, forecast_qty]. Deterministic given SEED.
+
+def forecast_matrix(
+    demand_daily: pd.DataFrame | DemandMatrix | ForecastState,
+    horizon: int = 30,
+    method: str = "moving_average",
+    n_workers: Optional[int] = None,
+    model_dir: Optional[str] = None,
+) -> DemandMatrix:
+    """Forecast as a SKU x horizon :class:`DemandMatrix` of ``forecast_qty``.
+
+    ``method`` is a batch method (``dkernel.forecasting.batch.METHODS``), a
+    per-SKU model (``dkernel.forecasting.parallel.SKU_MODELS``) run across
+    ``n_workers`` processes (default ``Settings.N_WORKERS``), or ``"global"``
+    for inference with the latest darts model trained into ``model_dir``
+    (default ``Settings.FORECAST_MODEL_DIR``). Given a :class:`ForecastState`,
+    the horizon is produced from the persisted smoothing state alone.
     """
-    fc_rows = []
-    last_date = pd.to_datetime(demand_daily["date"]).max()
-    for sku, grp in demand_daily.groupby("sku"):
-        series = grp.sort_values("date")["demand"].astype(float)
-        values = _fallback_forecast(series, horizon)
-        dates = pd.date_range(start=last_date + pd.Timedelta(days=1), periods=horizon, freq="D")
-        for d, q in zip(dates, values):
-            fc_rows.append((sku, d, float(round(q, 3))))
-    return pd.DataFrame(fc_rows, columns=["sku", "date", "forecast_qty"])  # type: ignore
+    if isinstance(demand_daily, ForecastState):
+        state = demand_daily
+        dates = pd.date_range(start=state.last_date + pd.Timedelta(days=1), periods=horizon, freq="D")
+        values = np.round(state.forecast(horizon, method), 3)
+        return DemandMatrix(skus=state.skus, dates=dates, values=values, value_col="forecast_qty")
+    matrix = _as_matrix(demand_daily)
+    if matrix.shape[0] == 0:
+        return DemandMatrix(matrix.skus, pd.DatetimeIndex([]), np.empty((0, 0)), "forecast_qty")
+    if method == "global":
+        from dkernel.forecasting.global_model import global_forecast
+
+        values = global_forecast(matrix, horizon, model_dir or get_settings().FORECAST_MODEL_DIR)
+    elif method in SKU_MODELS:
+        values, _ = parallel_forecast(matrix, horizon, model=method, n_workers=n_workers)
+    else:
+        values = batch_forecast(matrix, horizon, method)
+    values = np.round(values, 3)
+    dates = pd.date_range(start=matrix.dates[-1] + pd.Timedelta(days=1), periods=horizon, freq="D")
+    return DemandMatrix(skus=matrix.skus, dates=dates, values=values, value_col="forecast_qty")
+
 
+def forecast_frame(fc: DemandMatrix) -> pd.DataFrame:
+    """Columnar DataFrame[sku, date, forecast_qty] ordered by (sku, date)."""
+    n_skus, horizon = fc.shape
+    if n_skus == 0:
+        return pd.DataFrame(columns=["sku", "date", "forecast_qty"])
+    return pd.DataFrame(
+        {
+            "sku": np.repeat(fc.skus, horizon),
+            "date": np.tile(fc.dates, n_skus),
+            "forecast_qty": fc.values.ravel(),
+        }
+    )
+
+
+def forecast_demand(
+    demand_daily: pd.DataFrame | DemandMatrix | ForecastState,
+    horizon: int = 30,
+    method: str = "moving_average",
+    n_workers: Optional[int] = None,
+    model_dir: Optional[str] = None,
+) -> pd.DataFrame:
+    """Per-SKU forecast over horizon. Defaults to the moving-average fallback.
+
+    Accepts the long ``demand_daily`` frame, its :class:`DemandMatrix` or an
+    incremental :class:`ForecastState`; all SKUs are forecast at once (see
+    ``dkernel.forecasting.batch.METHODS``).
+    Returns DataFrame[sku, date, forecast_qty]. Deterministic given SEED.
+    """
+    return forecast_frame(forecast_matrix(demand_daily, horizon, method, n_workers, model_dir))
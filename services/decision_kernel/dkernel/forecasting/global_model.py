@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import json
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from dkernel.features.matrix import DemandMatrix
+from dkernel.forecasting.batch import batch_forecast
+from dkernel.forecasting.parallel import _recorded_span
+
+ARTIFACT_FORMAT = 1
+MODEL_FILE = "model.pkl"
+META_FILE = "meta.json"
+
+# Warm models keyed by (resolved artifact dir, version)
+_LOADED: Dict[Tuple[str, int], Tuple[Any, Dict[str, Any]]] = {}
+
+
+def _require_darts():
+    try:
+        import darts  # type: ignore
+        from darts import TimeSeries  # type: ignore
+        from darts.models import LinearRegressionModel  # type: ignore
+        from darts.utils.timeseries_generation import datetime_attribute_timeseries  # type: ignore
+    except Exception as e:  # pragma: no cover - optional
+        raise RuntimeError("darts not installed; install decision-kernel[forecast]") from e
+    return darts, TimeSeries, LinearRegressionModel, datetime_attribute_timeseries
+
+
+def _series(matrix: DemandMatrix, stop: Optional[int] = None, min_days: int = 1) -> Tuple[np.ndarray, List[Any]]:
+    """Calendar-daily TimeSeries per SKU from its first record (see ``parallel._recorded_span``).
+
+    Only SKUs with at least ``min_days`` days from their first record are
+    kept; returns their matrix rows and series.
+    """
+    _, TimeSeries, _, _ = _require_darts()
+    values = matrix.values[:, :stop]
+    index = matrix.dates[:stop]
+    recorded = ~np.isnan(values)
+    first = np.where(recorded.any(axis=1), recorded.argmax(axis=1), len(index))
+    rows = np.flatnonzero(len(index) - first >= max(1, min_days))
+    series = [
+        TimeSeries.from_times_and_values(index[first[i] :], _recorded_span(values[i]).astype(np.float32))
+        for i in rows
+    ]
+    return rows, series
+
+
+def _covariates(start: pd.Timestamp, periods: int) -> Any:
+    """Day-of-week one-hot future covariates, shared by every series."""
+    _, _, _, datetime_attribute_timeseries = _require_darts()
+    index = pd.date_range(start, periods=periods, freq="D")
+    return datetime_attribute_timeseries(index, attribute="weekday", one_hot=True).astype(np.float32)
+
+
+def _versions(root: Path) -> List[int]:
+    if not root.exists():
+        return []
+    return sorted(int(p.name[1:]) for p in root.glob("v*") if p.name[1:].isdigit() and (p / META_FILE).exists())
+
+
+def _fit(matrix: DemandMatrix, stop: Optional[int], lags: int, horizon: int):
+    _, _, LinearRegressionModel, _ = _require_darts()
+    _, series = _series(matrix, stop, min_days=lags + 1)
+    if not series:
+        raise ValueError(f"No SKU has more than {lags} days of recorded history")
+    n_days = len(matrix.dates[:stop])
+    cov = _covariates(matrix.dates[0], n_days + horizon)
+    model = LinearRegressionModel(lags=lags, lags_future_covariates=[0], output_chunk_length=1)
+    t0 = time.perf_counter()
+    model.fit(series, future_covariates=[cov] * len(series))
+    return model, time.perf_counter() - t0
+
+
+def _predict(model: Any, matrix: DemandMatrix, lags: int, horizon: int) -> np.ndarray:
+    """Model forecast for SKUs with ``lags`` recorded days; the moving-average fallback for the rest."""
+    out = batch_forecast(matrix, horizon, "moving_average")
+    rows, series = _series(matrix, min_days=lags)
+    if series:
+        cov = _covariates(matrix.dates[0], matrix.shape[1] + horizon)
+        preds = model.predict(n=horizon, series=series, future_covariates=[cov] * len(series), show_warnings=False)
+        out[rows] = np.maximum(0.0, np.stack([p.values().ravel() for p in preds]).astype(float))
+    return out
+
+
+def train_global_model(
+    demand: pd.DataFrame | DemandMatrix,
+    artifact_dir: str | Path,
+    lags: int = 14,
+    horizon: int = 30,
+    holdout: int = 14,
+) -> Dict[str, Any]:
+    """Fit one darts regression model across all SKU series and persist it.
+
+    A first fit on history minus ``holdout`` days scores MAE against the
+    moving-average fallback; the persisted model is then refit on full
+    history. Artifacts land in ``artifact_dir/v<N>/``. Returns the report.
+    """
+    darts, _, _, _ = _require_darts()
+    matrix = demand if isinstance(demand, DemandMatrix) else DemandMatrix.from_long(demand)
+    n_days = matrix.shape[1]
+    if matrix.shape[0] == 0 or n_days < lags + holdout + 1:
+        raise ValueError(f"Need at least {lags + holdout + 1} days of history, got {n_days}")
+
+    cut = n_days - holdout
+    actual = np.nan_to_num(matrix.values[:, cut:])
+    train = DemandMatrix(matrix.skus, matrix.dates[:cut], matrix.values[:, :cut])
+    model, eval_fit_s = _fit(matrix, cut, lags, holdout)
+    t0 = time.perf_counter()
+    pred = _predict(model, train, lags, holdout)
+    eval_infer_s = time.perf_counter() - t0
+    fallback = batch_forecast(train, holdout, "moving_average")
+
+    model, fit_s = _fit(matrix, None, lags, horizon)
+    root = Path(artifact_dir)
+    version = (_versions(root) or [0])[-1] + 1
+    dest = root / f"v{version}"
+    dest.mkdir(parents=True, exist_ok=True)
+    model.save(str(dest / MODEL_FILE))
+    report = {
+        "version": version,
+        "n_series": int(matrix.shape[0]),
+        "fit_seconds": round(fit_s, 4),
+        "eval_fit_seconds": round(eval_fit_s, 4),
+        "eval_inference_seconds": round(eval_infer_s, 4),
+        "mae_global": round(float(np.abs(pred - actual).mean()), 4),
+        "mae_fallback": round(float(np.abs(fallback - actual).mean()), 4),
+    }
+    meta = {
+        "format": ARTIFACT_FORMAT,
+        "model": type(model).__name__,
+        "darts_version": darts.__version__,
+        "lags": lags,
+        "trained_at": datetime.now(timezone.utc).isoformat(),
+        "last_date": str(matrix.dates[-1].date()),
+        "report": report,
+    }
+    (dest / META_FILE).write_text(json.dumps(meta, indent=2))
+    return report
+
+
+def load_global_model(artifact_dir: str | Path, version: Optional[int] = None) -> Tuple[Any, Dict[str, Any]]:
+    """Return (model, meta) for ``version`` (default: latest), loading from disk once per process."""
+    root = Path(artifact_dir).resolve()
+    versions = _versions(root)
+    if not versions:
+        raise FileNotFoundError(f"No trained forecast model under {root}")
+    version = versions[-1] if version is None else version
+    key = (str(root), version)
+    if key not in _LOADED:
+        _, _, LinearRegressionModel, _ = _require_darts()
+        dest = root / f"v{version}"
+        meta = json.loads((dest / META_FILE).read_text())
+        _LOADED[key] = (LinearRegressionModel.load(str(dest / MODEL_FILE)), meta)
+    return _LOADED[key]
+
+
+def global_forecast(
+    matrix: DemandMatrix, horizon: int, artifact_dir: str | Path, version: Optional[int] = None
+) -> np.ndarray:
+    """Inference-only forecast for every SKU from a persisted global model.
+
+    SKUs with fewer recorded days than the model's lags get the moving-average fallback.
+    """
+    model, meta = load_global_model(artifact_dir, version)
+    return _predict(model, matrix, int(meta["lags"]), horizon)
@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Sequence
+
+import numpy as np
+import pandas as pd
+
+from dkernel.features.matrix import DemandMatrix
+from dkernel.forecasting.batch import (
+    HOLT_BETA,
+    MA_WINDOW,
+    METHODS,
+    SEASON_LENGTH,
+    SES_ALPHA,
+    batch_forecast,
+    project_mean,
+    project_season,
+    project_trend,
+    smooth_step,
+)
+
+STATE_FORMAT = 1
+
+
+@dataclass
+class ForecastState:
+    """Per-SKU smoothing state that summarises demand history up to ``last_date``.
+
+    window: last ``MA_WINDOW`` recorded values (oldest first, NaN-padded)
+    ses_level: simple exponential smoothing level
+    level/trend: Holt level and trend
+    season: last ``SEASON_LENGTH`` calendar days (missing days as zero)
+    """
+
+    skus: np.ndarray
+    last_date: pd.Timestamp
+    window: np.ndarray
+    ses_level: np.ndarray
+    level: np.ndarray
+    trend: np.ndarray
+    season: np.ndarray
+
+    @classmethod
+    def empty(cls, skus: Sequence[str], last_date: pd.Timestamp) -> "ForecastState":
+        n = len(skus)
+        return cls(
+            skus=np.asarray(skus, dtype=object),
+            last_date=pd.Timestamp(last_date),
+            window=np.full((n, MA_WINDOW), np.nan),
+            ses_level=np.full(n, np.nan),
+            level=np.full(n, np.nan),
+            trend=np.zeros(n),
+            season=np.zeros((n, SEASON_LENGTH)),
+        )
+
+    @classmethod
+    def from_history(cls, demand: pd.DataFrame | DemandMatrix) -> "ForecastState":
+        """Build state by replaying full history (the O(history) path)."""
+        matrix = demand if isinstance(demand, DemandMatrix) else DemandMatrix.from_long(demand)
+        if matrix.shape[1] == 0:
+            raise ValueError("Cannot build forecast state from empty history")
+        state = cls.empty(matrix.skus, matrix.dates[0] - pd.Timedelta(days=1))
+        state._advance(matrix.values)
+        state.last_date = matrix.dates[-1]
+        return state
+
+    def _advance(self, values: np.ndarray) -> None:
+        """Fold consecutive calendar days (columns of ``values``) into the state."""
+        for t in range(values.shape[1]):
+            x = values[:, t]
+            seen = ~np.isnan(x)
+            if seen.any():
+                self.window[seen] = np.concatenate([self.window[seen, 1:], x[seen, None]], axis=1)
+            self.ses_level, _ = smooth_step(self.ses_level, np.zeros(len(x)), x, SES_ALPHA, 0.0)
+            self.level, self.trend = smooth_step(self.level, self.trend, x, SES_ALPHA, HOLT_BETA)
+            self.season = np.concatenate([self.season[:, 1:], np.nan_to_num(x)[:, None]], axis=1)
+
+    def update(self, new_rows: pd.DataFrame) -> "ForecastState":
+        """Fold ``demand_daily`` rows dated after ``last_date`` in O(new days x SKUs)."""
+        if new_rows.empty:
+            return self
+        dates = pd.to_datetime(new_rows["date"])
+        if (dates <= self.last_date).any():
+            raise ValueError(f"Incremental update needs rows after {self.last_date.date()}")
+        new_skus = np.setdiff1d(new_rows["sku"].unique().astype(str), self.skus.astype(str))
+        if len(new_skus):
+            self._append_skus(new_skus)
+        # Index the update against this state's SKU order and calendar
+        pos = pd.Index(self.skus).get_indexer(new_rows["sku"].astype(str))
+        days = (dates.to_numpy().astype("datetime64[D]") - np.datetime64(self.last_date.date(), "D")).astype(int)
+        values = np.full((len(self.skus), int(days.max())), np.nan)
+        values[pos, days - 1] = new_rows["demand"].to_numpy(dtype=float)
+        self._advance(values)
+        self.last_date = self.last_date + pd.Timedelta(days=int(days.max()))
+        return self
+
+    def _append_skus(self, skus: np.ndarray) -> None:
+        fresh = ForecastState.empty(skus, self.last_date)
+        merged = np.concatenate([self.skus, fresh.skus])
+        order = np.argsort(merged.astype(str), kind="stable")
+        self.skus = merged[order]
+        for name in ("window", "ses_level", "level", "trend", "season"):
+            stacked = np.concatenate([getattr(self, name), getattr(fresh, name)])
+            setattr(self, name, stacked[order])
+
+    def forecast(self, horizon: int, method: str = "moving_average") -> np.ndarray:
+        """(n_skus, horizon) forecast from state alone, matching ``batch_forecast``."""
+        if method == "moving_average":
+            count = (~np.isnan(self.window)).sum(axis=1)
+            total = np.nansum(self.window, axis=1)
+            return project_mean(np.divide(total, count, out=np.zeros(len(count)), where=count > 0), horizon)
+        if method == "ses":
+            return project_trend(self.ses_level, np.zeros(len(self.skus)), horizon)
+        if method == "holt":
+            return project_trend(self.level, self.trend, horizon)
+        if method == "seasonal_naive":
+            return project_season(self.season, horizon)
+        raise ValueError(f"Unknown forecast method: {method}")
+
+    def save(self, path: str | Path) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "wb") as f:
+            np.savez(
+                f,
+                format=STATE_FORMAT,
+                skus=self.skus.astype(str),
+                last_date=np.datetime64(self.last_date.date(), "D"),
+                window=self.window,
+                ses_level=self.ses_level,
+                level=self.level,
+                trend=self.trend,
+                season=self.season,
+            )
+
+    @classmethod
+    def load(cls, path: str | Path) -> "ForecastState":
+        with np.load(path, allow_pickle=False) as data:
+            if int(data["format"]) != STATE_FORMAT:
+                raise ValueError(f"Unsupported forecast state format in {path}")
+            return cls(
+                skus=data["skus"].astype(object),
+                last_date=pd.Timestamp(data["last_date"][()]),
+                window=data["window"],
+                ses_level=data["ses_level"],
+                level=data["level"],
+                trend=data["trend"],
+                season=data["season"],
+            )
+
+
+def verify_incremental(
+    state: ForecastState, demand: pd.DataFrame | DemandMatrix, horizon: int = 30, atol: float = 1e-6
+) -> Dict[str, object]:
+    """Compare state-based forecasts against a full batch recompute over ``demand``."""
+    matrix = demand if isinstance(demand, DemandMatrix) else DemandMatrix.from_long(demand)
+    report: Dict[str, object] = {}
+    same_index = list(matrix.skus) == list(state.skus) and matrix.dates[-1] == state.last_date
+    diffs = {}
+    for method in METHODS:
+        full = batch_forecast(matrix, horizon, method)
+        inc = state.forecast(horizon, method)
+        diffs[method] = float(np.abs(full - inc).max()) if same_index and full.size else float("inf")
+    report["max_abs_diff"] = diffs
+    report["consistent"] = bool(same_index and all(d <= atol for d in diffs.values()))
+    return report
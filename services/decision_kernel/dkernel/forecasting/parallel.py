@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import multiprocessing as mp
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from dkernel.config import get_settings
+from dkernel.features.matrix import DemandMatrix
+
+
+def _sku_fallback(row: np.ndarray, horizon: int) -> np.ndarray:
+    from dkernel.forecasting.darts_forecaster import _fallback_forecast
+
+    return _fallback_forecast(pd.Series(row[~np.isnan(row)]), horizon)
+
+
+def _recorded_span(row: np.ndarray) -> np.ndarray:
+    """The row from the SKU's first record on, with gaps after it as zero demand.
+
+    Days before a SKU's first sale are not zero demand (it was not sold yet),
+    so models fit only on its own history, like the serial per-SKU path.
+    """
+    recorded = np.flatnonzero(~np.isnan(row))
+    if not len(recorded):
+        raise ValueError("SKU has no recorded demand")
+    return np.nan_to_num(row[recorded[0] :])
+
+
+def _sku_exponential_smoothing(row: np.ndarray, horizon: int) -> np.ndarray:
+    from darts import TimeSeries  # type: ignore
+    from darts.models import ExponentialSmoothing  # type: ignore
+
+    series = TimeSeries.from_values(_recorded_span(row).astype(np.float32))
+    model = ExponentialSmoothing()
+    model.fit(series)
+    return np.maximum(0.0, model.predict(horizon).values().ravel())
+
+
+# Per-SKU models; a model raising for a SKU falls back to ``_fallback_forecast``.
+SKU_MODELS: Dict[str, Callable[[np.ndarray, int], np.ndarray]] = {
+    "fallback": _sku_fallback,
+    "exponential_smoothing": _sku_exponential_smoothing,
+}
+
+# Worker-side names and shapes of the shared input/output blocks (set by _init_worker).
+_WORKER: Dict[str, object] = {}
+
+
+def _forecast_rows(
+    values: np.ndarray, out: np.ndarray, start: int, stop: int, model: str, horizon: int
+) -> int:
+    fn = SKU_MODELS[model]
+    fallbacks = 0
+    for i in range(start, stop):
+        try:
+            fc = np.asarray(fn(values[i], horizon), dtype=float)
+            if fc.shape != (horizon,) or not np.isfinite(fc).all():
+                raise ValueError("bad forecast shape/values")
+        except Exception:
+            fc = _sku_fallback(values[i], horizon)
+            fallbacks += 1
+        out[i] = fc
+    return fallbacks
+
+
+def _init_worker(
+    in_name: str, in_shape: Tuple[int, int], out_name: str, out_shape: Tuple[int, int], seed: int, cpu_only: bool
+) -> None:
+    os.environ["SEED"] = str(seed)
+    if cpu_only:
+        os.environ["CUDA_VISIBLE_DEVICES"] = ""
+    get_settings.cache_clear()
+    _WORKER.update(blocks=((in_name, in_shape), (out_name, out_shape)))
+
+
+def _run_shard(start: int, stop: int, model: str, horizon: int) -> int:
+    # Attach for this shard only; the mappings are closed before the result goes back
+    blocks: Tuple[Tuple[str, Tuple[int, int]], ...] = _WORKER["blocks"]  # type: ignore[assignment]
+    shms = [shared_memory.SharedMemory(name=name) for name, _ in blocks]
+    try:
+        values, out = (
+            np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+            for shm, (_, shape) in zip(shms, blocks)
+        )
+        try:
+            return _forecast_rows(values, out, start, stop, model, horizon)
+        finally:
+            del values, out  # views must go before close()
+    finally:
+        for shm in shms:
+            shm.close()
+
+
+def parallel_forecast(
+    matrix: DemandMatrix,
+    horizon: int,
+    model: str = "fallback",
+    n_workers: Optional[int] = None,
+    shards_per_worker: int = 4,
+) -> Tuple[np.ndarray, int]:
+    """Run a per-SKU model over all SKUs, sharded across a process pool.
+
+    Demand rows and forecasts live in shared memory so workers never receive
+    pickled frames. Returns ``(forecast[n_skus, horizon], n_fallbacks)``; the
+    result is identical to ``n_workers=1`` for a given SEED.
+    """
+    if model not in SKU_MODELS:
+        raise ValueError(f"Unknown per-SKU model: {model}")
+    settings = get_settings()
+    n_workers = max(1, int(n_workers or settings.N_WORKERS))
+    n_skus = matrix.shape[0]
+    out_shape = (n_skus, horizon)
+    if n_workers == 1 or n_skus < 2:
+        out = np.empty(out_shape)
+        return out, _forecast_rows(matrix.values, out, 0, n_skus, model, horizon)
+
+    values = np.ascontiguousarray(matrix.values, dtype=np.float64)
+    shm_in = shared_memory.SharedMemory(create=True, size=max(1, values.nbytes))
+    shm_out = shared_memory.SharedMemory(create=True, size=max(1, n_skus * horizon * 8))
+    try:
+        np.ndarray(values.shape, dtype=np.float64, buffer=shm_in.buf)[:] = values
+        bounds = np.linspace(0, n_skus, min(n_skus, n_workers * shards_per_worker) + 1).astype(int)
+        shards: List[Tuple[int, int]] = [(int(a), int(b)) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+        with ProcessPoolExecutor(
+            max_workers=n_workers,
+            mp_context=mp.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(shm_in.name, values.shape, shm_out.name, out_shape, settings.SEED, settings.CPU_ONLY),
+        ) as pool:
+            futures = [pool.submit(_run_shard, a, b, model, horizon) for a, b in shards]
+            fallbacks = sum(f.result() for f in futures)
+        out = np.ndarray(out_shape, dtype=np.float64, buffer=shm_out.buf).copy()
+    finally:
+        for shm in (shm_in, shm_out):
+            shm.close()
+            shm.unlink()
+    return out, fallbacks
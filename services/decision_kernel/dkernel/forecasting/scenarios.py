@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from dkernel.config import get_settings
+from dkernel.features.matrix import DemandMatrix
+from dkernel.forecasting.batch import MA_WINDOW
+
+
+def forecast_error_std(history: DemandMatrix, window: int = MA_WINDOW) -> np.ndarray:
+    """Per-SKU std of one-day-ahead errors of a trailing ``window``-day mean.
+
+    Days without a record count as zero demand; SKUs with fewer than two
+    scored days get zero.
+    """
+    values = np.nan_to_num(history.values)
+    n_skus, n_days = values.shape
+    if n_days <= window:
+        return np.zeros(n_skus)
+    cum = np.cumsum(values, axis=1, dtype=np.float64)
+    cum = np.concatenate([np.zeros((n_skus, 1)), cum], axis=1)
+    trailing = (cum[:, window:-1] - cum[:, :-window - 1]) / window
+    errors = values[:, window:] - trailing
+    if errors.shape[1] < 2:
+        return np.zeros(n_skus)
+    return errors.std(axis=1, ddof=1)
+
+
+@dataclass
+class DemandScenarios:
+    """Sampled daily demand, ``samples[i, t, k]`` for ``skus[i]`` on ``dates[t]`` in draw ``k``.
+
+    Stored as float32; horizon totals are accumulated in float64.
+    """
+
+    skus: np.ndarray
+    dates: pd.DatetimeIndex
+    samples: np.ndarray
+
+    @property
+    def shape(self):
+        return self.samples.shape
+
+    @property
+    def n_samples(self) -> int:
+        return int(self.samples.shape[2])
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.samples.nbytes)
+
+    def totals(self) -> np.ndarray:
+        """(n_skus, n_samples) demand summed over the horizon."""
+        return self.samples.sum(axis=1, dtype=np.float64)
+
+
+def gamma_samples(
+    mean: np.ndarray,
+    std: np.ndarray,
+    n_samples: int,
+    rng: Optional[np.random.Generator],
+    normals: Optional[np.ndarray] = None,
+    uniforms: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """float32 gamma draws with the given mean and std, shape ``mean.shape + (n_samples,)``.
+
+    Uses the Wilson-Hilferty cube of one normal draw per value, written in
+    place into the output; pass ``normals`` (same shape, float32) to reuse
+    fixed draws. The cube is biased for shapes k = (mean/std)^2 below 1
+    (intermittent, high-CV demand), so those values are drawn exactly: with
+    ``rng.gamma``, or with fixed draws as Gamma(k + 1) * U^(1/k) from the cube
+    and ``uniforms`` (same shape as ``normals``, required then). Entries with
+    zero mean or zero std stay at the mean.
+    """
+    mean = np.asarray(mean, dtype=np.float32)
+    std = np.broadcast_to(np.asarray(std, dtype=np.float32), mean.shape)
+    random = (mean > 0) & (std > 0)
+    # gamma shape k and scale theta with k * theta = mean, k * theta^2 = std^2
+    k = np.where(random, (mean / np.where(random, std, 1)) ** 2, 1).astype(np.float32)
+    theta = np.where(random, std**2 / np.where(random, mean, 1), 0).astype(np.float32)
+    low = random & (k < 1)
+    boost = normals is not None and bool(low.any())
+    if boost and uniforms is None:
+        raise ValueError("uniforms are required with normals when some std exceeds the mean")
+    # the cube's shape: k, or k + 1 where fixed draws are boosted
+    k_cube = np.where(low, k + 1, k) if boost else k
+
+    if normals is None:
+        samples = np.empty(mean.shape + (int(n_samples),), dtype=np.float32)
+        rng.standard_normal(size=samples.shape, dtype=np.float32, out=samples)
+    else:
+        samples = np.array(normals, dtype=np.float32)
+    # X = k * theta * (1 - 1/(9k) + z / (3 sqrt(k)))^3
+    samples *= (1.0 / (3.0 * np.sqrt(k_cube)))[..., None]
+    samples += (1.0 - 1.0 / (9.0 * k_cube))[..., None]
+    np.maximum(samples, 0.0, out=samples)
+    samples **= 3
+    samples *= (k_cube * theta)[..., None]
+    samples += np.where(random, 0, mean)[..., None]
+    if boost:
+        samples[low] *= np.asarray(uniforms, dtype=np.float32)[low] ** (1.0 / k[low])[:, None]
+    elif low.any():
+        draws = rng.gamma(k[low][:, None], theta[low][:, None], size=(int(low.sum()), samples.shape[-1]))
+        samples[low] = draws
+    return samples
+
+
+def sample_scenarios(
+    forecast: DemandMatrix, error_std: np.ndarray, n_samples: int, seed: Optional[int] = None
+) -> DemandScenarios:
+    """Draw ``n_samples`` demand paths around a point forecast in one vectorized call.
+
+    Each SKU-day is gamma distributed with the forecast as mean and the SKU's
+    daily ``error_std`` as std (non-negative and right-skewed, like demand);
+    SKU-days with zero mean or zero error stay at the point forecast (see
+    :func:`gamma_samples`).
+    """
+    mean = np.nan_to_num(forecast.values).astype(np.float32)
+    std = np.broadcast_to(np.asarray(error_std, dtype=np.float32)[:, None], mean.shape)
+    rng = np.random.default_rng(get_settings().SEED if seed is None else seed)
+    samples = gamma_samples(mean, std, n_samples, rng)
+    return DemandScenarios(skus=forecast.skus, dates=forecast.dates, samples=samples)
+
+
+def scenarios_for(
+    forecast: DemandMatrix, history: DemandMatrix, n_samples: int, seed: Optional[int] = None
+) -> DemandScenarios:
+    """Sample around ``forecast`` with error std measured on ``history`` (zero for unseen SKUs)."""
+    std = np.zeros(forecast.shape[0])
+    pos = pd.Index(history.skus).get_indexer(forecast.skus)
+    std[pos >= 0] = forecast_error_std(history)[pos[pos >= 0]]
+    return sample_scenarios(forecast, std, n_samples, seed)
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from dkernel.features.matrix import DemandMatrix
+from dkernel.features.offerbook import OfferBook
+from dkernel.forecasting.scenarios import forecast_error_std
+
+NET_COLUMNS = ["sku", "lead_time_days", "lead_time_demand", "safety_stock", "on_hand", "net_qty"]
+
+
+def _forecast_grid(forecast: pd.DataFrame | DemandMatrix) -> DemandMatrix:
+    if isinstance(forecast, DemandMatrix):
+        return forecast
+    return DemandMatrix.from_long(forecast, value_col="forecast_qty")
+
+
+def lead_time_demand(values: np.ndarray, lead_time: np.ndarray) -> np.ndarray:
+    """Forecast summed over each SKU's first ``lead_time`` days.
+
+    Lead times beyond the horizon extend the horizon's mean daily rate.
+    """
+    values = np.nan_to_num(values)
+    n_skus, horizon = values.shape
+    lead_time = np.maximum(np.asarray(lead_time, dtype=np.int64), 0)
+    if horizon == 0:
+        return np.zeros(n_skus)
+    cum = np.cumsum(values, axis=1)
+    within = np.minimum(lead_time, horizon)
+    covered = np.where(within > 0, cum[np.arange(n_skus), np.maximum(within - 1, 0)], 0.0)
+    rate = cum[:, -1] / horizon
+    return covered + rate * (lead_time - within)
+
+
+def service_z(service_target: float) -> float:
+    """Standard normal quantile for a cycle service target (clipped to [0.5, 0.9999])."""
+    from scipy.stats import norm
+
+    return float(norm.ppf(min(max(service_target, 0.5), 0.9999)))
+
+
+def net_requirements(
+    forecast: pd.DataFrame | DemandMatrix,
+    inventory: pd.DataFrame,
+    offers: pd.DataFrame | OfferBook,
+    service_target: float = 0.97,
+    safety: str = "inventory",
+    history: Optional[DemandMatrix] = None,
+    review_days: int = 0,
+) -> pd.DataFrame:
+    """Net requirement per SKU: demand over lead time + safety stock - on hand.
+
+    Lead time is that of the SKU's cheapest offer (what the allocator buys)
+    plus ``review_days``. ``safety="inventory"`` takes ``safety_stock`` from
+    the inventory table; ``safety="dynamic"`` derives ``z * sigma * sqrt(L)``
+    from ``history`` forecast errors and ``service_target``. Returns
+    ``NET_COLUMNS`` for every forecast or stocked SKU, ``net_qty >= 0``.
+    """
+    grid = _forecast_grid(forecast)
+    inv = inventory.drop_duplicates("sku", keep="last").set_index("sku")
+    skus = pd.Index(grid.skus).union(pd.Index(inv.index), sort=True)
+    n = len(skus)
+
+    values = np.zeros((n, grid.shape[1]))
+    values[skus.get_indexer(grid.skus)] = np.nan_to_num(grid.values)
+    book = OfferBook.of(offers)
+    best = book.cheapest(skus)
+    lead = np.where(best >= 0, book.lead_time[np.maximum(best, 0)] if book.n_offers else 0, 0).astype(np.int64)
+    lead = lead + int(review_days)
+    demand = lead_time_demand(values, lead)
+    on_hand = inv["on_hand"].reindex(skus).fillna(0).to_numpy(dtype=float)
+
+    if safety == "inventory":
+        safety_stock = inv["safety_stock"].reindex(skus).fillna(0).to_numpy(dtype=float)
+    elif safety == "dynamic":
+        if history is None:
+            raise ValueError("Dynamic safety stock needs demand history")
+        sigma = np.zeros(n)
+        sigma[skus.get_indexer(history.skus)] = forecast_error_std(history)
+        safety_stock = service_z(service_target) * sigma * np.sqrt(lead)
+    elif safety == "none":
+        safety_stock = np.zeros(n)
+    else:
+        raise ValueError(f"Unknown safety stock mode: {safety}")
+
+    return pd.DataFrame(
+        {
+            "sku": skus.to_numpy(),
+            "lead_time_days": lead,
+            "lead_time_demand": demand,
+            "safety_stock": safety_stock,
+            "on_hand": on_hand,
+            "net_qty": np.maximum(0.0, demand + safety_stock - on_hand),
+        },
+        columns=NET_COLUMNS,
+    )
+
+
+def requirements_frame(net: pd.DataFrame) -> pd.DataFrame:
+    """SKUs with a positive net requirement, shaped like a forecast for ``optimize_plan``.
+
+    Safety stock already covers the service target, so plan these with
+    ``service_target=1.0``.
+    """
+    need = net[net["net_qty"] > 0]
+    return pd.DataFrame({"sku": need["sku"].to_numpy(), "forecast_qty": need["net_qty"].to_numpy()})
+
+
+def netting_summary(net: pd.DataFrame, forecast: pd.DataFrame | DemandMatrix) -> Dict[str, float]:
+    grid = _forecast_grid(forecast)
+    return {
+        "skus": int(len(net)),
+        "skus_to_order": int((net["net_qty"] > 0).sum()),
+        "gross_qty": round(float(np.nansum(grid.values)), 2),
+        "net_qty": round(float(net["net_qty"].sum()), 2),
+    }
@@ -0,0 +1,263 @@
+from __future__ import annotations
+
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from dkernel.config import get_settings
+from dkernel.features.offerbook import OfferBook
+from dkernel.optimization.milp import AllocationProblem
+
+# Flat problem arrays shared with shard workers, in this order
+_FIELDS = ("need", "offer_sku", "price", "moq", "cap")
+# Worker-side names, shapes and dtypes of the shared problem arrays (set by _init_worker)
+_WORKER: Dict[str, object] = {}
+
+
+def shard_problem(
+    problem: AllocationProblem,
+    n_shards: int,
+    shard_by: str = "hash",
+    offers: Optional[pd.DataFrame | OfferBook] = None,
+) -> Tuple[AllocationProblem, np.ndarray]:
+    """Reorder ``problem`` so each shard is a contiguous SKU range.
+
+    ``shard_by="hash"`` buckets SKUs by a stable hash; any other value names
+    an ``offers`` column (e.g. a category) whose value on the SKU's cheapest
+    offer picks the shard. Returns the reordered problem and SKU bounds ``[0, ..., n_skus]``.
+    """
+    n_skus = len(problem.need)
+    if shard_by == "hash":
+        key = (pd.util.hash_array(problem.skus.astype(object)) % np.uint64(max(1, n_shards))).astype(np.int64)
+    else:
+        try:
+            book = OfferBook.of(offers) if offers is not None else None
+            values = book.column(shard_by) if book is not None else None
+        except KeyError:
+            values = None
+        if values is None:
+            raise ValueError(f"Cannot shard by missing offers column: {shard_by}")
+        key = pd.factorize(values[book.cheapest(problem.skus)])[0]
+    order = np.argsort(key, kind="stable")
+    rank = np.empty(n_skus, dtype=np.int64)
+    rank[order] = np.arange(n_skus)
+    offer_sku = rank[problem.offer_sku]
+    offer_order = np.argsort(offer_sku, kind="stable")
+    reordered = AllocationProblem(
+        skus=problem.skus[order],
+        need=problem.need[order],
+        offer_sku=offer_sku[offer_order],
+        supplier=problem.supplier[offer_order],
+        price=problem.price[offer_order],
+        moq=problem.moq[offer_order],
+        lead_time=problem.lead_time[offer_order],
+    )
+    sorted_key = key[order]
+    bounds = np.flatnonzero(np.r_[True, sorted_key[1:] != sorted_key[:-1], True]) if n_skus else np.array([0])
+    return reordered, bounds
+
+
+def price_out(
+    need: np.ndarray, offer_sku: np.ndarray, price: np.ndarray, moq: np.ndarray, cap: np.ndarray, lam: float
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Best offer and quantity per SKU for ``max fill - lam * cost`` with no budget.
+
+    ``offer_sku`` must be sorted and local to the arrays passed (SKU ``0..``).
+    Value is linear in quantity below and above ``need``, so only ``moq`` and
+    ``cap`` are candidates. Returns offer positions and quantities of the
+    SKUs worth buying.
+    """
+    if not len(price):
+        return np.zeros(0, dtype=np.int64), np.zeros(0)
+    sku_need = need[offer_sku]
+    value_cap = np.minimum(cap / sku_need, 1.0) - lam * price * cap
+    value_moq = np.minimum(moq / sku_need, 1.0) - lam * price * moq
+    use_moq = value_moq > value_cap
+    value = np.where(use_moq, value_moq, value_cap)
+    qty = np.where(use_moq, moq, cap)
+    # best offer per SKU (offers are grouped by SKU): highest value, ties to the earlier offer
+    starts = np.flatnonzero(np.r_[True, offer_sku[1:] != offer_sku[:-1]])
+    best = np.maximum.reduceat(value, starts)
+    at_best = np.flatnonzero(value == np.repeat(best, np.diff(np.r_[starts, len(value)])))
+    first = at_best[np.r_[True, offer_sku[at_best][1:] != offer_sku[at_best][:-1]]]
+    pick = first[value[first] > 0]
+    return pick, qty[pick]
+
+
+def _shard_arrays(arrays: Dict[str, np.ndarray], lo_sku: int, hi_sku: int):
+    offer_sku = arrays["offer_sku"]
+    a, b = np.searchsorted(offer_sku, [lo_sku, hi_sku])
+    return a, (
+        arrays["need"][lo_sku:hi_sku],
+        offer_sku[a:b] - lo_sku,
+        arrays["price"][a:b],
+        arrays["moq"][a:b],
+        arrays["cap"][a:b],
+    )
+
+
+def _solve_shard(arrays: Dict[str, np.ndarray], lo_sku: int, hi_sku: int, lam: float, detail: bool):
+    a, local = _shard_arrays(arrays, lo_sku, hi_sku)
+    pick, qty = price_out(*local, lam)
+    need, offer_sku, price = local[0], local[1], local[2]
+    cost = float((qty * price[pick]).sum())
+    fill = float(np.minimum(qty / need[offer_sku[pick]], 1.0).sum())
+    if detail:
+        return cost, fill, pick + a, qty
+    return cost, fill
+
+
+def _init_worker(spec: Dict[str, Tuple[str, Tuple[int, ...], str]]) -> None:
+    _WORKER.update(spec=spec)
+
+
+def _run_shard(lo_sku: int, hi_sku: int, lam: float, detail: bool):
+    # Attach for this shard only; the mappings are closed before the result goes back
+    spec: Dict[str, Tuple[str, Tuple[int, ...], str]] = _WORKER["spec"]  # type: ignore[assignment]
+    shms = {name: shared_memory.SharedMemory(name=shm_name) for name, (shm_name, _, _) in spec.items()}
+    try:
+        arrays = {
+            name: np.ndarray(shape, dtype=dtype, buffer=shms[name].buf)
+            for name, (_, shape, dtype) in spec.items()
+        }
+        try:
+            return _solve_shard(arrays, lo_sku, hi_sku, lam, detail)
+        finally:
+            del arrays  # views must go before close()
+    finally:
+        for shm in shms.values():
+            shm.close()
+
+
+class _ShardRunner:
+    """Evaluate all shards at a given multiplier, serially or on a process pool."""
+
+    def __init__(self, problem: AllocationProblem, bounds: np.ndarray, n_workers: int):
+        self.shards = [(int(a), int(b)) for a, b in zip(bounds[:-1], bounds[1:])]
+        self.arrays = {
+            "need": problem.need,
+            "offer_sku": problem.offer_sku.astype(np.int64),
+            "price": problem.price,
+            "moq": problem.moq,
+            "cap": problem.cap,
+        }
+        self.pool: Optional[ProcessPoolExecutor] = None
+        self.shm: List[shared_memory.SharedMemory] = []
+        if n_workers > 1 and len(self.shards) > 1:
+            try:
+                spec = {}
+                for name in _FIELDS:
+                    arr = np.ascontiguousarray(self.arrays[name])
+                    shm = shared_memory.SharedMemory(create=True, size=max(1, arr.nbytes))
+                    self.shm.append(shm)
+                    np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)[:] = arr
+                    spec[name] = (shm.name, arr.shape, arr.dtype.str)
+                self.pool = ProcessPoolExecutor(
+                    max_workers=n_workers,
+                    mp_context=mp.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(spec,),
+                )
+            except BaseException:
+                # Do not leak the segments created before the failure
+                self.close()
+                raise
+
+    def run(self, lam: float, detail: bool = False) -> list:
+        if self.pool is None:
+            return [_solve_shard(self.arrays, a, b, lam, detail) for a, b in self.shards]
+        futures = [self.pool.submit(_run_shard, a, b, lam, detail) for a, b in self.shards]
+        return [f.result() for f in futures]
+
+    def close(self) -> None:
+        if self.pool is not None:
+            self.pool.shutdown()
+        for shm in self.shm:
+            shm.close()
+            shm.unlink()
+
+
+def decomposed_allocate(
+    forecast: pd.DataFrame,
+    offers: pd.DataFrame | OfferBook,
+    service_target: float,
+    budget: float,
+    max_lead_time: Optional[int] = None,
+    n_shards: int = 8,
+    shard_by: str = "hash",
+    n_workers: Optional[int] = None,
+    max_iter: int = 40,
+    tol: float = 1e-4,
+) -> Tuple[pd.DataFrame, Dict[str, object]]:
+    """Maximize mean fill within budget by pricing the budget constraint.
+
+    Relaxing ``cost <= budget`` with a multiplier ``lam`` splits the problem
+    into independent per-SKU choices, solved shard by shard (on a process
+    pool over shared memory when ``n_workers > 1``). The coordinator bisects
+    ``lam`` geometrically until the merged spend fits the budget within
+    ``tol`` (relative), then returns the feasible side of the bracket.
+    """
+    book = OfferBook.of(offers)
+    problem = AllocationProblem.build(forecast, book, service_target, max_lead_time)
+    problem, bounds = shard_problem(problem, n_shards, shard_by, book)
+    n_workers = max(1, int(n_workers or get_settings().N_WORKERS))
+    runner = _ShardRunner(problem, bounds, n_workers)
+    history = []
+    try:
+
+        def evaluate(lam: float) -> float:
+            results = runner.run(lam)
+            cost = sum(r[0] for r in results)
+            service = sum(r[1] for r in results) / max(1, len(problem.need))
+            history.append({"lambda": lam, "cost": round(cost, 2), "service": round(service, 4)})
+            return cost
+
+        lo, hi = 0.0, 0.0
+        converged = True
+        unit_cost = problem.need[problem.offer_sku] * problem.price
+        if len(problem.need) and (unit_cost > 0).any() and evaluate(0.0) > budget:
+            # Above hi no priced offer has positive value: fill per pound is at most
+            # 1 / (need * price); free offers are taken at any multiplier
+            hi = float((1.0 / unit_cost[unit_cost > 0]).max()) * 1.01
+            lo = hi * 1e-12
+            converged = False
+            for _ in range(max_iter):
+                mid = float(np.sqrt(lo * hi))
+                if evaluate(mid) > budget:
+                    lo = mid
+                else:
+                    hi = mid
+                if (hi - lo) <= tol * hi:
+                    converged = True
+                    break
+        results = runner.run(hi, detail=True)
+    finally:
+        runner.close()
+
+    pick = np.concatenate([r[2] for r in results]) if results else np.zeros(0, dtype=np.int64)
+    qty = np.concatenate([r[3] for r in results]) if results else np.zeros(0)
+    allocation = problem.allocation(pick, qty).sort_values("sku", kind="stable").reset_index(drop=True)
+    total_cost = float(allocation["cost"].sum())
+    summary = {
+        "total_cost": float(round(total_cost, 2)),
+        "within_budget": bool(total_cost <= budget + 1e-6),
+        "budget": float(budget),
+        "service_target": float(service_target),
+        "method": "decomposed",
+        "expected_service": round(problem.service(pick, qty), 4),
+        "convergence": {
+            "converged": converged,
+            "iterations": len(history),
+            "lambda": hi,
+            "lambda_bracket": [lo, hi],
+            "shards": len(bounds) - 1,
+            "workers": n_workers,
+            "unspent": round(float(budget) - total_cost, 2),
+            "history": history,
+        },
+    }
+    return allocation, summary
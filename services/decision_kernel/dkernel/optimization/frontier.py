@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from dkernel.features.offerbook import OfferBook
+from dkernel.optimization.milp import AllocationProblem, budget_greedy
+
+
+@dataclass
+class Frontier:
+    """Budget/service tradeoff of filling SKUs in increasing full-fill cost.
+
+    Filling one unit of SKU ``i`` buys ``1 / need_i`` of mean fill for
+    ``price_i``, so the best fill per pound comes from the SKU whose cheapest
+    full fill costs least. Sorting once by that cost is the whole parametric
+    solve: every budget point is a prefix of the order plus one partial fill
+    (at least MOQ) of the next SKU, found by binary search on the cumulative
+    spend. Service here is mean fill of forecast demand, as in
+    ``AllocationProblem.service``.
+    """
+
+    fill_cost: np.ndarray  # full-fill cost per SKU, ascending
+    spent: np.ndarray  # cumulative fill_cost
+    price: np.ndarray
+    moq: np.ndarray
+    need: np.ndarray
+    problem: Optional[AllocationProblem] = None
+
+    @classmethod
+    def from_problem(cls, problem: AllocationProblem) -> "Frontier":
+        first = problem.cheapest_fill()
+        qty = problem.cap[first]
+        cost = qty * problem.price[first]
+        order = np.argsort(cost, kind="stable")
+        return cls(
+            fill_cost=cost[order],
+            spent=np.cumsum(cost[order]),
+            price=problem.price[first][order],
+            moq=problem.moq[first][order],
+            need=problem.need[problem.offer_sku[first]][order],
+            problem=problem,
+        )
+
+    @property
+    def n_skus(self) -> int:
+        return len(self.need)
+
+    @property
+    def max_cost(self) -> float:
+        return float(self.spent[-1]) if self.n_skus else 0.0
+
+    def _prefix(self, budgets: np.ndarray):
+        k = np.searchsorted(self.spent, budgets, side="right")
+        base = np.where(k > 0, self.spent[np.maximum(k - 1, 0)], 0.0) if self.n_skus else np.zeros(len(budgets))
+        return k, base
+
+    def evaluate(self, budgets) -> pd.DataFrame:
+        """Cost actually spent and mean fill reached for each budget."""
+        budgets = np.atleast_1d(np.asarray(budgets, dtype=float))
+        if not self.n_skus:
+            return pd.DataFrame({"budget": budgets, "cost": 0.0, "service": 0.0})
+        k, base = self._prefix(budgets)
+        nxt = np.minimum(k, self.n_skus - 1)
+        partial = np.floor((budgets - base) / self.price[nxt])
+        partial = np.where((k < self.n_skus) & (partial >= self.moq[nxt]) & (partial > 0), partial, 0.0)
+        fill = k + np.minimum(partial / self.need[nxt], 1.0)
+        return pd.DataFrame(
+            {
+                "budget": budgets,
+                "cost": base + partial * self.price[nxt],
+                "service": fill / self.n_skus,
+            }
+        )
+
+    def cost_for(self, services) -> pd.DataFrame:
+        """Cheapest spend reaching each target mean fill (capped at full fill)."""
+        services = np.clip(np.atleast_1d(np.asarray(services, dtype=float)), 0.0, 1.0)
+        if not self.n_skus:
+            return pd.DataFrame({"budget": 0.0, "cost": 0.0, "service": np.zeros(len(services))})
+        units = services * self.n_skus
+        k = np.floor(units + 1e-9).astype(int)
+        base = np.where(k > 0, self.spent[np.maximum(k - 1, 0)], 0.0)
+        nxt = np.minimum(k, self.n_skus - 1)
+        rest = np.where(k < self.n_skus, units - k, 0.0)
+        qty = np.where(rest > 1e-9, np.maximum(self.moq[nxt], np.ceil(rest * self.need[nxt])), 0.0)
+        cost = base + qty * self.price[nxt]
+        return self.evaluate(cost)
+
+    def allocation_at(self, budget: float) -> pd.DataFrame:
+        """The allocation behind ``evaluate([budget])``."""
+        if self.problem is None:
+            raise ValueError("Frontier was built without its allocation problem")
+        return self.problem.allocation(*budget_greedy(self.problem, budget))
+
+    def points(self, n_points: int = 50) -> pd.DataFrame:
+        """Evenly spaced budgets from zero to the cost of serving every SKU."""
+        return self.evaluate(np.linspace(0.0, self.max_cost, max(2, n_points)))
+
+
+def compute_frontier(
+    forecast: pd.DataFrame, offers: pd.DataFrame | OfferBook, max_lead_time: Optional[int] = None
+) -> Frontier:
+    return Frontier.from_problem(AllocationProblem.build(forecast, offers, 1.0, max_lead_time))
+
+
+def option_points(frontier: Frontier, budget: float, service_target: float) -> pd.DataFrame:
+    """Cost-focused, balanced and quality-focused points off ``frontier``.
+
+    Balanced is the cheapest point meeting ``service_target``, or the point
+    reached at ``budget`` when the target costs more than that. The other two
+    shift the target by -3/+2 points and report what that really costs.
+    """
+    targets = np.array([service_target - 0.03, service_target, min(1.0, service_target + 0.02)])
+    pts = frontier.cost_for(targets)
+    at_budget = frontier.evaluate([budget]).iloc[0]
+    if pts["cost"].iloc[1] > budget:
+        pts.iloc[1] = at_budget
+        pts.iloc[0] = frontier.evaluate([min(pts["cost"].iloc[0], budget)]).iloc[0]
+    return pts
+
+
+def frontier_options(frontier: Frontier, budget: float, service_target: float) -> List[Dict[str, object]]:
+    """Plan options (``build_plan`` schema) for :func:`option_points`."""
+    pts = option_points(frontier, budget, service_target)
+    names = [
+        ("cost-focused", "Minimize spend with acceptable service compromise.", "Lower cost but higher stockout risk."),
+        ("balanced", "Balance cost and service near target.", "Meets target with moderate spend."),
+        ("quality-focused", "Maximize service, accept higher spend.", "Higher cost to reduce stockouts."),
+    ]
+    options = []
+    for (name, description, tradeoffs), row in zip(names, pts.itertuples(index=False)):
+        options.append(
+            {
+                "name": name,
+                "description": description,
+                "estimated_monthly_cost": round(float(row.cost), 2),
+                "expected_service_level": round(float(row.service), 4),
+                "tradeoffs": tradeoffs,
+            }
+        )
+    return options
@@ -0,0 +1,299 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from dkernel.features.offerbook import OfferBook
+
+# Objective weight of spend relative to service, so cheaper plans win ties
+COST_TIEBREAK = 1e-7
+
+
+@dataclass
+class AllocationProblem:
+    """Flattened SKU/offer arrays for a budgeted allocation.
+
+    Offers are grouped by SKU: ``offer_sku[j]`` is the SKU position of offer ``j``.
+    ``need[i]`` is demand scaled by the service target; ``cap[j]`` the most
+    offer ``j`` would ever buy (``max(moq, ceil(need))``).
+    """
+
+    skus: np.ndarray
+    need: np.ndarray
+    offer_sku: np.ndarray
+    supplier: np.ndarray
+    price: np.ndarray
+    moq: np.ndarray
+    lead_time: np.ndarray
+
+    @property
+    def cap(self) -> np.ndarray:
+        return np.maximum(self.moq, np.ceil(self.need[self.offer_sku]))
+
+    @classmethod
+    def build(
+        cls,
+        forecast: pd.DataFrame,
+        offers: pd.DataFrame | OfferBook,
+        service_target: float,
+        max_lead_time: Optional[int] = None,
+    ) -> "AllocationProblem":
+        demand = forecast.groupby("sku")["forecast_qty"].sum() * service_target
+        demand = demand[demand > 0]
+        book = OfferBook.of(offers)
+        rows, owner = book.expand(book.sku_positions(demand.index))
+        if max_lead_time is not None:
+            fast = book.lead_time[rows] <= max_lead_time
+            rows, owner = rows[fast], owner[fast]
+        has_offer = np.bincount(owner, minlength=len(demand)) > 0
+        # renumber the SKUs that kept an offer (owner is non-decreasing)
+        offer_sku = (np.cumsum(has_offer) - 1)[owner]
+        demand = demand[has_offer]
+        return cls(
+            skus=demand.index.to_numpy(),
+            need=demand.to_numpy(dtype=float),
+            offer_sku=offer_sku,
+            supplier=book.suppliers[book.supplier_id[rows]],
+            price=book.price[rows],
+            moq=book.moq[rows],
+            lead_time=book.lead_time[rows].astype(int),
+        )
+
+    def cheapest_fill(self) -> np.ndarray:
+        """Per SKU, the offer position with the lowest cost of buying ``cap``."""
+        cost = self.cap * self.price
+        order = np.lexsort((cost, self.offer_sku))
+        sorted_sku = self.offer_sku[order]
+        return order[np.r_[True, sorted_sku[1:] != sorted_sku[:-1]]]
+
+    def allocation(self, pick: np.ndarray, qty: np.ndarray) -> pd.DataFrame:
+        """Allocation frame for chosen offer positions ``pick`` and quantities ``qty``."""
+        order = np.argsort(self.offer_sku[pick], kind="stable")
+        pick, qty = pick[order], qty[order]
+        return pd.DataFrame(
+            {
+                "sku": self.skus[self.offer_sku[pick]],
+                "supplier": self.supplier[pick],
+                "price": self.price[pick],
+                "qty": qty,
+                "cost": qty * self.price[pick],
+                "lead_time_days": self.lead_time[pick],
+            }
+        )
+
+    def service(self, pick: np.ndarray, qty: np.ndarray) -> float:
+        """Mean per-SKU fill of ``need`` (the MILP objective, without the cost term)."""
+        if not len(self.need):
+            return 0.0
+        filled = np.zeros(len(self.need))
+        np.add.at(filled, self.offer_sku[pick], qty)
+        return float(np.minimum(filled / self.need, 1.0).mean())
+
+
+def budget_greedy(problem: AllocationProblem, budget: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Feasible incumbent: cheapest full fill per SKU, cheapest SKUs first until the budget runs out.
+
+    Leftover budget buys a partial fill (at least MOQ) of the first SKU that no longer fits.
+    """
+    first = problem.cheapest_fill()
+    qty = problem.cap[first]
+    cost = qty * problem.price[first]
+    order = np.argsort(cost, kind="stable")
+    spent = np.cumsum(cost[order])
+    n_fit = int(np.searchsorted(spent, budget, side="right"))
+    chosen, qty_chosen = order[:n_fit], qty[order[:n_fit]]
+    left = budget - (spent[n_fit - 1] if n_fit else 0.0)
+    if n_fit < len(order):
+        k = order[n_fit]
+        partial = np.floor(left / problem.price[first[k]])
+        if partial >= problem.moq[first[k]] and partial > 0:
+            chosen, qty_chosen = np.r_[chosen, k], np.r_[qty_chosen, partial]
+    return first[chosen], qty_chosen
+
+
+def repair_budget(
+    problem: AllocationProblem, pick: np.ndarray, qty: np.ndarray, budget: float
+) -> Tuple[np.ndarray, np.ndarray, bool]:
+    """Trim a plan back within ``budget`` (e.g. after rounding solver quantities).
+
+    Picks are cut dearest unit price first: each is floored to the quantity
+    the remaining excess allows, kept at MOQ or above, or dropped. Returns
+    ``(pick, qty, repaired)``.
+    """
+    qty = qty.astype(float).copy()
+    excess = float(qty @ problem.price[pick]) - budget
+    if excess <= 1e-6:
+        return pick, qty, False
+    for k in np.argsort(-problem.price[pick], kind="stable"):
+        price, moq = problem.price[pick[k]], problem.moq[pick[k]]
+        cut = np.ceil(excess / price) if price > 0 else 0.0
+        new = qty[k] - cut if qty[k] - cut >= max(moq, 1) else 0.0
+        excess -= (qty[k] - new) * price
+        qty[k] = new
+        if excess <= 1e-6:
+            break
+    keep = qty > 0
+    return pick[keep], qty[keep], True
+
+
+def _matrices(p: AllocationProblem, budget: float):
+    """Sparse constraint system over x = [y (offers), q (offers), f (skus)]."""
+    n_off, n_sku = len(p.price), len(p.need)
+    j = np.arange(n_off)
+    i = np.arange(n_sku)
+    y, q, f = j, n_off + j, 2 * n_off + i
+    rows, cols, vals = [], [], []
+
+    def add(r, c, v):
+        rows.append(r)
+        cols.append(c)
+        vals.append(np.broadcast_to(v, np.shape(r)).astype(float))
+
+    # q_j - moq_j y_j >= 0 and q_j - cap_j y_j <= 0
+    add(j, q, 1.0), add(j, y, -p.moq)
+    add(n_off + j, q, 1.0), add(n_off + j, y, -p.cap)
+    # at most one supplier per SKU: sum_j y_j <= 1
+    add(2 * n_off + p.offer_sku, y, 1.0)
+    # fill bounded by bought: f_i - sum_j q_j <= 0
+    add(2 * n_off + n_sku + i, f, 1.0), add(2 * n_off + n_sku + p.offer_sku, q, -1.0)
+    # budget: sum_j price_j q_j <= B
+    add(np.full(n_off, 2 * n_off + 2 * n_sku), q, p.price)
+
+    n_rows = 2 * n_off + 2 * n_sku + 1
+    A = sparse.csr_matrix(
+        (np.concatenate(vals), (np.concatenate(rows), np.concatenate(cols))),
+        shape=(n_rows, 2 * n_off + n_sku),
+    )
+    lb = np.concatenate([np.zeros(n_off), np.full(n_off, -np.inf), np.full(n_sku, -np.inf), np.full(n_sku, -np.inf), [-np.inf]])
+    ub = np.concatenate([np.full(n_off, np.inf), np.zeros(n_off), np.ones(n_sku), np.zeros(n_sku), [budget]])
+    # maximize sum_i f_i / need_i - eps * cost  ->  minimize the negation
+    c = np.concatenate([np.zeros(n_off), COST_TIEBREAK * p.price, -1.0 / p.need])
+    x_lb = np.zeros(2 * n_off + n_sku)
+    x_ub = np.concatenate([np.ones(n_off), p.cap, p.need])
+    integral = np.concatenate([np.ones(2 * n_off, dtype=bool), np.zeros(n_sku, dtype=bool)])
+    return c, A, lb, ub, x_lb, x_ub, integral
+
+
+def _solve_scipy(p: AllocationProblem, budget: float, time_limit: float):
+    from scipy.optimize import Bounds, LinearConstraint, milp
+
+    c, A, lb, ub, x_lb, x_ub, integral = _matrices(p, budget)
+    res = milp(
+        c,
+        constraints=LinearConstraint(A, lb, ub),
+        integrality=integral.astype(int),
+        bounds=Bounds(x_lb, x_ub),
+        options={"time_limit": time_limit},
+    )
+    return res.x, {0: "optimal", 1: "time_limit"}.get(res.status, f"status_{res.status}")
+
+
+def _solve_ortools(
+    p: AllocationProblem,
+    budget: float,
+    time_limit: float,
+    hint: Optional[Tuple[np.ndarray, np.ndarray]] = None,
+):
+    """Solve with SCIP through OR-Tools' model builder, warm-started from ``hint``.
+
+    Columns, bounds, objective and constraints are loaded in one bulk call.
+    The model builder (9.x) has no array form for integrality or hints, so
+    the y/q block costs one native call per integer variable and the hint
+    (a ``(pick, qty)`` plan such as :func:`budget_greedy`'s) two per picked
+    offer, setting only its y/q values (SCIP completes partial hints). Both
+    are bounded by ``Settings.MILP_MAX_SKUS``, above which
+    ``optimize_plan`` does not use this solver (about 4 ms at the default).
+    """
+    from ortools.linear_solver.python import model_builder as mb  # type: ignore
+
+    c, A, lb, ub, x_lb, x_ub, integral = _matrices(p, budget)
+    model = mb.Model()
+    helper = model.helper
+    helper.fill_model_from_sparse_data(x_lb, x_ub, c, lb, ub, A)
+    for k in np.flatnonzero(integral).tolist():
+        helper.set_var_integrality(k, True)
+    if hint is not None:
+        n_off = len(p.price)
+        for j, q in zip(*(np.asarray(a).tolist() for a in hint)):
+            helper.add_hint(j, 1.0)
+            helper.add_hint(n_off + j, q)
+    solver = mb.Solver("SCIP")
+    solver.set_time_limit_in_seconds(time_limit)
+    status = solver.solve(model)
+    if status not in (mb.SolveStatus.OPTIMAL, mb.SolveStatus.FEASIBLE):
+        return None, status.name.lower()
+    x = solver.values(model.get_variables()).to_numpy(dtype=float)
+    return x, "optimal" if status == mb.SolveStatus.OPTIMAL else "time_limit"
+
+
+def _has_ortools() -> bool:
+    try:
+        from ortools.linear_solver.python import model_builder  # noqa: F401  # type: ignore
+    except Exception:
+        return False
+    return True
+
+
+def milp_allocate(
+    forecast: pd.DataFrame,
+    offers: pd.DataFrame | OfferBook,
+    service_target: float,
+    budget: float,
+    max_lead_time: Optional[int] = None,
+    time_limit: float = 10.0,
+    solver: str = "auto",
+) -> Tuple[pd.DataFrame, Dict[str, object]]:
+    """Choose one supplier and a quantity per SKU to maximize mean fill within budget.
+
+    Solves with OR-Tools (SCIP), warm-started from the greedy plan, when
+    installed, else ``scipy.optimize.milp`` (which takes no warm start). On
+    timeout the solver's best incumbent is returned, unless the
+    budget-feasible greedy plan serves better or the solver has none.
+    Rounded solver quantities that overshoot the budget are trimmed back
+    (:func:`repair_budget`) and the status gains ``+repaired``.
+    """
+    problem = AllocationProblem.build(forecast, offers, service_target, max_lead_time)
+    incumbent = budget_greedy(problem, budget)
+    if solver == "auto":
+        solver = "ortools" if _has_ortools() else "scipy"
+    x, status = None, "empty"
+    if len(problem.need):
+        if solver == "ortools":
+            x, status = _solve_ortools(problem, budget, time_limit, hint=incumbent)
+        elif solver == "scipy":
+            x, status = _solve_scipy(problem, budget, time_limit)
+        else:
+            raise ValueError(f"Unknown solver: {solver}")
+
+    n_off = len(problem.price)
+    pick, qty = incumbent
+    if x is not None:
+        q = np.round(x[n_off : 2 * n_off])
+        sol_pick = np.flatnonzero((np.round(x[:n_off]) > 0.5) & (q > 0))
+        sol_pick, sol_qty, repaired = repair_budget(problem, sol_pick, q[sol_pick], budget)
+        if repaired:
+            status = f"{status}+repaired"
+        # A timed-out solve may still trail the greedy incumbent; keep the better plan
+        if problem.service(sol_pick, sol_qty) >= problem.service(pick, qty):
+            pick, qty = sol_pick, sol_qty
+        else:
+            status = f"{status}+greedy"
+    elif len(problem.need):
+        status = f"{status}+greedy"
+    allocation = problem.allocation(pick, qty)
+    total_cost = float(allocation["cost"].sum())
+    summary = {
+        "total_cost": float(round(total_cost, 2)),
+        "within_budget": bool(total_cost <= budget + 1e-6),
+        "budget": float(budget),
+        "service_target": float(service_target),
+        "method": "milp",
+        "solver": solver,
+        "status": status,
+        "expected_service": round(problem.service(pick, qty), 4),
+    }
+    return allocation, summary
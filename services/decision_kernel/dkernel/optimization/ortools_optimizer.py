@@ -1,47 +1,52 @@
 from __future__ import annotations
 
-from typing import Dict, Tuple
+from typing import Dict, Optional, Tuple
 
 import numpy as np
 import pandas as pd
 
+from dkernel.config import get_settings
+from dkernel.features.offerbook import OfferBook
+
+ALLOCATION_COLUMNS = ["sku", "supplier", "price", "qty", "cost", "lead_time_days"]
+
+
+def cheapest_offers(offers: pd.DataFrame | OfferBook) -> pd.DataFrame:
+    """Cheapest offer per SKU, indexed by sku (price ties go to the earlier offer row)."""
+    book = OfferBook.of(offers)
+    return book.take(book.first_allowed()).set_index("sku")
+
 
 def _greedy_allocate(
     forecast: pd.DataFrame,
-    offers: pd.DataFrame,
+    offers: pd.DataFrame | OfferBook,
     service_target: float,
     budget: float,
 ) -> Tuple[pd.DataFrame, Dict[str, float]]:
     # aggregate demand per SKU
-    demand = forecast.groupby("sku")["forecast_qty"].sum().rename("demand").reset_index()
-    offers_sorted = offers.sort_values(["sku", "price"]).copy()
-    alloc_rows = []
-    total_cost = 0.0
-    remaining_budget = budget
-    for _, row in demand.iterrows():
-        sku = row["sku"]
-        need = float(row["demand"]) * service_target
-        if need <= 0:
-            continue
-        avail = offers_sorted[offers_sorted["sku"] == sku]
-        if avail.empty:
-            continue
-        best = avail.iloc[0]
-        qty = max(float(best["moq"]), float(np.ceil(need)))
-        cost = qty * float(best["price"])
-        total_cost += cost
-        remaining_budget -= cost
-        alloc_rows.append(
-            {
-                "sku": sku,
-                "supplier": best["supplier"],
-                "price": float(best["price"]),
-                "qty": float(qty),
-                "cost": float(cost),
-                "lead_time_days": int(best["lead_time_days"]),
-            }
-        )
-    allocation = pd.DataFrame(alloc_rows)
+    demand = forecast.groupby("sku")["forecast_qty"].sum()
+    need = demand.to_numpy(dtype=float) * service_target
+    book = OfferBook.of(offers)
+    best = book.cheapest(demand.index)
+    keep = (need > 0) & (best >= 0)
+    best, need = best[keep], need[keep]
+
+    price = book.price[best]
+    qty = np.maximum(book.moq[best], np.ceil(need))
+    cost = qty * price
+    allocation = pd.DataFrame(
+        {
+            "sku": demand.index.to_numpy()[keep],
+            "supplier": book.suppliers[book.supplier_id[best]],
+            "price": price,
+            "qty": qty,
+            "cost": cost,
+            "lead_time_days": book.lead_time[best].astype(int),
+        },
+        columns=ALLOCATION_COLUMNS,
+    )
+    # cumsum keeps the left-to-right accumulation order of a running total
+    total_cost = float(np.cumsum(cost)[-1]) if len(cost) else 0.0
     summary = {
         "total_cost": float(round(total_cost, 2)),
         "within_budget": bool(total_cost <= budget),
@@ -53,18 +58,62 @@ def _greedy_allocate(
 
 def optimize_plan(
     forecast: pd.DataFrame,
-    offers: pd.DataFrame,
+    offers: pd.DataFrame | OfferBook,
     service_target: float,
     budget: float,
+    method: str = "greedy",
+    max_lead_time: Optional[int] = None,
+    time_limit: float = 10.0,
+    n_shards: int = 8,
+    shard_by: str = "hash",
+    n_workers: Optional[int] = None,
 ) -> Dict[str, object]:
-    """Return allocation and summary. Fallback greedy to avoid heavy deps.
+    """Return allocation and summary.
+
+    ``method="greedy"`` buys the cheapest offer per SKU and only reports the
+    budget; ``method="milp"`` maximizes service subject to budget, MOQ and
+    ``max_lead_time`` (see ``dkernel.optimization.milp``);
+    ``method="decomposed"`` does the same for catalogs too large for one
+    solver by pricing the budget across ``n_shards`` SKU shards solved on
+    ``n_workers`` processes (see ``dkernel.optimization.decomposition``).
+    ``milp`` requests for more than ``Settings.MILP_MAX_SKUS`` SKUs are
+    planned with ``decomposed`` and their summary gets ``routed_from="milp"``.
+
+    ``offers`` may be a prebuilt :class:`OfferBook` (``build_feature_tables``
+    returns one as ``offer_book``) to skip re-sorting the offers table.
 
     Schema:
       {
         "allocation": DataFrame columns [sku,supplier,price,qty,cost,lead_time_days],
-        "summary": {total_cost, within_budget, budget, service_target}
+        "summary": {total_cost, within_budget, budget, service_target, ...}
       }
     """
-    allocation, summary = _greedy_allocate(forecast, offers, service_target, budget)
-    return {"allocation": allocation, "summary": summary}
+    routed_from = None
+    if method == "milp" and forecast["sku"].nunique() > get_settings().MILP_MAX_SKUS:
+        method, routed_from = "decomposed", "milp"
+    if method == "milp":
+        from dkernel.optimization.milp import milp_allocate
+
+        allocation, summary = milp_allocate(
+            forecast, offers, service_target, budget, max_lead_time=max_lead_time, time_limit=time_limit
+        )
+    elif method == "decomposed":
+        from dkernel.optimization.decomposition import decomposed_allocate
 
+        allocation, summary = decomposed_allocate(
+            forecast,
+            offers,
+            service_target,
+            budget,
+            max_lead_time=max_lead_time,
+            n_shards=n_shards,
+            shard_by=shard_by,
+            n_workers=n_workers,
+        )
+    elif method == "greedy":
+        allocation, summary = _greedy_allocate(forecast, offers, service_target, budget)
+    else:
+        raise ValueError(f"Unknown optimization method: {method}")
+    if routed_from is not None:
+        summary["routed_from"] = routed_from
+    return {"allocation": allocation, "summary": summary}
@@ -1,13 +1,20 @@
 from __future__ import annotations
 
-from typing import Dict, List
+from typing import Dict, List, Optional
 
+import pandas as pd
 
-def build_plan(goal: Dict) -> List[dict]:
-    """Build three simple plan options (cost, balanced, quality).
 
-    Uses a base budget and service target to synthesize options with
-    simple multiplicative deltas to illustrate tradeoffs.
+def build_plan(
+    goal: Dict, forecast: Optional[pd.DataFrame] = None, offers: Optional[pd.DataFrame] = None
+) -> List[dict]:
+    """Build three plan options (cost, balanced, quality).
+
+    With ``forecast`` and ``offers`` the options are points off the real
+    budget/service frontier (see ``dkernel.optimization.frontier``; use
+    ``compute_frontier`` for the full curve), each scored in one batch
+    (``dkernel.scoring.batch_score``). Without data, falls back to
+    simple multiplicative deltas around the goal to illustrate tradeoffs.
     """
     base_budget = float(goal.get("monthly_budget_gbp") or 8000.0)
     target_service = float(goal.get("service_level_target") or 0.97)
@@ -15,6 +22,18 @@ def build_plan(goal: Dict) -> List[dict]:
     # Clamp
     target_service = max(0.0, min(1.0, target_service))
 
+    if forecast is not None and offers is not None:
+        from dkernel.optimization.frontier import compute_frontier, frontier_options, option_points
+        from dkernel.scoring import batch_score, demand_vector
+
+        frontier = compute_frontier(forecast, offers)
+        options = frontier_options(frontier, base_budget, target_service)
+        allocations = [frontier.allocation_at(b) for b in option_points(frontier, base_budget, target_service)["budget"]]
+        scores = batch_score(demand_vector(forecast), allocations, names=[o["name"] for o in options])
+        for option, row in zip(options, scores.set_index("plan").loc[[o["name"] for o in options]].itertuples()):
+            option.update(score=float(row.score), supplier_diversity=float(row.supplier_diversity))
+        return options
+
     options = [
         {
             "name": "cost-focused",
@@ -0,0 +1,337 @@
+from __future__ import annotations
+
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from dkernel.config import get_settings
+from dkernel.dag import ArtifactStore, MemoryStore, Pipeline, PipelineRun, Stage, source_key
+from dkernel.data.adapters import load_inventory_csv, load_offers_csv, load_sales_csv
+from dkernel.data.streaming import stream_sales_aggregates
+from dkernel.data.synth import make_synthetic_data
+from dkernel.features.pipeline import build_feature_tables
+from dkernel.forecasting.batch import METHODS
+from dkernel.forecasting.darts_forecaster import forecast_frame, forecast_matrix
+from dkernel.forecasting.incremental import ForecastState
+from dkernel.forecasting.scenarios import scenarios_for
+from dkernel.netting import net_requirements, netting_summary, requirements_frame
+from dkernel.optimization.frontier import compute_frontier, frontier_options, option_points
+from dkernel.optimization.ortools_optimizer import optimize_plan
+from dkernel.policies import Policies, apply_policies
+from dkernel.scoring import compute_kpis
+
+_LOADERS = {"sales": load_sales_csv, "inventory": load_inventory_csv, "offers": load_offers_csv}
+
+# Parameters of the plan pipeline and their defaults (the ``dkernel plan`` defaults)
+PLAN_PARAMS: Dict[str, Any] = {
+    "horizon": 30,
+    "forecast_method": "moving_average",
+    "slt": 0.97,
+    "budget": 8000.0,
+    "netting": "none",
+    "review_days": 0,
+    "optimizer": "greedy",
+    "max_lead_time": None,
+    "time_limit": 10.0,
+    "shards": 8,
+    "shard_by": "hash",
+    "policies": None,
+    "kpi_backend": "ratio",
+    "samples": 0,
+    # None resolves to Settings.SEED / Settings.DEMAND_MATRIX_DTYPE (kept in the stage keys)
+    "seed": None,
+    "matrix_dtype": None,
+    # Set by run_plan: content key of the forecast state file the forecast starts from
+    "forecast_state": None,
+}
+
+
+def net_and_optimize(
+    feats: dict,
+    forecast: pd.DataFrame,
+    slt: float,
+    budget: float,
+    netting: str = "none",
+    review_days: int = 0,
+    **opts,
+) -> tuple[dict, pd.DataFrame]:
+    """Net (unless ``netting="none"``) and optimize; returns (result, requirements planned)."""
+    requirements = forecast
+    netted = None
+    if netting != "none":
+        net = net_requirements(
+            forecast,
+            feats["inventory"],
+            feats["offer_book"],
+            service_target=slt,
+            safety=netting,
+            history=feats["demand_matrix"],
+            review_days=review_days,
+        )
+        netted = netting_summary(net, forecast)
+        # Safety stock already encodes the service target
+        requirements = requirements_frame(net)
+    result = optimize_plan(
+        requirements,
+        feats["offer_book"],
+        service_target=slt if netted is None else 1.0,
+        budget=budget,
+        **opts,
+    )
+    result.update(offers=feats["joined_offers"], offer_book=feats["offer_book"])
+    if netted is not None:
+        result["summary"].update(service_target=slt, netting=netted)
+    return result, requirements
+
+
+def _load(inputs: Dict[str, Any], params: Dict[str, Any], options: Dict[str, Any]) -> dict:
+    load = options.get("load") or (lambda path, kind: _LOADERS[kind](path))
+
+    def table(kind: str):
+        src = inputs[kind]
+        return src if isinstance(src, pd.DataFrame) else load(str(src), kind)
+
+    sales = inputs["sales"]
+    if options.get("stream") and not isinstance(sales, pd.DataFrame):
+        sales = stream_sales_aggregates(str(sales), chunksize=options.get("chunksize", 500_000))
+    else:
+        sales = table("sales")
+    return {"sales": sales, "inventory": table("inventory"), "offers": table("offers")}
+
+
+def _features(inputs: Dict[str, Any], params: Dict[str, Any], options: Dict[str, Any]) -> dict:
+    tables = inputs["load"]
+    return build_feature_tables(
+        tables["sales"], tables["inventory"], tables["offers"], matrix_dtype=params["matrix_dtype"]
+    )
+
+
+def _forecast(inputs: Dict[str, Any], params: Dict[str, Any], options: Dict[str, Any]):
+    feats = inputs["features"]
+    source = feats["demand_matrix"]
+    state = options.get("state")
+    if state:
+        if Path(state).exists():
+            fstate = ForecastState.load(state)
+            dd = feats["demand_daily"]
+            fstate.update(dd[pd.to_datetime(dd["date"]) > fstate.last_date])
+        else:
+            fstate = ForecastState.from_history(source)
+        fstate.save(state)
+        source = fstate
+    return forecast_matrix(source, horizon=params["horizon"], method=params["forecast_method"])
+
+
+def _optimize(inputs: Dict[str, Any], params: Dict[str, Any], options: Dict[str, Any]) -> dict:
+    feats = inputs["features"]
+    result, requirements = net_and_optimize(
+        feats,
+        forecast_frame(inputs["forecast"]),
+        params["slt"],
+        params["budget"],
+        netting=params["netting"],
+        review_days=params["review_days"],
+        method=params["optimizer"],
+        max_lead_time=params["max_lead_time"],
+        time_limit=params["time_limit"],
+        n_shards=params["shards"],
+        shard_by=params["shard_by"],
+    )
+    if params["policies"]:
+        result = apply_policies(result, params["policies"])
+    # offers stay with the features artifact
+    return {"allocation": result["allocation"], "summary": result["summary"], "requirements": requirements}
+
+
+def _score(inputs: Dict[str, Any], params: Dict[str, Any], options: Dict[str, Any]) -> dict:
+    feats, fc, planned = inputs["features"], inputs["forecast"], inputs["optimize"]
+    plan = {**planned, "offers": feats["joined_offers"]}
+    samples = int(params["samples"] or 0)
+    scenarios = None
+    if samples > 0:
+        scenarios = scenarios_for(fc, feats["demand_matrix"], samples, seed=params["seed"])
+    kpis = compute_kpis(
+        plan,
+        forecast_frame(fc) if params["kpi_backend"] == "simulation" else planned["requirements"],
+        backend=params["kpi_backend"],
+        inventory=feats["inventory"],
+        scenarios=scenarios,
+    )
+    return {**planned["summary"], **kpis}
+
+
+PLAN_PIPELINE = Pipeline(
+    [
+        Stage("load", _load, inputs=("sales", "inventory", "offers")),
+        Stage("features", _features, inputs=("load",), params=("matrix_dtype",)),
+        Stage(
+            "forecast",
+            _forecast,
+            inputs=("features",),
+            params=("horizon", "forecast_method", "seed", "forecast_state"),
+        ),
+        Stage(
+            "optimize",
+            _optimize,
+            inputs=("features", "forecast"),
+            params=(
+                "slt",
+                "budget",
+                "netting",
+                "review_days",
+                "optimizer",
+                "max_lead_time",
+                "time_limit",
+                "shards",
+                "shard_by",
+                "policies",
+            ),
+        ),
+        Stage(
+            "score",
+            _score,
+            inputs=("features", "forecast", "optimize"),
+            params=("kpi_backend", "samples", "seed"),
+        ),
+    ]
+)
+
+
+def run_plan(
+    sources: Dict[str, Any],
+    params: Optional[Dict[str, Any]] = None,
+    store: Optional[ArtifactStore] = None,
+    options: Optional[Dict[str, Any]] = None,
+    targets: Iterable[str] = ("score", "optimize"),
+    cancel: Optional[Callable[[], bool]] = None,
+    progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+    source_keys: Optional[Dict[str, str]] = None,
+) -> PipelineRun:
+    """Run :data:`PLAN_PIPELINE` on ``sources`` (paths or frames for sales/inventory/offers).
+
+    ``params`` override :data:`PLAN_PARAMS`. ``options`` may carry a table
+    ``load`` function, ``stream``/``chunksize`` and a forecast ``state`` file;
+    with a state file the forecast stage always re-runs (it updates the file),
+    is keyed on the file's content before the run, so stateless runs never
+    reuse its output, and ``forecast_method`` must be a batch method
+    (``ValueError`` otherwise).
+    ``seed`` and ``matrix_dtype`` default to the current settings, so changing
+    SEED or DEMAND_MATRIX_DTYPE misses stored stages. Forecast noise is drawn
+    from Settings.SEED, so a ``seed`` that differs from it raises ``ValueError``.
+    ``cancel``, ``progress`` and ``source_keys`` are passed to :meth:`Pipeline.run`.
+    """
+    options = options or {}
+    params = {**PLAN_PARAMS, **(params or {})}
+    settings = get_settings()
+    if params["seed"] is None:
+        params["seed"] = settings.SEED
+    elif int(params["seed"]) != settings.SEED:
+        raise ValueError(f"Forecasts follow Settings.SEED={settings.SEED}, not seed={params['seed']}")
+    params["matrix_dtype"] = params["matrix_dtype"] or settings.DEMAND_MATRIX_DTYPE
+    state = options.get("state")
+    params["forecast_state"] = None
+    if state:
+        params["forecast_state"] = "state:" + (source_key(state) if Path(state).exists() else "new")
+    if options.get("state") and params["forecast_method"] not in METHODS:
+        raise ValueError(
+            f"Forecast state supports the batch methods {sorted(METHODS)}, "
+            f"not {params['forecast_method']!r}"
+        )
+    return PLAN_PIPELINE.run(
+        sources,
+        params,
+        targets=targets,
+        store=store,
+        options=options,
+        refresh=("forecast",) if options.get("state") else (),
+        cancel=cancel,
+        progress=progress,
+        source_keys=source_keys,
+    )
+
+
+def goal_params(goal: Dict[str, Any], params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Pipeline params for a GoalDSL dict: its budget, target and policies over ``params``.
+
+    Goal planning defaults to the budget-bound ``milp`` optimizer (planned
+    with ``decomposed`` above ``Settings.MILP_MAX_SKUS``).
+    """
+    return {
+        "optimizer": "milp",
+        **(params or {}),
+        "budget": float(goal.get("monthly_budget_gbp") or PLAN_PARAMS["budget"]),
+        "slt": max(0.0, min(1.0, float(goal.get("service_level_target") or PLAN_PARAMS["slt"]))),
+        "policies": Policies.from_goal(goal).to_constraints(),
+    }
+
+
+def _default_sources(sources: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    if sources is None:
+        return dict(zip(("sales", "inventory", "offers"), make_synthetic_data()))
+    return sources
+
+
+def plan_goal(
+    goal: Dict[str, Any],
+    sources: Optional[Dict[str, Any]] = None,
+    params: Optional[Dict[str, Any]] = None,
+    store: Optional[ArtifactStore] = None,
+    cancel: Optional[Callable[[], bool]] = None,
+    progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+    source_keys: Optional[Dict[str, str]] = None,
+) -> Dict[str, Any]:
+    """Plan one goal through :data:`PLAN_PIPELINE` (see :func:`goal_params`).
+
+    Returns the scored summary, the allocation as records and the run report.
+    ``sources`` default to synthetic data; ``progress`` gets per-stage events.
+    """
+    run = run_plan(
+        _default_sources(sources),
+        goal_params(goal, params),
+        store=store,
+        cancel=cancel,
+        progress=progress,
+        source_keys=source_keys,
+    )
+    return {
+        "summary": run["score"],
+        "allocation": run["optimize"]["allocation"].to_dict(orient="records"),
+        "pipeline": run.report(),
+    }
+
+
+def plan_options(
+    goal: Dict[str, Any],
+    sources: Optional[Dict[str, Any]] = None,
+    params: Optional[Dict[str, Any]] = None,
+    store: Optional[ArtifactStore] = None,
+    cancel: Optional[Callable[[], bool]] = None,
+    source_keys: Optional[Dict[str, str]] = None,
+) -> List[Dict[str, Any]]:
+    """The three ``build_plan`` options, each planned through :data:`PLAN_PIPELINE`.
+
+    Option budgets are the cost-focused/balanced/quality-focused points of the
+    gross budget/service frontier; each is then optimized with
+    :func:`goal_params` (so under the goal's policies) and scored, so reported
+    cost and service are those of the constrained plan. ``sources`` default to
+    synthetic data. Load, features and forecast are computed once (``store``
+    defaults to a :class:`MemoryStore`).
+    """
+    sources = _default_sources(sources)
+    store = store if store is not None else MemoryStore()
+    params = goal_params(goal, params)
+    budget, slt = params["budget"], params["slt"]
+    run = partial(run_plan, sources, store=store, cancel=cancel, source_keys=source_keys)
+    base = run(params, targets=("features", "forecast"))
+    frontier = compute_frontier(forecast_frame(base["forecast"]), base["features"]["offer_book"])
+    options = frontier_options(frontier, budget, slt)
+    for option, point in zip(options, option_points(frontier, budget, slt)["budget"]):
+        summary = run({**params, "budget": float(point)}, targets=("score",))["score"]
+        option.update(
+            estimated_monthly_cost=round(float(summary["total_cost"]), 2),
+            expected_service_level=round(float(summary["service_level"]), 4),
+            summary=summary,
+        )
+    return options
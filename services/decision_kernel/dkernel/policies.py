@@ -1,48 +1,308 @@
 from __future__ import annotations
 
-from typing import Dict, List
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 
+from dkernel.features.offerbook import OfferBook
+from dkernel.optimization.ortools_optimizer import ALLOCATION_COLUMNS
 
-def apply_policies(plan: Dict[str, object], constraints: Dict[str, List[str]] | None) -> Dict[str, object]:
-    """Apply simple guardrails to allocation: ban vendors/categories.
+# Rounds of spend-share / supplier-count repair before reporting what is left
+MAX_REPAIR_ROUNDS = 10
 
-    If allocations are removed, attempt reassignment to remaining cheapest suppliers.
+
+def _folded(values: Iterable) -> FrozenSet[str]:
+    return frozenset(str(v).strip().casefold() for v in values if v is not None and str(v).strip())
+
+
+@dataclass(frozen=True)
+class Policies:
+    """Planning guardrails, matched case-insensitively against supplier and category names.
+
+    ``categories`` (when non-empty) keeps only SKUs in those categories;
+    ``excluded_categories`` drops SKUs in them. Categories are read from the
+    ``category_col`` offers column.
+    """
+
+    banned_vendors: FrozenSet[str] = frozenset()
+    excluded_categories: FrozenSet[str] = frozenset()
+    categories: FrozenSet[str] = frozenset()
+    max_spend_share: Optional[float] = None
+    max_lead_time: Optional[int] = None
+    min_suppliers: int = 0
+    category_col: str = "category"
+
+    @classmethod
+    def from_constraints(cls, constraints: Optional[Dict[str, object]]) -> "Policies":
+        """From a constraints dict (``banned_vendors``, ``excluded_categories``, ``categories``, ...)."""
+        c = constraints or {}
+        return cls(
+            banned_vendors=_folded(c.get("banned_vendors", [])),  # type: ignore[arg-type]
+            excluded_categories=_folded(c.get("excluded_categories", [])),  # type: ignore[arg-type]
+            categories=_folded(c.get("categories", [])),  # type: ignore[arg-type]
+            max_spend_share=None if c.get("max_spend_share") is None else float(c["max_spend_share"]),  # type: ignore[arg-type]
+            max_lead_time=None if c.get("max_lead_time") is None else int(c["max_lead_time"]),  # type: ignore[arg-type]
+            min_suppliers=int(c.get("min_suppliers") or 0),  # type: ignore[arg-type]
+            category_col=str(c.get("category_col", "category")),
+        )
+
+    @classmethod
+    def from_goal(cls, goal: Dict[str, object]) -> "Policies":
+        """From a GoalDSL dict.
+
+        ``excludes`` name either vendors or categories, so each applies as
+        both; ``constraints`` entries named like a policy field carry its
+        value in ``details`` (e.g. ``{"name": "max_lead_time", "details": "14"}``).
+        """
+        excludes = list(goal.get("excludes") or [])  # type: ignore[call-overload]
+        c: Dict[str, object] = {
+            "banned_vendors": excludes,
+            "excluded_categories": excludes,
+            "categories": list(goal.get("categories") or []),  # type: ignore[call-overload]
+        }
+        for item in goal.get("constraints") or []:  # type: ignore[union-attr]
+            name = str(item.get("name", "")).strip().lower().replace(" ", "_")
+            details = item.get("details")
+            if name in ("banned_vendors", "excluded_categories") and details:
+                c[name] = list(c[name]) + [details]  # type: ignore[call-overload]
+            elif name in ("max_spend_share", "max_lead_time", "min_suppliers") and details is not None:
+                c[name] = details
+        return cls.from_constraints(c)
+
+    def to_constraints(self) -> Dict[str, object]:
+        """Inverse of :meth:`from_constraints`, with sorted lists (stable to hash)."""
+        return {
+            "banned_vendors": sorted(self.banned_vendors),
+            "excluded_categories": sorted(self.excluded_categories),
+            "categories": sorted(self.categories),
+            "max_spend_share": self.max_spend_share,
+            "max_lead_time": self.max_lead_time,
+            "min_suppliers": self.min_suppliers,
+            "category_col": self.category_col,
+        }
+
+    @property
+    def empty(self) -> bool:
+        return not (
+            self.banned_vendors
+            or self.excluded_categories
+            or self.categories
+            or self.max_spend_share is not None
+            or self.max_lead_time is not None
+            or self.min_suppliers > 1
+        )
+
+
+@dataclass
+class CompiledPolicies:
+    """``Policies`` evaluated once over an offer book.
+
+    ``offer_ok[j]`` says offer row ``j`` may be bought (vendor, lead time and
+    category rules); ``sku_ok[i]`` says book SKU ``i`` may be planned at all
+    (category rules). ``unenforced`` lists rules the data cannot express.
     """
-    constraints = constraints or {}
-    banned_vendors = set(constraints.get("banned_vendors", []))
 
+    policies: Policies
+    book: Optional[OfferBook]
+    offer_ok: np.ndarray
+    sku_ok: np.ndarray
+    unenforced: List[str] = field(default_factory=list)
+
+    def vendor_banned(self, suppliers: np.ndarray) -> np.ndarray:
+        """Per-row mask of ``suppliers`` on the banned list (each distinct name folded once)."""
+        codes, uniques = pd.factorize(suppliers)
+        folded = np.asarray([str(s).casefold() for s in uniques], dtype=object)
+        return np.isin(folded, list(self.policies.banned_vendors))[codes]
+
+    def row_flags(self, allocation: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        """(category-dropped, must-move) masks over allocation rows."""
+        p = self.policies
+        must_move = self.vendor_banned(allocation["supplier"].to_numpy())
+        if p.max_lead_time is not None:
+            must_move |= allocation["lead_time_days"].to_numpy() > p.max_lead_time
+        dropped = np.zeros(len(allocation), dtype=bool)
+        if self.book is not None and not self.sku_ok.all():
+            pos = self.book.sku_positions(allocation["sku"])
+            dropped = (pos >= 0) & ~self.sku_ok[np.maximum(pos, 0)]
+        return dropped, must_move & ~dropped
+
+
+def compile_policies(policies: Policies, book: Optional[OfferBook]) -> CompiledPolicies:
+    """Fold all offer-level rules into one mask over ``book`` (and SKU rules into one over its SKUs)."""
+    unenforced: List[str] = []
+    if book is None:
+        if policies.categories or policies.excluded_categories:
+            unenforced.append("categories")
+        return CompiledPolicies(policies, None, np.zeros(0, dtype=bool), np.zeros(0, dtype=bool), unenforced)
+
+    banned = np.isin(np.asarray([str(s).casefold() for s in book.suppliers], dtype=object), list(policies.banned_vendors))
+    offer_ok = ~banned[book.supplier_id] if len(book.suppliers) else np.ones(book.n_offers, dtype=bool)
+    if policies.max_lead_time is not None:
+        offer_ok &= book.lead_time <= policies.max_lead_time
+
+    sku_ok = np.ones(book.n_skus, dtype=bool)
+    if policies.categories or policies.excluded_categories:
+        if policies.category_col in book.extra:
+            folded = np.asarray([str(c).casefold() for c in book.extra[policies.category_col]], dtype=object)
+            offer_cat_ok = ~np.isin(folded, list(policies.excluded_categories))
+            if policies.categories:
+                offer_cat_ok &= np.isin(folded, list(policies.categories))
+            # a SKU is planned only if every one of its offers passes (its category is per SKU)
+            sku_ok = np.logical_and.reduceat(offer_cat_ok, book.offsets[:-1]) if book.n_offers else sku_ok
+            offer_ok &= np.repeat(sku_ok, np.diff(book.offsets))
+        else:
+            unenforced.append("categories")
+    return CompiledPolicies(policies, book, offer_ok, sku_ok, unenforced)
+
+
+def _rebuy(book: OfferBook, skus: np.ndarray, qty: np.ndarray, allowed: np.ndarray) -> Tuple[np.ndarray, pd.DataFrame]:
+    """Cheapest allowed offer for each (sku, qty); returns (found mask, new allocation rows)."""
+    best = book.cheapest(skus, allowed=allowed)
+    found = best >= 0
+    best = best[found]
+    q = np.maximum(book.moq[best], qty[found])
+    price = book.price[best]
+    rows = pd.DataFrame(
+        {
+            "sku": np.asarray(skus, dtype=object)[found],
+            "supplier": book.suppliers[book.supplier_id[best]],
+            "price": price,
+            "qty": q,
+            "cost": q * price,
+            "lead_time_days": book.lead_time[best].astype(int),
+        },
+        columns=ALLOCATION_COLUMNS,
+    )
+    return found, rows
+
+
+def _spend_shares(alloc: pd.DataFrame) -> pd.Series:
+    spend = alloc.groupby("supplier", sort=False)["cost"].sum()
+    total = float(spend.sum())
+    return spend / total if total > 0 else spend * 0.0
+
+
+def _cap_spend_share(alloc: pd.DataFrame, compiled: CompiledPolicies, cap: float) -> Tuple[pd.DataFrame, int]:
+    """Move rows off suppliers above ``cap`` of total spend, largest rows first."""
+    book = compiled.book
+    moved = 0
+    for _ in range(MAX_REPAIR_ROUNDS):
+        shares = _spend_shares(alloc)
+        over = shares[shares > cap + 1e-9]
+        if over.empty or book is None:
+            break
+        limit = cap * float(alloc["cost"].sum())
+        on_over = alloc["supplier"].isin(over.index).to_numpy()
+        cand = alloc[on_over].sort_values(["supplier", "cost"], kind="stable")
+        # keep the cheapest rows that fit under the cap, move the rest
+        kept_spend = cand.groupby("supplier", sort=False)["cost"].cumsum().to_numpy()
+        move_idx = cand.index[kept_spend > limit + 1e-9]
+        if not len(move_idx):
+            break
+        allowed = compiled.offer_ok & ~book.supplier_mask(over.index)
+        rows = alloc.loc[move_idx]
+        found, new_rows = _rebuy(book, rows["sku"].to_numpy(), rows["qty"].to_numpy(dtype=float), allowed)
+        # only take moves that leave the receiving supplier under the cap, so rows never bounce back
+        spend = alloc.groupby("supplier", sort=False)["cost"].sum()
+        received = new_rows.groupby("supplier", sort=False)["cost"].cumsum().to_numpy()
+        fits = spend.reindex(new_rows["supplier"]).fillna(0.0).to_numpy() + received <= limit + 1e-9
+        if not fits.any():
+            break
+        src = move_idx[found][fits]
+        alloc = pd.concat([alloc.drop(index=src), new_rows[fits]], ignore_index=True)
+        moved += len(src)
+    return alloc, moved
+
+
+def _spread_suppliers(alloc: pd.DataFrame, compiled: CompiledPolicies, min_suppliers: int) -> Tuple[pd.DataFrame, int]:
+    """Bring in unused suppliers by moving the rows whose switch costs least."""
+    book = compiled.book
+    moved = 0
+    for _ in range(MAX_REPAIR_ROUNDS):
+        used = alloc["supplier"].unique()
+        missing = min_suppliers - len(used)
+        if missing <= 0 or book is None:
+            break
+        # never take a supplier's last row, or the count would not grow
+        rows = alloc[alloc.groupby("supplier", sort=False).cumcount().to_numpy()
+                     < alloc.groupby("supplier", sort=False)["sku"].transform("size").to_numpy() - 1]
+        allowed = compiled.offer_ok & ~book.supplier_mask(used)
+        found, new_rows = _rebuy(book, rows["sku"].to_numpy(), rows["qty"].to_numpy(dtype=float), allowed)
+        if not found.any():
+            break
+        src = rows.index[found]
+        switch = new_rows.assign(extra=new_rows["cost"].to_numpy() - rows.loc[src, "cost"].to_numpy(), src=src)
+        switch = switch.sort_values("extra", kind="stable").drop_duplicates("supplier").head(missing)
+        alloc = pd.concat(
+            [alloc.drop(index=switch["src"].to_numpy()), switch[ALLOCATION_COLUMNS]], ignore_index=True
+        )
+        moved += len(switch)
+    return alloc, moved
+
+
+def apply_policies(
+    plan: Dict[str, object], constraints: Dict[str, object] | Policies | None
+) -> Dict[str, object]:
+    """Apply guardrails to the plan's allocation in bulk.
+
+    SKUs outside the allowed categories are dropped. Rows from banned vendors
+    or over ``max_lead_time`` are reassigned, per SKU, to the cheapest allowed
+    offer in the plan's ``offer_book`` (built from ``offers`` if absent); SKUs
+    without one are dropped. Suppliers above ``max_spend_share`` of spend then
+    shed their largest rows, and ``min_suppliers`` pulls in unused suppliers at
+    the least extra cost. ``summary["policy"]`` reports what changed and any
+    rule still violated.
+    """
+    policies = constraints if isinstance(constraints, Policies) else Policies.from_constraints(constraints)
     allocation: pd.DataFrame = plan["allocation"]  # type: ignore[assignment]
-    offers: pd.DataFrame | None = plan.get("offers") if isinstance(plan, dict) else None  # type: ignore
-    if allocation.empty or not banned_vendors:
+    offers = plan.get("offer_book", plan.get("offers")) if isinstance(plan, dict) else None
+    if allocation.empty or policies.empty:
         return plan
 
-    keep = allocation[~allocation["supplier"].isin(banned_vendors)].copy()
-    removed = allocation[allocation["supplier"].isin(banned_vendors)]
-
-    if not removed.empty and isinstance(offers, pd.DataFrame):
-        # Try to reassign removed SKUs to next cheapest supplier
-        for sku in removed["sku"].unique():
-            need = float(removed[removed["sku"] == sku]["qty"].sum())
-            cand = offers[(offers["sku"] == sku) & (~offers["supplier"].isin(banned_vendors))]
-            if not cand.empty:
-                best = cand.sort_values("price").iloc[0]
-                qty = max(float(best["moq"]), need)
-                cost = qty * float(best["price"])
-                keep.loc[len(keep)] = {
-                    "sku": sku,
-                    "supplier": best["supplier"],
-                    "price": float(best["price"]),
-                    "qty": float(qty),
-                    "cost": float(cost),
-                    "lead_time_days": int(best["lead_time_days"]),
-                }
+    book = OfferBook.of(offers) if isinstance(offers, (pd.DataFrame, OfferBook)) else None
+    compiled = compile_policies(policies, book)
+    dropped, must_move = compiled.row_flags(allocation)
+    keep = allocation[~dropped & ~must_move]
+    removed = allocation[must_move]
+
+    reassigned, unassigned = 0, int(removed["sku"].nunique())
+    if not removed.empty and book is not None:
+        need = removed.groupby("sku", sort=False)["qty"].sum()
+        found, moved = _rebuy(book, need.index.to_numpy(), need.to_numpy(dtype=float), compiled.offer_ok)
+        reassigned, unassigned = int(found.sum()), int((~found).sum())
+        keep = pd.concat([keep, moved], ignore_index=True) if len(moved) else keep
+    keep = keep.reset_index(drop=True)
+
+    share_moves = spread_moves = 0
+    if policies.max_spend_share is not None and not keep.empty:
+        keep, share_moves = _cap_spend_share(keep, compiled, policies.max_spend_share)
+    if policies.min_suppliers > 1 and not keep.empty:
+        keep, spread_moves = _spread_suppliers(keep, compiled, policies.min_suppliers)
+
+    shares = _spend_shares(keep) if not keep.empty else pd.Series(dtype=float)
+    n_suppliers = int(keep["supplier"].nunique()) if not keep.empty else 0
+    violations = []
+    if policies.max_spend_share is not None and len(shares) and shares.max() > policies.max_spend_share + 1e-9:
+        violations.append("max_spend_share")
+    if policies.min_suppliers > 1 and n_suppliers < policies.min_suppliers:
+        violations.append("min_suppliers")
 
     summary = plan.get("summary", {})
     if isinstance(summary, dict):
         summary = summary.copy()
     total_cost = float(keep["cost"].sum()) if not keep.empty else 0.0
     summary["total_cost"] = round(total_cost, 2)
+    summary["policy"] = {
+        "dropped_by_category": int(dropped.sum()),
+        "reassigned_skus": reassigned,
+        "unassigned_skus": unassigned,
+        "spend_share_moves": share_moves,
+        "supplier_spread_moves": spread_moves,
+        "suppliers": n_suppliers,
+        "max_supplier_share": round(float(shares.max()), 4) if len(shares) else 0.0,
+        "violations": violations,
+        "unenforced": compiled.unenforced,
+    }
     return {**plan, "allocation": keep.reset_index(drop=True), "summary": summary}
-
@@ -1,19 +1,122 @@
 from __future__ import annotations
 
-from typing import Dict
+from dataclasses import dataclass
+from typing import Dict, Optional, Sequence, Tuple
 
+import numpy as np
 import pandas as pd
 
+from dkernel.features.matrix import DemandMatrix
+from dkernel.forecasting.scenarios import DemandScenarios
 
-def compute_kpis(plan: Dict[str, object], forecast: pd.DataFrame) -> Dict[str, float]:
+
+def _demand_by_sku(forecast: pd.DataFrame | DemandMatrix) -> pd.Series:
+    if isinstance(forecast, DemandMatrix):
+        return forecast.to_series().rename("demand")
+    return forecast.groupby("sku")["forecast_qty"].sum().rename("demand")
+
+
+def _unit_values(plan: Dict[str, object], skus: pd.Index) -> np.ndarray:
+    """Per-SKU unit value: planned purchase price, else cheapest offer, else 0."""
+    alloc: pd.DataFrame = plan["allocation"]  # type: ignore[assignment]
+    value = pd.Series(np.nan, index=skus)
+    offers = plan.get("offers")
+    if isinstance(offers, pd.DataFrame) and not offers.empty:
+        value = offers.groupby("sku")["price"].min().reindex(skus)
+    if not alloc.empty:
+        by_sku = alloc.groupby("sku")[["cost", "qty"]].sum()
+        value = (by_sku["cost"] / by_sku["qty"]).reindex(skus).fillna(value)
+    return value.fillna(0.0).to_numpy(dtype=float)
+
+
+def scenario_kpis(
+    plan: Dict[str, object],
+    scenarios: DemandScenarios,
+    inventory: Optional[pd.DataFrame] = None,
+    alpha: float = 0.95,
+) -> Tuple[Dict[str, float], pd.DataFrame]:
+    """Risk KPIs of a plan across every demand scenario at once.
+
+    Supply per SKU is planned quantity plus inventory ``on_hand``; shortfall
+    is horizon demand above it in each sample, valued at the SKU's unit
+    value. Returns plan-level KPIs (mean stockout probability, expected
+    shortfall in units, expected lost value, cost-at-risk as the ``alpha``
+    quantile of lost value, and the tail mean beyond it) and a per-SKU frame.
+    """
     alloc: pd.DataFrame = plan["allocation"]  # type: ignore[assignment]
-    demand = forecast.groupby("sku")["forecast_qty"].sum().rename("demand")
-    bought = alloc.groupby("sku")["qty"].sum().rename("bought") if not alloc.empty else pd.Series(dtype=float)
+    skus = pd.Index(scenarios.skus)
+    supply = np.zeros(len(skus))
+    if not alloc.empty:
+        supply += alloc.groupby("sku")["qty"].sum().reindex(skus).fillna(0).to_numpy(dtype=float)
+    if inventory is not None and not inventory.empty:
+        on_hand = inventory.drop_duplicates("sku", keep="last").set_index("sku")["on_hand"]
+        supply += on_hand.reindex(skus).fillna(0).to_numpy(dtype=float)
+
+    shortfall = np.maximum(scenarios.totals() - supply[:, None], 0.0)
+    lost_value = _unit_values(plan, skus) @ shortfall
+    stockout_prob = (shortfall > 0).mean(axis=1)
+    expected_shortfall = shortfall.mean(axis=1)
+    car = float(np.quantile(lost_value, alpha)) if lost_value.size else 0.0
+    tail = lost_value[lost_value >= car]
+    per_sku = pd.DataFrame(
+        {"sku": skus.to_numpy(), "stockout_probability": stockout_prob, "expected_shortfall": expected_shortfall}
+    )
+    kpis = {
+        "stockout_probability": round(float(stockout_prob.mean()), 4) if len(skus) else 0.0,
+        "expected_shortfall": round(float(expected_shortfall.sum()), 2),
+        "expected_lost_value": round(float(lost_value.mean()), 2) if lost_value.size else 0.0,
+        "cost_at_risk": round(car, 2),
+        "tail_lost_value": round(float(tail.mean()), 2) if tail.size else 0.0,
+        "samples": scenarios.n_samples,
+    }
+    return kpis, per_sku
+
+
+def compute_kpis(
+    plan: Dict[str, object],
+    forecast: pd.DataFrame | DemandMatrix,
+    backend: str = "ratio",
+    inventory: Optional[pd.DataFrame] = None,
+    scenarios: Optional[DemandScenarios] = None,
+) -> Dict[str, float]:
+    """Plan KPIs against ``forecast``.
+
+    ``backend="ratio"`` scores bought/demand over the horizon. ``"simulation"``
+    replays the plan day by day from ``inventory`` on hand with lead times
+    (see ``dkernel.simulation``) and adds fill rate, lost units, stockout days
+    and holding cost; ``forecast`` must then be daily. With ``scenarios``,
+    ``stockout_risk`` becomes the sampled stockout probability and the risk
+    KPIs of :func:`scenario_kpis` are added.
+    """
+    kpis = _point_kpis(plan, forecast, backend, inventory)
+    if scenarios is not None:
+        risk, _ = scenario_kpis(plan, scenarios, inventory)
+        kpis.update(risk, stockout_risk=risk["stockout_probability"])
+    return kpis
+
+
+def _point_kpis(
+    plan: Dict[str, object],
+    forecast: pd.DataFrame | DemandMatrix,
+    backend: str,
+    inventory: Optional[pd.DataFrame],
+) -> Dict[str, float]:
+    alloc: pd.DataFrame = plan["allocation"]  # type: ignore[assignment]
+    suppliers_used = alloc["supplier"].nunique() if not alloc.empty else 0
+    supplier_diversity = float(suppliers_used / max(1, len(alloc))) if not alloc.empty else 0.0
+    if backend == "simulation":
+        from dkernel.simulation import simulate_plan
+
+        sim = simulate_plan(alloc, forecast, inventory=inventory).kpis()
+        return {"total_cost": sim.pop("purchase_cost"), **sim, "supplier_diversity": round(supplier_diversity, 4)}
+    if backend != "ratio":
+        raise ValueError(f"Unknown KPI backend: {backend}")
+    demand = _demand_by_sku(forecast)
+    bought = alloc.groupby("sku")["qty"].sum() if not alloc.empty else pd.Series(dtype=float)
+    bought = bought.rename("bought")
     df = pd.concat([demand, bought], axis=1).fillna(0)
     service = (df["bought"] / (df["demand"] + 1e-6)).clip(0, 1).mean() if not df.empty else 0.0
     total_cost = float(alloc["cost"].sum()) if not alloc.empty else 0.0
-    suppliers_used = alloc["supplier"].nunique() if not alloc.empty else 0
-    supplier_diversity = float(suppliers_used / max(1, len(alloc))) if not alloc.empty else 0.0
     stockout_risk = float(1.0 - service)
     return {
         "total_cost": round(total_cost, 2),
@@ -23,14 +126,124 @@ def compute_kpis(plan: Dict[str, object], forecast: pd.DataFrame) -> Dict[str, f
     }
 
 
-def score_plan(plan: Dict[str, object], forecast: pd.DataFrame, weights: Dict[str, float]) -> Dict[str, object]:
-    kpis = compute_kpis(plan, forecast)
+def score_plan(
+    plan: Dict[str, object],
+    forecast: pd.DataFrame | DemandMatrix,
+    weights: Dict[str, float],
+    backend: str = "ratio",
+    inventory: Optional[pd.DataFrame] = None,
+    scenarios: Optional[DemandScenarios] = None,
+) -> Dict[str, object]:
+    kpis = compute_kpis(plan, forecast, backend=backend, inventory=inventory, scenarios=scenarios)
+    w = _weights(weights)
+    total = _weighted_score(w, kpis["total_cost"], kpis["service_level"], kpis["supplier_diversity"])
+    return {"score": round(float(total), 3), "kpis": kpis, "weights": w}
+
+
+def _weights(weights: Optional[Dict[str, float]]) -> Dict[str, float]:
     w = {"cost": 0.3, "service": 0.5, "diversity": 0.2}
     w.update(weights or {})
+    return w
+
+
+def _weighted_score(w: Dict[str, float], total_cost, service_level, supplier_diversity):
     # Normalize cost by itself to avoid needing external baseline (lower is better)
-    cost_term = -kpis["total_cost"]
-    service_term = kpis["service_level"] * 1000
-    diversity_term = kpis["supplier_diversity"] * 100
-    total = w["cost"] * cost_term + w["service"] * service_term + w["diversity"] * diversity_term
-    return {"score": round(float(total), 3), "kpis": kpis, "weights": w}
+    cost_term = -total_cost
+    service_term = service_level * 1000
+    diversity_term = supplier_diversity * 100
+    return w["cost"] * cost_term + w["service"] * service_term + w["diversity"] * diversity_term
+
+
+@dataclass
+class PlanBatch:
+    """Many allocations stacked over a shared SKU axis.
+
+    ``qty``/``cost`` are (n_plans, n_skus) sums per SKU; ``listed`` marks SKUs
+    that appear in a plan's allocation (even at zero quantity), and
+    ``suppliers``/``rows`` feed supplier diversity.
+    """
+
+    names: list
+    skus: np.ndarray
+    qty: np.ndarray
+    cost: np.ndarray
+    listed: np.ndarray
+    suppliers: np.ndarray
+    rows: np.ndarray
+
+    @classmethod
+    def from_allocations(
+        cls, allocations: Sequence[pd.DataFrame], skus: Sequence, names: Optional[Sequence[str]] = None
+    ) -> "PlanBatch":
+        """Stack ``allocations`` in one pass; SKUs outside ``skus`` are appended to the axis."""
+        names = list(names) if names is not None else [f"plan-{k}" for k in range(len(allocations))]
+        stacked = pd.concat(
+            [a[["sku", "supplier", "qty", "cost"]].assign(plan=k) for k, a in enumerate(allocations)],
+            ignore_index=True,
+        ) if allocations else pd.DataFrame(columns=["sku", "supplier", "qty", "cost", "plan"])
+        index = pd.Index(skus)
+        extra = pd.Index(stacked["sku"].unique()).difference(index)
+        index = index.append(extra)
+        n_plans, n_skus = len(allocations), len(index)
+        plan = stacked["plan"].to_numpy(dtype=np.int64)
+        flat = plan * n_skus + index.get_indexer(stacked["sku"])
+        size = n_plans * n_skus
+        qty = np.bincount(flat, weights=stacked["qty"].to_numpy(dtype=float), minlength=size)
+        cost = np.bincount(flat, weights=stacked["cost"].to_numpy(dtype=float), minlength=size)
+        listed = np.bincount(flat, minlength=size) > 0
+        pairs = stacked[["plan", "supplier"]].drop_duplicates()
+        return cls(
+            names=names,
+            skus=index.to_numpy(),
+            qty=qty.reshape(n_plans, n_skus),
+            cost=cost.reshape(n_plans, n_skus),
+            listed=listed.reshape(n_plans, n_skus),
+            suppliers=np.bincount(pairs["plan"].to_numpy(dtype=np.int64), minlength=n_plans),
+            rows=np.bincount(plan, minlength=n_plans),
+        )
+
+
+def demand_vector(forecast: pd.DataFrame | DemandMatrix) -> pd.Series:
+    """Per-SKU horizon demand, computed once and shared across a :func:`batch_kpis` call."""
+    return _demand_by_sku(forecast)
+
+
+def batch_kpis(
+    demand: pd.Series, plans: PlanBatch | Sequence[pd.DataFrame], names: Optional[Sequence[str]] = None
+) -> pd.DataFrame:
+    """Ratio-backend KPIs for every plan at once; row ``k`` equals ``compute_kpis`` of plan ``k``."""
+    batch = plans if isinstance(plans, PlanBatch) else PlanBatch.from_allocations(plans, demand.index, names)
+    d = demand.reindex(batch.skus).to_numpy(dtype=float)
+    has_demand = ~np.isnan(d)
+    d = np.nan_to_num(d)
+    # compute_kpis scores the union of demanded SKUs and SKUs listed in the plan
+    scored = has_demand[None, :] | batch.listed
+    ratio = np.clip(batch.qty / (d[None, :] + 1e-6), 0, 1)
+    n_scored = scored.sum(axis=1)
+    service = np.divide((ratio * scored).sum(axis=1), n_scored, out=np.zeros(len(n_scored)), where=n_scored > 0)
+    diversity = np.divide(batch.suppliers, np.maximum(1, batch.rows), dtype=float)
+    return pd.DataFrame(
+        {
+            "plan": batch.names,
+            "total_cost": batch.cost.sum(axis=1).round(2),
+            "service_level": service.round(4),
+            "stockout_risk": (1.0 - service).round(4),
+            "supplier_diversity": diversity.round(4),
+        }
+    )
+
+
+def batch_score(
+    demand: pd.Series,
+    plans: PlanBatch | Sequence[pd.DataFrame],
+    weights: Optional[Dict[str, float]] = None,
+    names: Optional[Sequence[str]] = None,
+) -> pd.DataFrame:
+    """:func:`batch_kpis` plus the ``score_plan`` weighted score, best plan first."""
+    kpis = batch_kpis(demand, plans, names)
+    w = _weights(weights)
+    kpis["score"] = _weighted_score(
+        w, kpis["total_cost"], kpis["service_level"], kpis["supplier_diversity"]
+    ).round(3)
+    return kpis.sort_values("score", ascending=False, kind="stable").reset_index(drop=True)
 
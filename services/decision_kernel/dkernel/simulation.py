@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from dkernel.features.matrix import DemandMatrix
+
+# Annual holding cost as a share of unit cost
+HOLDING_RATE = 0.25
+
+
+@dataclass
+class SimulationResult:
+    """Per-SKU outcome of replaying a plan day by day.
+
+    Arrays are ``(n_skus,)`` for a single demand path or ``(n_skus, n_samples)``
+    when simulating sampled demand. ``stockout_days`` counts days on which
+    demand went (partly) unserved; unserved demand is lost, not backordered.
+    """
+
+    skus: np.ndarray
+    days: int
+    demand: np.ndarray
+    served: np.ndarray
+    on_hand: np.ndarray
+    stockout_days: np.ndarray
+    holding_cost: np.ndarray
+    purchase_cost: float
+
+    @property
+    def lost(self) -> np.ndarray:
+        return self.demand - self.served
+
+    def fill(self) -> np.ndarray:
+        """Per-SKU share of demand served; SKUs without demand count as fully served."""
+        return np.divide(self.served, self.demand, out=np.ones_like(self.demand), where=self.demand > 0)
+
+    @property
+    def n_samples(self) -> int:
+        return int(self.demand.shape[1]) if self.demand.ndim > 1 else 1
+
+    def kpis(self) -> Dict[str, float]:
+        """Plan KPIs; totals are per demand path (averaged over samples)."""
+        fill = self.fill()
+        service = float(fill.mean()) if fill.size else 0.0
+        demand = float(self.demand.sum())
+        per_path = 1.0 / self.n_samples
+        holding = float(self.holding_cost.sum()) * per_path
+        return {
+            "service_level": round(service, 4),
+            "stockout_risk": round(1.0 - service, 4),
+            "fill_rate": round(float(self.served.sum()) / demand, 4) if demand > 0 else 1.0,
+            "lost_units": round(float(self.lost.sum()) * per_path, 2),
+            "stockout_day_share": round(float(self.stockout_days.mean()) / max(1, self.days), 4),
+            "ending_on_hand": round(float(self.on_hand.sum()) * per_path, 2),
+            "purchase_cost": round(self.purchase_cost, 2),
+            "holding_cost": round(holding, 2),
+        }
+
+    def to_frame(self) -> pd.DataFrame:
+        """Per-SKU table (averaged over samples)."""
+        mean = (lambda a: a.mean(axis=1)) if self.demand.ndim > 1 else (lambda a: a)
+        return pd.DataFrame(
+            {
+                "sku": self.skus,
+                "demand": mean(self.demand),
+                "served": mean(self.served),
+                "lost": mean(self.lost),
+                "fill": mean(self.fill()),
+                "stockout_days": mean(self.stockout_days.astype(float)),
+                "holding_cost": mean(self.holding_cost),
+                "ending_on_hand": mean(self.on_hand),
+            }
+        )
+
+
+def _demand_grid(demand: pd.DataFrame | DemandMatrix) -> DemandMatrix:
+    if isinstance(demand, DemandMatrix):
+        return demand
+    col = "forecast_qty" if "forecast_qty" in demand.columns else "demand"
+    return DemandMatrix.from_long(demand, value_col=col)
+
+
+def simulate_plan(
+    allocation: pd.DataFrame,
+    demand: pd.DataFrame | DemandMatrix | np.ndarray,
+    inventory: Optional[pd.DataFrame] = None,
+    skus: Optional[np.ndarray] = None,
+    holding_rate: float = HOLDING_RATE,
+) -> SimulationResult:
+    """Replay ``allocation`` against daily demand for every SKU at once.
+
+    ``demand`` is a long forecast frame, a :class:`DemandMatrix`, or a raw
+    ``(n_skus, days[, samples])`` array (any float dtype; NaN counts as no
+    demand) whose rows follow ``skus``. Stock
+    starts at inventory ``on_hand`` (0 if absent); each allocation row
+    arrives at the start of day ``lead_time_days`` (day 0 is the first
+    demand day) and arrivals past the horizon never land. Each day serves
+    ``min(on_hand, demand)`` and charges holding on the closing stock at the
+    allocation's unit price.
+    """
+    if isinstance(demand, np.ndarray):
+        if skus is None:
+            raise ValueError("Raw demand arrays need matching skus")
+        values = demand
+        index = pd.Index(skus)
+    else:
+        grid = _demand_grid(demand)
+        values = grid.values
+        index = pd.Index(grid.skus)
+    n_skus, days = values.shape[:2]
+    extra = values.shape[2:]
+
+    arrivals = np.zeros((n_skus, days + 1))
+    unit_cost = np.zeros(n_skus)
+    if not allocation.empty:
+        pos = index.get_indexer(allocation["sku"])
+        known = pos >= 0
+        pos = pos[known]
+        qty = allocation["qty"].to_numpy(dtype=float)[known]
+        lead = np.clip(allocation["lead_time_days"].to_numpy(dtype=np.int64)[known], 0, days)
+        np.add.at(arrivals, (pos, lead), qty)
+        bought = np.bincount(pos, weights=qty, minlength=n_skus)
+        spend = np.bincount(pos, weights=allocation["cost"].to_numpy(dtype=float)[known], minlength=n_skus)
+        unit_cost = np.divide(spend, bought, out=np.zeros(n_skus), where=bought > 0)
+    purchase_cost = float(allocation["cost"].sum()) if not allocation.empty else 0.0
+
+    on_hand = np.zeros(n_skus)
+    if inventory is not None and not inventory.empty:
+        inv = inventory.drop_duplicates("sku", keep="last").set_index("sku")["on_hand"]
+        on_hand = inv.reindex(index).fillna(0).to_numpy(dtype=float)
+
+    # Trailing sample axes broadcast against per-SKU arrivals and prices
+    col = (slice(None),) + (None,) * len(extra)
+    on_hand = np.broadcast_to(on_hand[col], (n_skus,) + extra).copy()
+    served = np.zeros_like(on_hand)
+    stockout_days = np.zeros(on_hand.shape, dtype=np.int32)
+    holding_units = np.zeros_like(on_hand)
+    for t in range(days):
+        on_hand += arrivals[:, t][col]
+        d = np.nan_to_num(values[:, t])
+        sold = np.minimum(on_hand, d)
+        on_hand -= sold
+        served += sold
+        stockout_days += sold < d
+        holding_units += on_hand
+    holding_cost = holding_units * (unit_cost * holding_rate / 365.0)[col]
+    return SimulationResult(
+        skus=index.to_numpy(),
+        days=days,
+        demand=np.nansum(values, axis=1, dtype=float),
+        served=served,
+        on_hand=on_hand,
+        stockout_days=stockout_days,
+        holding_cost=holding_cost,
+        purchase_cost=purchase_cost,
+    )
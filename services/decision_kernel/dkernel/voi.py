@@ -1,48 +1,338 @@
 from __future__ import annotations
 
-from typing import Dict, List, Optional
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional
 
+import numpy as np
 import pandas as pd
+from scipy.special import ndtr, ndtri
+
+from dkernel.config import get_settings
+from dkernel.forecasting.scenarios import gamma_samples
+from dkernel.simulation import HOLDING_RATE
+
+# Prior uncertainty for inputs that have not been provided
+PRIOR_DEMAND_CV = 1.0  # per-SKU daily rate when sales history is missing
+PRIOR_COVER_DAYS = 14.0  # on-hand when inventory is missing, in days of demand
+PRIOR_COVER_CV = 1.0
+PRIOR_LEAD_DAYS = 14.0  # lead time when offers are missing
+PRIOR_LEAD_CV = 0.5
+LEAD_CV = 0.15  # delivery variability around a quoted lead time
+PRIOR_PRICE = 15.0  # unit cost when offers are missing
+
+# Uncertain inputs and the file that resolves each
+INPUTS = {"demand": "sales.csv", "on_hand": "inventory.csv", "lead_time": "offers.csv"}
+# VoIInputs (mean, cv) fields of each input
+_FIELDS = {"demand": ("rate", "rate_cv"), "on_hand": ("on_hand", "on_hand_cv"), "lead_time": ("lead", "lead_cv")}
+
+_WHY = {
+    "sales.csv": "Forecast uncertainty high for key SKUs; need last 90d sales.",
+    "inventory.csv": "On-hand/safety stock needed to assess service feasibility.",
+    "offers.csv": "Supplier terms required to optimize cost and service.",
+}
+
+
+@dataclass
+class VoIInputs:
+    """Per-SKU means and coefficients of variation of the uncertain planning inputs.
+
+    ``rate`` is mean daily demand, ``on_hand`` units in stock, ``lead`` lead
+    time in days and ``price`` unit cost; a zero CV means the input is known.
+    ``groups`` labels SKUs for group questions (e.g. ABC class).
+    """
+
+    skus: np.ndarray
+    rate: np.ndarray
+    rate_cv: np.ndarray
+    on_hand: np.ndarray
+    on_hand_cv: np.ndarray
+    lead: np.ndarray
+    lead_cv: np.ndarray
+    price: np.ndarray
+    groups: np.ndarray
+
+    @classmethod
+    def from_features(
+        cls, data_health: Dict[str, Any], provided: Optional[Dict[str, bool]] = None, horizon: int = 30
+    ) -> "VoIInputs":
+        """Inputs from feature tables (``demand_matrix`` or ``demand_daily``, plus optional
+        ``inventory``, ``offer_book``/``joined_offers`` and ``sku_stats``).
+
+        Files not marked as provided fall back to the ``PRIOR_*`` uncertainty
+        even if a table for them is present.
+        """
+        from dkernel.features.matrix import DemandMatrix
+        from dkernel.features.offerbook import OfferBook
+        from dkernel.forecasting.scenarios import forecast_error_std
+
+        provided = provided or {}
+        matrix = data_health.get("demand_matrix")
+        if matrix is None:
+            matrix = DemandMatrix.from_long(data_health["demand_daily"])
+        skus = pd.Index(matrix.skus)
+        n = len(skus)
+        days = max(1, matrix.shape[1])
+        rate = np.nansum(matrix.values, axis=1, dtype=np.float64) / days
+
+        if provided.get("sales.csv", False):
+            # std of the mean daily rate over the horizon, from one-day-ahead errors
+            sigma = forecast_error_std(matrix)
+            rate_cv = np.divide(sigma / np.sqrt(horizon), rate, out=np.zeros(n), where=rate > 0)
+        else:
+            rate_cv = np.full(n, PRIOR_DEMAND_CV)
+
+        inventory = data_health.get("inventory")
+        if provided.get("inventory.csv", False) and inventory is not None:
+            inv = inventory.drop_duplicates("sku", keep="last").set_index("sku")["on_hand"]
+            on_hand = inv.reindex(skus).fillna(0).to_numpy(dtype=float)
+            on_hand_cv = np.zeros(n)
+        else:
+            on_hand = rate * PRIOR_COVER_DAYS
+            on_hand_cv = np.full(n, PRIOR_COVER_CV)
+
+        offers = data_health.get("offer_book", data_health.get("joined_offers"))
+        lead = np.full(n, PRIOR_LEAD_DAYS)
+        lead_cv = np.full(n, PRIOR_LEAD_CV)
+        price = np.full(n, PRIOR_PRICE)
+        if provided.get("offers.csv", False) and offers is not None:
+            book = OfferBook.of(offers)
+            best = book.cheapest(skus)
+            found = best >= 0
+            lead[found] = book.lead_time[best[found]]
+            lead_cv[found] = LEAD_CV
+            price[found] = book.price[best[found]]
+
+        groups = np.full(n, "all", dtype=object)
+        stats = data_health.get("sku_stats")
+        if stats is not None and "ABC" in stats.columns:
+            groups = stats.set_index("sku")["ABC"].reindex(skus).fillna("C").to_numpy(dtype=object)
+        return cls(
+            skus=skus.to_numpy(),
+            rate=rate,
+            rate_cv=rate_cv,
+            on_hand=on_hand,
+            on_hand_cv=on_hand_cv,
+            lead=lead,
+            lead_cv=lead_cv,
+            price=price,
+            groups=groups,
+        )
+
+
+class VoIEngine:
+    """Monte Carlo expected value of information for the per-SKU order decision.
+
+    For each SKU the plan orders ``q`` to cover demand over ``lead + horizon``
+    days net of on-hand, choosing ``q`` as the ``service_target`` quantile of
+    net need (the order that minimizes purchase + holding + the shortage
+    penalty that target implies). The value of knowing an input is the drop
+    in expected cost when the order may depend on it: samples are sorted by
+    that input into ``n_bins`` equal bins and the order is re-optimized per
+    bin (a binned partial EVPI). Price enters the cost at its
+    mean; with a service-target policy it does not move the order.
+
+    Standard normal and uniform draws are fixed at construction (common random numbers),
+    and per-SKU results are cached, so :meth:`observe` only re-samples and
+    re-scores the SKUs an answer touches.
+    """
+
+    def __init__(
+        self,
+        inputs: VoIInputs,
+        horizon: int = 30,
+        service_target: float = 0.97,
+        n_samples: int = 256,
+        n_bins: int = 16,
+        seed: Optional[int] = None,
+    ):
+        if n_samples % n_bins:
+            raise ValueError("n_samples must be a multiple of n_bins")
+        self.inputs = inputs
+        self.horizon = int(horizon)
+        self.service_target = float(min(max(service_target, 0.5), 0.999))
+        self.n_samples = int(n_samples)
+        self.n_bins = int(n_bins)
+        self._z = float(ndtri(self.service_target))
+        n = len(inputs.skus)
+        rng = np.random.default_rng(get_settings().SEED if seed is None else seed)
+        self._normals = rng.standard_normal(size=(3, n, self.n_samples), dtype=np.float32)
+        self._uniforms = rng.random(size=(3, n, self.n_samples), dtype=np.float32)
+        self._index = pd.Index(inputs.skus)
+        self.cost0 = np.zeros(n)
+        self.fill0 = np.zeros(n)
+        self.gain = {name: np.zeros(n) for name in INPUTS}
+        self.service_gain = {name: np.zeros(n) for name in INPUTS}
+        self._evaluate(np.arange(n))
+
+    def _samples(self, rows: np.ndarray) -> Dict[str, np.ndarray]:
+        out = {}
+        for k, (name, (mean_attr, cv_attr)) in enumerate(_FIELDS.items()):
+            mean = getattr(self.inputs, mean_attr)[rows]
+            std = mean * getattr(self.inputs, cv_attr)[rows]
+            out[name] = gamma_samples(
+                mean, std, self.n_samples, None, normals=self._normals[k, rows], uniforms=self._uniforms[k, rows]
+            )
+        return out
+
+    def _decide(self, need: np.ndarray, price, under, over):
+        """Best order against ``need`` samples on the last axis; return expected (cost, shortage).
+
+        Need is moment-matched to a normal, the order is its ``service_target``
+        quantile (at least zero) and shortage is the normal loss function.
+        """
+        mu = need.mean(axis=-1)
+        sd = need.std(axis=-1)
+        q = np.maximum(mu + self._z * sd, 0.0)
+        z = np.divide(q - mu, sd, out=np.zeros_like(mu), where=sd > 0)
+        loss = sd * (np.exp(-0.5 * z * z) / np.sqrt(2 * np.pi) - z * ndtr(-z))
+        short = np.where(sd > 0, loss, np.maximum(mu - q, 0.0))
+        # excess = short + q - need, so holding needs no second pass
+        cost = price * q + (under + over) * short + over * (q - mu)
+        return cost, short
+
+    def _evaluate(self, rows: np.ndarray) -> None:
+        if not len(rows):
+            return
+        s = self._samples(rows)
+        demand = s["demand"] * (s["lead_time"] + self.horizon)
+        need = demand - s["on_hand"]
+        mean_demand = demand.mean(axis=1)
+        price = self.inputs.price[rows].astype(np.float32)
+        # holding over the horizon, and the shortage penalty that makes the target the critical ratio
+        over = price * np.float32(HOLDING_RATE * self.horizon / 365.0)
+        under = (price + self.service_target * over) / (1.0 - self.service_target)
+
+        def fill(short):
+            return 1.0 - np.divide(short, mean_demand, out=np.zeros(len(rows)), where=mean_demand > 0)
+
+        cost0, short0 = self._decide(need, price, under, over)
+        self.cost0[rows], self.fill0[rows] = cost0, fill(short0)
+
+        # Optimizing within a bin of m samples flatters any decision, so the
+        # reference is the same in-bin optimum over random (unsorted) bins.
+        shape = (len(rows), self.n_bins, self.n_samples // self.n_bins)
+        price, under, over = price[:, None], under[:, None], over[:, None]
+        ref_cost, ref_short = (a.mean(axis=1) for a in self._decide(need.reshape(shape), price, under, over))
+        for name, (_, cv) in _FIELDS.items():
+            binned = np.take_along_axis(need, np.argsort(s[name], axis=1), axis=1).reshape(shape)
+            cost, short = (a.mean(axis=1) for a in self._decide(binned, price, under, over))
+            uncertain = getattr(self.inputs, cv)[rows] > 0
+            self.gain[name][rows] = np.where(uncertain, np.maximum(ref_cost - cost, 0.0), 0.0)
+            self.service_gain[name][rows] = np.where(uncertain, fill(short) - fill(ref_short), 0.0)
+
+    def observe(self, name: str, values: Optional[Iterable[float]] = None, skus: Optional[Iterable] = None) -> int:
+        """Record that input ``name`` is now known for ``skus`` (all SKUs by default).
+
+        ``values`` (aligned with ``skus``) replaces the input's mean; its CV
+        drops to zero. Only the touched SKUs are re-sampled and re-scored;
+        returns how many that was.
+        """
+        if name not in INPUTS:
+            raise ValueError(f"Unknown input: {name}")
+        rows = np.arange(len(self._index)) if skus is None else self._index.get_indexer(pd.Index(list(skus)))
+        known = rows >= 0
+        rows = rows[known]
+        mean_attr, cv_attr = _FIELDS[name]
+        if values is not None:
+            getattr(self.inputs, mean_attr)[rows] = np.asarray(list(values), dtype=float)[known]
+        getattr(self.inputs, cv_attr)[rows] = 0.0
+        self._evaluate(rows)
+        return int(len(rows))
+
+    def evpi(self) -> pd.DataFrame:
+        """Per input: expected cost saved (summed) and fill rate gained (mean) by knowing it, over all SKUs."""
+        return pd.DataFrame(
+            {
+                "input": list(INPUTS),
+                "file": list(INPUTS.values()),
+                "cost_gain": [float(self.gain[k].sum()) for k in INPUTS],
+                "service_gain": [float(self.service_gain[k].mean()) if len(self.fill0) else 0.0 for k in INPUTS],
+            }
+        )
+
+    def group_evpi(self, name: str = "demand") -> pd.DataFrame:
+        """Value of knowing ``name`` for each SKU group, largest first."""
+        frame = pd.DataFrame({"group": self.inputs.groups, "gain": self.gain[name], "service": self.service_gain[name]})
+        out = frame.groupby("group", sort=True).agg(
+            cost_gain=("gain", "sum"), service_gain=("service", "mean"), skus=("gain", "size")
+        )
+        return out.sort_values("cost_gain", ascending=False, kind="stable").reset_index()
+
+    def rank(self, provided: Optional[Dict[str, bool]] = None) -> List[dict]:
+        """Questions for missing files, then demand confirmations per SKU group, by expected cost saved."""
+        provided = provided or {}
+        items = []
+        for row in self.evpi().itertuples(index=False):
+            if not provided.get(row.file, False):
+                items.append(
+                    {
+                        "id": row.file,
+                        "text": f"Please provide {row.file}",
+                        "why": _WHY[row.file],
+                        "voi": round(row.cost_gain, 2),
+                        "service_gain": round(row.service_gain, 4),
+                    }
+                )
+        if provided.get("sales.csv", False):
+            for g in self.group_evpi("demand").itertuples(index=False):
+                if g.cost_gain > 0:
+                    label = "all" if g.group == "all" else f"class-{g.group}"
+                    items.append(
+                        {
+                            "id": f"demand:{g.group}",
+                            "text": f"Confirm expected demand for the {g.skus} {label} SKUs",
+                            "why": "Their forecast error moves the best order quantity the most.",
+                            "voi": round(g.cost_gain, 2),
+                            "service_gain": round(g.service_gain, 4),
+                        }
+                    )
+        items.sort(key=lambda x: x.get("voi", 0), reverse=True)
+        return items
+
+
+def _has_demand(data_health: Optional[Dict[str, Any]]) -> bool:
+    """Whether ``data_health`` carries demand for at least one SKU."""
+    if not data_health:
+        return False
+    matrix = data_health.get("demand_matrix")
+    if matrix is not None:
+        return matrix.shape[0] > 0
+    demand_daily = data_health.get("demand_daily")
+    return demand_daily is not None and len(demand_daily) > 0
 
 
 def pick_questions(
     context: Dict[str, bool] | None = None,
-    data_health: Optional[Dict[str, pd.DataFrame]] = None,
+    data_health: Optional[Dict[str, Any]] = None,
+    engine: Optional[VoIEngine] = None,
+    service_target: float = 0.97,
 ) -> List[dict]:
     """Return ranked VoI questions based on missingness and uncertainty.
 
-    Heuristic: VoI ~ uncertainty (A-class demand variance) * missingness flag.
+    With demand data (a non-empty ``demand_matrix`` or ``demand_daily`` in
+    ``data_health``) or a prebuilt ``engine``, ``voi`` is the expected cost
+    saved by the answer (see :class:`VoIEngine`); keep the engine and call
+    ``engine.observe`` to re-rank incrementally after an answer. Without
+    data, falls back to fixed uncertainty weights per missing file.
     """
     required = ["sales.csv", "inventory.csv", "offers.csv"]
     provided = context or {}
-    missing = {f: (not provided.get(f, False)) for f in required}
+    if engine is None and _has_demand(data_health):
+        engine = VoIEngine(VoIInputs.from_features(data_health, provided), service_target=service_target)
+    if engine is not None:
+        return engine.rank(provided)
 
+    missing = {f: (not provided.get(f, False)) for f in required}
     # Uncertainty proxy
     uncert = {
         "sales.csv": 1.0,
         "inventory.csv": 0.6,
         "offers.csv": 0.7,
     }
-    if data_health and "demand_daily" in data_health:
-        dd = data_health["demand_daily"]
-        # scale by coefficient of variation
-        if not dd.empty:
-            cv = (
-                dd.groupby("sku")["demand"].agg(lambda s: (s.std() / (s.mean() + 1e-6)))
-            ).mean()
-            if pd.notnull(cv):
-                uncert["sales.csv"] = float(min(1.5, max(0.5, cv)))
-
-    why_map = {
-        "sales.csv": "Forecast uncertainty high for key SKUs; need last 90d sales.",
-        "inventory.csv": "On-hand/safety stock needed to assess service feasibility.",
-        "offers.csv": "Supplier terms required to optimize cost and service.",
-    }
-
     items = []
     for f in required:
         if missing[f]:
             voi = round(uncert.get(f, 0.5) * 1.0, 3)
-            items.append({"id": f, "text": f"Please provide {f}", "why": why_map[f], "voi": voi})
+            items.append({"id": f, "text": f"Please provide {f}", "why": _WHY[f], "voi": voi})
     items.sort(key=lambda x: x.get("voi", 0), reverse=True)
     return items
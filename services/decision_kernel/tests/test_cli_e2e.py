@@ -1,3 +1,4 @@
+import json
 from pathlib import Path
 
 from typer.testing import CliRunner
@@ -38,4 +39,96 @@ def test_cli_synth_and_plan(tmp_path: Path):
     )
     assert r2.exit_code == 0, r2.output
     assert plan_path.exists()
+    evidence = json.loads(plan_path.read_text())["evidence"]
+    stages = [n for n in evidence["nodes"] if n["type"] == "stage"]
+    assert [n["id"] for n in stages] == ["stage:load", "stage:features", "stage:forecast", "stage:optimize", "stage:score"]
 
+def test_cli_plan_stream(tmp_path: Path):
+    runner = CliRunner()
+    out_dir = tmp_path / "data"
+    assert runner.invoke(app, ["synth", "--out", str(out_dir)]).exit_code == 0
+    plan_path = tmp_path / "plan.json"
+    r = runner.invoke(
+        app,
+        [
+            "plan",
+            "--sales",
+            str(out_dir / "sales.csv"),
+            "--inventory",
+            str(out_dir / "inventory.csv"),
+            "--offers",
+            str(out_dir / "offers.csv"),
+            "--stream",
+            "--chunksize",
+            "1000",
+            "--out",
+            str(plan_path),
+        ],
+    )
+    assert r.exit_code == 0, r.output
+    assert plan_path.exists()
+
+    state = tmp_path / "state.npz"
+    r = runner.invoke(
+        app,
+        [
+            "plan",
+            "--sales",
+            str(out_dir / "sales.csv"),
+            "--inventory",
+            str(out_dir / "inventory.csv"),
+            "--offers",
+            str(out_dir / "offers.csv"),
+            "--forecast-method",
+            "global",
+            "--state",
+            str(state),
+        ],
+    )
+    assert r.exit_code == 2 and "batch --forecast-method" in r.output
+    assert not state.exists()
+
+
+def test_cli_simulate_replays_saved_allocation(tmp_path: Path):
+    import json
+
+    runner = CliRunner()
+    out_dir = tmp_path / "data"
+    assert runner.invoke(app, ["synth", "--out", str(out_dir)]).exit_code == 0
+    paths = ["--sales", str(out_dir / "sales.csv"), "--inventory", str(out_dir / "inventory.csv")]
+    paths += ["--offers", str(out_dir / "offers.csv")]
+    alloc = tmp_path / "alloc.csv"
+    r = runner.invoke(
+        app, ["plan", *paths, "--out", str(tmp_path / "plan.json"), "--allocation-out", str(alloc),
+              "--kpi-backend", "simulation"],
+    )
+    assert r.exit_code == 0, r.output
+    assert "holding_cost" in json.loads(r.output)
+    per_sku = tmp_path / "sim.csv"
+    r2 = runner.invoke(app, ["simulate", *paths, "--allocation", str(alloc), "--horizon", "30", "--out", str(per_sku)])
+    assert r2.exit_code == 0, r2.output
+    report = json.loads(r2.output)
+    assert report["days"] == 30 and 0.0 <= report["service_level"] <= 1.0
+    assert per_sku.exists()
+
+
+def test_cli_compare_ranks_grid_and_saved_allocations(tmp_path: Path):
+    import json
+
+    runner = CliRunner()
+    out_dir = tmp_path / "data"
+    assert runner.invoke(app, ["synth", "--out", str(out_dir)]).exit_code == 0
+    paths = ["--sales", str(out_dir / "sales.csv"), "--inventory", str(out_dir / "inventory.csv")]
+    paths += ["--offers", str(out_dir / "offers.csv")]
+    alloc = tmp_path / "alloc.csv"
+    r = runner.invoke(app, ["plan", *paths, "--out", str(tmp_path / "plan.json"), "--allocation-out", str(alloc)])
+    assert r.exit_code == 0, r.output
+    r2 = runner.invoke(
+        app, ["compare", *paths, "--budgets", "2000,8000", "--slts", "0.9,0.97", "--allocations", str(alloc),
+              "--weights", "cost=0.1,service=0.9"],
+    )
+    assert r2.exit_code == 0, r2.output
+    ranked = json.loads(r2.output)
+    assert len(ranked) == 5 and "alloc.csv" in {p["plan"] for p in ranked}
+    scores = [p["score"] for p in ranked]
+    assert scores == sorted(scores, reverse=True)
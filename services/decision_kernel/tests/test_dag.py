@@ -0,0 +1,133 @@
+import pandas as pd
+import pytest
+
+from dkernel.config import get_settings
+from dkernel.dag import ArtifactStore, MemoryStore, Pipeline, PipelineCancelled, Stage
+from dkernel.data.synth import make_synthetic_data
+from dkernel.planning import run_plan
+
+
+def test_budget_change_reruns_only_optimize_and_score(tmp_path):
+    s, i, o = make_synthetic_data(n_skus=30, days=60)
+    sources = {"sales": s, "inventory": i, "offers": o}
+    store = ArtifactStore(tmp_path / "store")
+    cold = run_plan(sources, {"budget": 5000.0}, store=store)
+    assert cold.executed == ["load", "features", "forecast", "optimize", "score"]
+    warm = run_plan(sources, {"budget": 5000.0}, store=store)
+    assert warm.executed == [] and warm["score"] == cold["score"]
+    events = []
+    changed = run_plan(sources, {"budget": 9000.0}, store=store, progress=events.append)
+    assert changed.executed == ["optimize", "score"]
+    assert [(e["stage"], e["status"]) for e in events][-3:] == [
+        ("optimize", "done"),
+        ("score", "running"),
+        ("score", "done"),
+    ]
+    assert changed["score"]["total_cost"] >= cold["score"]["total_cost"]
+    # no store: same result
+    assert run_plan(sources, {"budget": 9000.0})["score"] == changed["score"]
+
+
+def test_seed_change_misses_stored_forecast_and_score(tmp_path, monkeypatch):
+    s, i, o = make_synthetic_data(n_skus=20, days=60)
+    sources = {"sales": s, "inventory": i, "offers": o}
+    store = ArtifactStore(tmp_path / "store")
+    first = run_plan(sources, {"samples": 50}, store=store)
+    monkeypatch.setenv("SEED", str(get_settings().SEED + 1))
+    get_settings.cache_clear()
+    try:
+        reseeded = run_plan(sources, {"samples": 50}, store=store)
+        assert reseeded.executed == ["forecast", "optimize", "score"]
+        assert reseeded["score"] != first["score"]
+        with pytest.raises(ValueError, match="SEED"):
+            run_plan(sources, {"seed": get_settings().SEED - 1}, store=store)
+    finally:
+        monkeypatch.delenv("SEED")
+        get_settings.cache_clear()
+    assert run_plan(sources, {"samples": 50}, store=store).executed == []
+
+
+def test_stateful_forecast_is_not_reused_by_stateless_runs(tmp_path):
+    from dkernel.forecasting.incremental import ForecastState
+
+    s, i, o = make_synthetic_data(n_skus=20, days=60)
+    sources = {"sales": s, "inventory": i, "offers": o}
+    # A state seeded from an older history, then brought up to date by the run
+    early = s[s["date"] < s["date"].min() + pd.Timedelta(days=20)]
+    old = run_plan({**sources, "sales": early}, targets=("features",))
+    state = tmp_path / "state.npz"
+    ForecastState.from_history(old["features"]["demand_matrix"]).save(state)
+    store = ArtifactStore(tmp_path / "store")
+    stateful = run_plan(sources, store=store, options={"state": str(state)})
+    stateless = run_plan(sources, store=store)
+    assert stateless.executed == ["forecast", "optimize", "score"]
+    assert stateless["score"] == run_plan(sources)["score"]
+    assert stateful.executed == ["load", "features", "forecast", "optimize", "score"]
+
+
+def test_store_evicts_least_recently_used(tmp_path):
+    calls = []
+
+    def stage(name):
+        def fn(inputs, params, options):
+            calls.append(name)
+            return b"x" * 1000 + str(params).encode()
+
+        return fn
+
+    pipe = Pipeline(
+        [Stage("a", stage("a"), inputs=("src",), params=("p",)), Stage("b", stage("b"), inputs=("a",))]
+    )
+    store = ArtifactStore(tmp_path, max_bytes=2500)
+    for p in (1, 2, 3):
+        pipe.run({"src": "s"}, {"p": p}, targets=["a"], store=store)
+    assert store.evictions == 1
+    pipe.run({"src": "s"}, {"p": 1}, targets=["a"], store=store)  # evicted: recomputed
+    pipe.run({"src": "s"}, {"p": 3}, targets=["a"], store=store)  # still stored
+    assert calls == ["a", "a", "a", "a"]
+
+
+def test_cancel_stops_before_next_stage_and_memory_store_reuses():
+    s, i, o = make_synthetic_data(n_skus=20, days=60)
+    sources = {"sales": s, "inventory": i, "offers": o}
+    store = MemoryStore()
+    seen = []
+
+    def cancel():
+        seen.append(len(seen))
+        return len(seen) > 3  # let load, features and forecast run
+
+    with pytest.raises(PipelineCancelled):
+        run_plan(sources, store=store, cancel=cancel)
+    assert run_plan(sources, store=store).executed == ["optimize", "score"]
+
+
+def test_cached_inputs_survive_eviction_by_earlier_stages():
+    def blob(inputs, params, options):
+        return "x" * 500 + str(params)
+
+    def join(inputs, params, options):
+        return len(inputs["a"]) + len(inputs["x"])
+
+    pipe = Pipeline(
+        [
+            Stage("a", blob, inputs=("src",)),
+            Stage("x", blob, inputs=("src",), params=("p",)),
+            Stage("c", join, inputs=("a", "x")),
+        ]
+    )
+    store = MemoryStore()
+    first = pipe.run({"src": "s"}, {"p": 1}, store=store)
+    # Storing the new x evicts everything else, including the cached a that c reads
+    store.max_bytes = 600
+    second = pipe.run({"src": "s"}, {"p": 22}, store=store)
+    assert second.executed == ["x", "c"] and second["c"] == first["c"] + 1
+    # An entry that vanishes after its metadata was read is recomputed
+    store.load = lambda key: (_ for _ in ()).throw(FileNotFoundError(key))
+    assert pipe.run({"src": "s"}, {"p": 22}, store=store).executed == ["a", "x", "c"]
+
+
+def test_runs_without_a_store_never_pickle_outputs():
+    pipe = Pipeline([Stage("f", lambda inputs, params, options: lambda: 42, inputs=("src",))])
+    run = pipe.run({"src": "s"})
+    assert run["f"]() == 42 and run.stages[0]["artifact"] is None
@@ -3,6 +3,8 @@ import pytest
 
 from dkernel.data.synth import make_synthetic_data
 from dkernel.data.adapters import load_sales_csv, load_inventory_csv, load_offers_csv
+from dkernel.data.cache import TableCache
+from dkernel.data.validation import SchemaValidationError
 
 
 def test_synth_shapes(tmp_path):
@@ -30,3 +32,53 @@ def test_loaders_invalid_columns(tmp_path):
     with pytest.raises(ValueError):
         load_offers_csv(tmp_path / "x.csv")
 
+
+
+def test_loader_reports_every_invalid_row(tmp_path):
+    pd.DataFrame(
+        {
+            "date": ["2024-01-01", "2024-01-02", "2024-01-03", "2024-01-04"],
+            "sku": ["A", "B", "C", "D"],
+            "qty": [1, -2, 3, "x"],
+            "price": [1.0, 2.0, -3.0, 4.0],
+        }
+    ).to_csv(tmp_path / "sales.csv", index=False)
+    with pytest.raises(SchemaValidationError) as exc:
+        load_sales_csv(tmp_path / "sales.csv")
+    errors = exc.value.errors
+    assert errors[["row", "column"]].values.tolist() == [[1, "qty"], [2, "price"], [3, "qty"]]
+
+
+def test_offers_lead_time_must_be_integer(tmp_path):
+    pd.DataFrame(
+        {
+            "supplier": ["S1", "S2"],
+            "sku": ["A", "A"],
+            "price": [1.0, 2.0],
+            "moq": [1, 1],
+            "lead_time_days": [3, 2.5],
+            "validity_to": ["2030-01-01", "2030-01-01"],
+        }
+    ).to_csv(tmp_path / "offers.csv", index=False)
+    with pytest.raises(ValueError, match="valid integer"):
+        load_offers_csv(tmp_path / "offers.csv")
+
+
+def test_table_cache_hit_and_eviction(tmp_path):
+    sales, inventory, offers = make_synthetic_data(n_skus=10, days=30, n_suppliers=3)
+    sales.to_csv(tmp_path / "sales.csv", index=False)
+    offers.to_csv(tmp_path / "offers.csv", index=False)
+    cache = TableCache(tmp_path / "cache")
+    first = cache.load(tmp_path / "sales.csv", "sales")
+    second = cache.load(tmp_path / "sales.csv", "sales")
+    assert (cache.hits, cache.misses) == (1, 1)
+    pd.testing.assert_frame_equal(first, second)
+    pd.testing.assert_frame_equal(
+        load_offers_csv(tmp_path / "offers.csv"), cache.load(tmp_path / "offers.csv", "offers")
+    )
+
+    # Writing past a tiny size budget evicts older entries
+    inventory.to_csv(tmp_path / "inventory.csv", index=False)
+    small = TableCache(tmp_path / "cache", max_bytes=1)
+    small.load(tmp_path / "inventory.csv", "inventory")
+    assert small.evictions >= 2
@@ -1,5 +1,11 @@
+import numpy as np
+import pandas as pd
+
+from dkernel.data.adapters import load_sales_csv
+from dkernel.data.streaming import stream_sales_aggregates
 from dkernel.data.synth import make_synthetic_data
 from dkernel.features.pipeline import build_feature_tables
+from dkernel.forecasting.batch import METHODS, batch_forecast
 
 
 def test_build_feature_tables():
@@ -11,3 +17,65 @@ def test_build_feature_tables():
     assert {"supplier", "reliability"}.issubset(feats["supplier_reliability"].columns)
     assert {"supplier", "sku", "price", "moq", "lead_time_days"}.issubset(feats["joined_offers"].columns)
 
+
+
+def test_streaming_aggregates_match_in_memory(tmp_path):
+    s, i, o = make_synthetic_data(n_skus=12, days=20, n_suppliers=3)
+    s.to_csv(tmp_path / "sales.csv", index=False)
+    full = build_feature_tables(load_sales_csv(tmp_path / "sales.csv"), i, o)
+    streamed = build_feature_tables(stream_sales_aggregates(tmp_path / "sales.csv", chunksize=37), i, o)
+    pd.testing.assert_frame_equal(full["demand_daily"], streamed["demand_daily"])
+    pd.testing.assert_frame_equal(full["sku_stats"], streamed["sku_stats"])
+    # Many small chunks folded one by one give the same aggregate
+    tiny = stream_sales_aggregates(tmp_path / "sales.csv", chunksize=11)
+    pd.testing.assert_frame_equal(tiny.demand_daily, streamed["demand_daily"])
+
+
+def test_demand_matrix_matches_long_format():
+    s, i, o = make_synthetic_data(n_skus=12, days=20, n_suppliers=3)
+    feats = build_feature_tables(s, i, o)
+    dd, m = feats["demand_daily"], feats["demand_matrix"]
+    assert m.shape == (dd["sku"].nunique(), dd["date"].nunique())
+    pd.testing.assert_frame_equal(m.to_long(), dd, check_dtype=False)
+    mean, std = m.row_stats()
+    g = dd.groupby("sku")["demand"]
+    assert list(m.skus) == list(g.mean().index)
+    assert np.allclose(mean, g.mean().to_numpy())
+    assert np.allclose(std, g.std().to_numpy(), equal_nan=True)
+
+
+def test_offer_book_lookups_match_frame_filters():
+    s, i, o = make_synthetic_data(n_skus=15, days=10, n_suppliers=4)
+    feats = build_feature_tables(s, i, o)
+    offers, book = feats["joined_offers"], feats["offer_book"]
+    assert book.n_offers == len(offers) and book.offsets[-1] == len(offers)
+    assert (np.diff(book.offer_sku) >= 0).all()
+    banned = set(offers["supplier"].unique()[:2])
+    allowed = ~book.supplier_mask(banned)
+    bulk = book.cheapest(list(book.skus) + ["UNKNOWN"], allowed=allowed)
+    assert bulk[-1] == -1
+    for sku, row in zip(book.skus, bulk):
+        cand = offers[(offers["sku"] == sku) & ~offers["supplier"].isin(banned)]
+        assert book.cheapest_allowed(sku, banned) == row
+        if cand.empty:
+            assert row == -1
+        else:
+            best = cand.sort_values("price", kind="stable").iloc[0]
+            taken = book.take([row]).iloc[0]
+            assert (taken["supplier"], taken["price"], taken["ABC"]) == (best["supplier"], best["price"], best["ABC"])
+    assert book.cheapest_allowed("UNKNOWN") == -1
+    assert book.cheapest_allowed(book.skus[0], ["Nobody"]) == book.offsets[0]
+    # Lookups hash the book's SKUs and suppliers once
+    assert book.sku_index is book.sku_index and book.supplier_index is book.supplier_index
+
+
+def test_float32_demand_matrix_halves_memory_and_keeps_forecasts():
+    s, i, o = make_synthetic_data(n_skus=12, days=40, n_suppliers=3)
+    m64 = build_feature_tables(s, i, o)["demand_matrix"]
+    m32 = build_feature_tables(s, i, o, matrix_dtype="float32")["demand_matrix"]
+    assert m32.values.dtype == np.float32 and m32.values.nbytes * 2 == m64.values.nbytes
+    assert np.array_equal(m32.totals(), m64.totals())
+    for method in METHODS:
+        np.testing.assert_allclose(
+            batch_forecast(m32, 14, method), batch_forecast(m64, 14, method), rtol=1e-6
+        )
@@ -1,6 +1,13 @@
+import numpy as np
+import pandas as pd
+import pytest
+
 from dkernel.data.synth import make_synthetic_data
 from dkernel.features.pipeline import build_feature_tables
-from dkernel.forecasting.darts_forecaster import forecast_demand
+from dkernel.forecasting.batch import METHODS
+from dkernel.forecasting.darts_forecaster import _fallback_forecast, forecast_demand
+from dkernel.forecasting.incremental import ForecastState, verify_incremental
+from dkernel.forecasting.parallel import SKU_MODELS, parallel_forecast
 
 
 def test_forecast_demand():
@@ -13,3 +20,212 @@ def test_forecast_demand():
     counts = fc.groupby("sku").size()
     assert counts.min() == 10 and counts.max() == 10
 
+
+
+def test_batch_moving_average_matches_per_sku_fallback():
+    s, i, o = make_synthetic_data(n_skus=8, days=30, n_suppliers=2)
+    feats = build_feature_tables(s, i, o)
+    fc = forecast_demand(feats["demand_matrix"], horizon=10)
+    for sku, grp in feats["demand_daily"].groupby("sku"):
+        expected = np.round(_fallback_forecast(grp.sort_values("date")["demand"], 10), 3)
+        assert np.array_equal(fc[fc["sku"] == sku]["forecast_qty"].to_numpy(), expected)
+
+
+def test_batch_methods_shape_and_determinism():
+    s, i, o = make_synthetic_data(n_skus=8, days=30, n_suppliers=2)
+    feats = build_feature_tables(s, i, o)
+    for method in METHODS:
+        fc1 = forecast_demand(feats["demand_daily"], horizon=10, method=method)
+        fc2 = forecast_demand(feats["demand_daily"], horizon=10, method=method)
+        assert len(fc1) == 8 * 10
+        assert (fc1["forecast_qty"] >= 0).all()
+        pd.testing.assert_frame_equal(fc1, fc2)
+
+
+def test_parallel_forecast_matches_serial():
+    s, i, o = make_synthetic_data(n_skus=8, days=30, n_suppliers=2)
+    m = build_feature_tables(s, i, o)["demand_matrix"]
+    serial, _ = parallel_forecast(m, 10, model="fallback", n_workers=1)
+    parallel, fallbacks = parallel_forecast(m, 10, model="fallback", n_workers=2)
+    assert fallbacks == 0
+    assert np.array_equal(serial, parallel)
+    # per-SKU fallback equals the batch moving average
+    fc = forecast_demand(m, horizon=10, method="fallback", n_workers=2)
+    pd.testing.assert_frame_equal(fc, forecast_demand(m, horizon=10))
+
+
+def test_parallel_forecast_falls_back_per_sku(monkeypatch):
+    s, i, o = make_synthetic_data(n_skus=4, days=30, n_suppliers=2)
+    m = build_feature_tables(s, i, o)["demand_matrix"]
+
+    def flaky(row, horizon):
+        if np.nansum(row) > np.nanmedian(np.nansum(m.values, axis=1)):
+            raise RuntimeError("model failed")
+        return np.zeros(horizon)
+
+    monkeypatch.setitem(SKU_MODELS, "flaky", flaky)
+    out, fallbacks = parallel_forecast(m, 5, model="flaky", n_workers=1)
+    expected, _ = parallel_forecast(m, 5, model="fallback", n_workers=1)
+    failed = np.nansum(m.values, axis=1) > np.nanmedian(np.nansum(m.values, axis=1))
+    assert fallbacks == failed.sum() > 0
+    assert np.array_equal(out[failed], expected[failed])
+    assert (out[~failed] == 0).all()
+
+
+def test_global_model_train_persist_and_warm_load(tmp_path):
+    pytest.importorskip("darts")
+    from dkernel.forecasting.global_model import _LOADED, load_global_model, train_global_model
+
+    s, i, o = make_synthetic_data(n_skus=6, days=60, n_suppliers=2)
+    feats = build_feature_tables(s, i, o)
+    report = train_global_model(feats["demand_matrix"], tmp_path, lags=7, holdout=7)
+    assert report["version"] == 1 and report["mae_global"] >= 0 and report["mae_fallback"] >= 0
+    assert (tmp_path / "v1" / "model.pkl").exists()
+
+    fc = forecast_demand(feats["demand_matrix"], horizon=5, method="global", model_dir=str(tmp_path))
+    assert len(fc) == 6 * 5 and (fc["forecast_qty"] >= 0).all()
+    model, _ = load_global_model(tmp_path)
+    assert load_global_model(tmp_path)[0] is model  # warm
+    _LOADED.clear()
+
+
+def test_global_model_series_start_at_first_sale(tmp_path):
+    pytest.importorskip("darts")
+    from dkernel.features.matrix import DemandMatrix
+    from dkernel.forecasting.batch import batch_forecast
+    from dkernel.forecasting.global_model import _LOADED, _series, global_forecast, train_global_model
+
+    s, i, o = make_synthetic_data(n_skus=4, days=60, n_suppliers=2)
+    full = build_feature_tables(s, i, o)["demand_matrix"]
+    values = full.values.copy()
+    values[1, :40] = np.nan  # first sale on day 40
+    values[2, :-3] = np.nan  # too new for the lags
+    values[3, :] = np.nan  # never sold
+    matrix = DemandMatrix(full.skus, full.dates, values)
+    rows, series = _series(matrix, min_days=7)
+    assert rows.tolist() == [0, 1]
+    assert series[1].start_time() == full.dates[40] and len(series[1]) == 20
+    assert np.array_equal(series[1].values().ravel(), np.nan_to_num(values[1, 40:]).astype(np.float32))
+
+    train_global_model(matrix, tmp_path, lags=7, holdout=7)
+    fc = global_forecast(matrix, 5, tmp_path)
+    assert np.array_equal(fc[2:], batch_forecast(matrix, 5, "moving_average")[2:])
+    _LOADED.clear()
+
+
+def test_incremental_state_matches_full_recompute(tmp_path):
+    s, i, o = make_synthetic_data(n_skus=8, days=40, n_suppliers=2)
+    dd = build_feature_tables(s, i, o)["demand_daily"]
+    cutoff = dd["date"].max() - pd.Timedelta(days=5)
+    # a SKU first seen after the cutoff must be picked up too
+    dd = dd[(dd["date"] > cutoff) | (dd["sku"] != "SKU-007")].reset_index(drop=True)
+    history = dd[dd["date"] <= cutoff]
+    state = ForecastState.from_history(history)
+    state.save(tmp_path / "state.npz")
+    state = ForecastState.load(tmp_path / "state.npz")
+    state.update(dd[dd["date"] > cutoff])
+    report = verify_incremental(state, dd, horizon=10)
+    assert report["consistent"], report
+    fc = forecast_demand(state, horizon=10)
+    pd.testing.assert_frame_equal(fc, forecast_demand(dd, horizon=10), check_exact=False)
+    with pytest.raises(ValueError):
+        state.update(dd.tail(1))
+
+
+def test_incremental_state_matches_batch_on_short_history():
+    from dkernel.features.matrix import DemandMatrix
+
+    # Fewer days than a season: unseen days of the week forecast zero on both paths
+    values = np.array([[1.0, 2.0, 3.0, 4.0], [5.0, np.nan, 7.0, 8.0], [np.nan, np.nan, np.nan, 9.0]])
+    skus = np.array(["A", "B", "C"], dtype=object)
+    matrix = DemandMatrix(skus, pd.date_range("2025-01-01", periods=4), values)
+    report = verify_incremental(ForecastState.from_history(matrix), matrix, horizon=10)
+    assert report["consistent"], report
+    assert np.array_equal(ForecastState.from_history(matrix).forecast(7, "seasonal_naive")[0], [0, 0, 0, 1, 2, 3, 4])
+
+
+def test_scenarios_are_float32_and_centered_on_forecast():
+    from dkernel.features.matrix import DemandMatrix
+    from dkernel.forecasting.scenarios import sample_scenarios, scenarios_for
+
+    values = np.array([[10.0] * 5, [4.0] * 5, [0.0] * 5])
+    point = DemandMatrix(np.array(["A", "B", "C"], dtype=object), pd.date_range("2025-01-01", periods=5), values)
+    sc = sample_scenarios(point, np.array([3.0, 0.0, 2.0]), n_samples=20000, seed=7)
+    assert sc.samples.dtype == np.float32 and sc.shape == (3, 5, 20000)
+    assert (sc.samples >= 0).all()
+    assert np.allclose(sc.samples[0].mean(axis=1), 10.0, atol=0.1)
+    assert np.allclose(sc.samples[0].std(axis=1), 3.0, atol=0.1)
+    assert (sc.samples[1] == 4.0).all() and (sc.samples[2] == 0.0).all()  # no error / no demand
+    assert np.array_equal(sample_scenarios(point, np.ones(3), 4, seed=1).samples,
+                          sample_scenarios(point, np.ones(3), 4, seed=1).samples)
+
+    s, i, o = make_synthetic_data(n_skus=5, days=40, n_suppliers=2)
+    history = build_feature_tables(s, i, o)["demand_matrix"]
+    fc = DemandMatrix(history.skus, pd.date_range("2030-01-01", periods=7), np.full((5, 7), 20.0))
+    assert scenarios_for(fc, history, 50).totals().shape == (5, 50)
+
+
+def test_gamma_samples_keep_moments_for_intermittent_demand():
+    from dkernel.forecasting.scenarios import gamma_samples
+
+    # mean 2 with std 5 and 10: gamma shape k < 1, where the Wilson-Hilferty cube is biased
+    mean, std = np.array([2.0, 2.0, 10.0]), np.array([5.0, 10.0, 3.0])
+    n = 400_000
+    rng = np.random.default_rng(3)
+    fixed = gamma_samples(
+        mean, std, n, None,
+        normals=rng.standard_normal((3, n), dtype=np.float32),
+        uniforms=rng.random((3, n), dtype=np.float32),
+    )
+    for draws in (gamma_samples(mean, std, n, np.random.default_rng(5)), fixed):
+        assert draws.dtype == np.float32 and (draws >= 0).all()
+        assert np.allclose(draws.mean(axis=1, dtype=np.float64), mean, rtol=0.05)
+        assert np.allclose(draws.std(axis=1, dtype=np.float64), std, rtol=0.1)
+    with pytest.raises(ValueError):
+        gamma_samples(mean, std, 4, None, normals=np.zeros((3, 4), dtype=np.float32))
+
+
+def test_parallel_workers_close_shared_memory_and_skip_unsold_days(monkeypatch):
+    from multiprocessing import shared_memory
+
+    from dkernel.forecasting import parallel
+
+    values = np.array([[np.nan, np.nan, 2.0, np.nan, 4.0], [1.0, 2.0, 3.0, 4.0, 5.0]])
+    blocks = [shared_memory.SharedMemory(create=True, size=values.nbytes) for _ in range(2)]
+    closed, close = set(), shared_memory.SharedMemory.close
+
+    def tracked_close(self):
+        closed.add(self.name)
+        close(self)
+
+    monkeypatch.setattr(shared_memory.SharedMemory, "close", tracked_close)
+    try:
+        np.ndarray(values.shape, buffer=blocks[0].buf)[:] = values
+        parallel._init_worker(blocks[0].name, values.shape, blocks[1].name, (2, 3), 42, True)
+        assert parallel._run_shard(0, 2, "fallback", 3) == 0
+        assert closed == {b.name for b in blocks}  # the worker's handles were closed
+        out = np.ndarray((2, 3), buffer=blocks[1].buf).copy()
+        assert np.array_equal(out[0], parallel._sku_fallback(values[0], 3))
+    finally:
+        monkeypatch.undo()
+        for b in blocks:
+            b.close()
+            b.unlink()
+    # Days before the first sale are dropped; later gaps count as zero demand
+    assert np.array_equal(parallel._recorded_span(values[0]), [2.0, 0.0, 4.0])
+    with pytest.raises(ValueError):
+        parallel._recorded_span(np.full(4, np.nan))
+
+
+def test_state_file_requires_a_batch_method(tmp_path):
+    from dkernel.planning import run_plan
+
+    s, i, o = make_synthetic_data(n_skus=4, days=30, n_suppliers=2)
+    state = tmp_path / "state.npz"
+    with pytest.raises(ValueError, match="batch methods"):
+        run_plan(
+            {"sales": s, "inventory": i, "offers": o},
+            {"forecast_method": "exponential_smoothing"},
+            options={"state": str(state)},
+        )
+    assert not state.exists()
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from dkernel.data.synth import make_synthetic_data
+from dkernel.features.pipeline import build_feature_tables
+from dkernel.forecasting.darts_forecaster import forecast_demand
+from dkernel.forecasting.scenarios import forecast_error_std
+from dkernel.netting import (
+    lead_time_demand,
+    net_requirements,
+    requirements_frame,
+    service_z,
+)
+from dkernel.optimization.ortools_optimizer import optimize_plan
+
+
+def test_lead_time_demand_extends_past_horizon():
+    values = np.array([[1.0, 2.0, 3.0], [4.0, 4.0, 4.0]])
+    got = lead_time_demand(values, np.array([2, 5]))
+    assert got.tolist() == [3.0, 20.0]
+    assert lead_time_demand(values, np.array([0, 3])).tolist() == [0.0, 12.0]
+
+
+def test_net_requirements_matches_row_by_row():
+    s, i, o = make_synthetic_data(n_skus=12, days=30, n_suppliers=3)
+    feats = build_feature_tables(s, i, o)
+    fc = forecast_demand(feats["demand_daily"], horizon=14)
+    inv = feats["inventory"]
+    inv.loc[inv["sku"] == "SKU-000", "on_hand"] = 10**6  # well stocked -> nothing to order
+    net = net_requirements(fc, inv, feats["joined_offers"]).set_index("sku")
+
+    for sku, row in net.iterrows():
+        offer = feats["joined_offers"][feats["joined_offers"]["sku"] == sku].sort_values("price").iloc[0]
+        lead = int(offer["lead_time_days"])
+        daily = fc[fc["sku"] == sku].sort_values("date")["forecast_qty"].to_numpy()
+        demand = daily[:lead].sum() + daily.mean() * max(0, lead - len(daily))
+        stock = inv[inv["sku"] == sku].iloc[0]
+        expected = max(0.0, demand + stock["safety_stock"] - stock["on_hand"])
+        assert row["lead_time_days"] == lead
+        assert row["net_qty"] == pytest.approx(expected)
+    assert net.loc["SKU-000", "net_qty"] == 0.0
+
+    req = requirements_frame(net.reset_index())
+    assert "SKU-000" not in set(req["sku"])
+    res = optimize_plan(req, feats["joined_offers"], service_target=1.0, budget=1e9)
+    assert set(res["allocation"]["sku"]) == set(req["sku"])
+
+
+def test_dynamic_safety_stock_scales_with_error_and_target():
+    dates = pd.date_range("2024-01-01", periods=60, freq="D")
+    rng = np.random.default_rng(0)
+    history = pd.DataFrame(
+        {
+            "date": np.tile(dates, 2),
+            "sku": np.repeat(["FLAT", "NOISY"], 60),
+            "demand": np.r_[np.full(60, 10.0), 10.0 + rng.normal(0, 3, 60)],
+        }
+    )
+    _, i, o = make_synthetic_data(n_skus=2, days=20, n_suppliers=2)
+    feats = build_feature_tables(history.rename(columns={"demand": "qty"}).assign(price=1.0), i, o)
+    sigma = forecast_error_std(feats["demand_matrix"])
+    assert sigma[0] == pytest.approx(0.0) and sigma[1] > 1.0
+
+    fc = forecast_demand(feats["demand_matrix"], horizon=14)
+    offers = pd.DataFrame(
+        {"supplier": ["S"] * 2, "sku": ["FLAT", "NOISY"], "price": [1.0, 1.0], "moq": [1, 1], "lead_time_days": [9, 9]}
+    )
+    inv = pd.DataFrame({"sku": ["FLAT", "NOISY"], "on_hand": [0, 0], "safety_stock": [0, 0]})
+    lo = net_requirements(fc, inv, offers, 0.9, safety="dynamic", history=feats["demand_matrix"]).set_index("sku")
+    hi = net_requirements(fc, inv, offers, 0.99, safety="dynamic", history=feats["demand_matrix"]).set_index("sku")
+    assert lo.loc["FLAT", "safety_stock"] == pytest.approx(0.0)
+    assert hi.loc["NOISY", "safety_stock"] == pytest.approx(service_z(0.99) * sigma[1] * 3.0)
+    assert hi.loc["NOISY", "safety_stock"] > lo.loc["NOISY", "safety_stock"] > 0
+    with pytest.raises(ValueError):
+        net_requirements(fc, inv, offers, safety="dynamic")
@@ -1,3 +1,6 @@
+import numpy as np
+import pytest
+
 from dkernel.data.synth import make_synthetic_data
 from dkernel.features.pipeline import build_feature_tables
 from dkernel.forecasting.darts_forecaster import forecast_demand
@@ -14,3 +17,243 @@ def test_optimize_plan_feasible():
     assert {"sku", "supplier", "qty", "cost"}.issubset(alloc.columns)
     assert res["summary"]["total_cost"] > 0
 
+
+
+def _reference_greedy(forecast, offers, service_target):
+    demand = forecast.groupby("sku")["forecast_qty"].sum()
+    rows = []
+    for sku, d in demand.items():
+        need = float(d) * service_target
+        avail = offers[offers["sku"] == sku].sort_values("price")
+        if need <= 0 or avail.empty:
+            continue
+        best = avail.iloc[0]
+        qty = max(float(best["moq"]), float(np.ceil(need)))
+        rows.append((sku, best["supplier"], float(best["price"]), qty, qty * float(best["price"])))
+    return rows
+
+
+def test_vectorized_greedy_matches_reference():
+    s, i, o = make_synthetic_data(n_skus=30, days=20, n_suppliers=4)
+    feats = build_feature_tables(s, i, o)
+    fc = forecast_demand(feats["demand_daily"], horizon=7)
+    fc.loc[fc["sku"] == "SKU-001", "forecast_qty"] = 0.0  # no need -> skipped
+    offers = feats["joined_offers"][feats["joined_offers"]["sku"] != "SKU-002"]  # no offer -> skipped
+    res = optimize_plan(fc, offers, service_target=0.95, budget=5000)
+    alloc = res["allocation"]
+    got = list(alloc[["sku", "supplier", "price", "qty", "cost"]].itertuples(index=False, name=None))
+    assert got == _reference_greedy(fc, offers, 0.95)
+    assert res["summary"]["within_budget"] == (res["summary"]["total_cost"] <= 5000)
+
+
+def _plan_inputs(n_skus=40):
+    s, i, o = make_synthetic_data(n_skus=n_skus, days=20, n_suppliers=4)
+    feats = build_feature_tables(s, i, o)
+    return forecast_demand(feats["demand_daily"], horizon=7), feats["joined_offers"]
+
+
+def test_milp_respects_budget_and_beats_trimmed_greedy():
+    from dkernel.optimization.milp import AllocationProblem, budget_greedy
+
+    fc, offers = _plan_inputs()
+    full = optimize_plan(fc, offers, service_target=0.95, budget=float("inf"))["summary"]["total_cost"]
+    budget = full * 0.4
+    res = optimize_plan(fc, offers, service_target=0.95, budget=budget, method="milp", time_limit=5)
+    summary = res["summary"]
+    assert summary["within_budget"] and res["allocation"]["cost"].sum() <= budget + 1e-6
+    assert res["allocation"]["sku"].is_unique
+    problem = AllocationProblem.build(fc, offers, 0.95)
+    assert summary["expected_service"] >= round(problem.service(*budget_greedy(problem, budget)), 4)
+
+
+def test_repair_budget_trims_rounded_plans_back_within_budget():
+    from dkernel.optimization.milp import AllocationProblem, repair_budget
+
+    fc, offers = _plan_inputs(n_skus=15)
+    problem = AllocationProblem.build(fc, offers, 0.95)
+    pick = problem.cheapest_fill()
+    qty = problem.cap[pick]
+    spend = float(qty @ problem.price[pick])
+    same = repair_budget(problem, pick, qty, spend)
+    assert not same[2] and np.array_equal(same[1], qty)
+    # Just over budget, as rounding a solver's near-integral quantities can leave it
+    budget = spend - 0.01
+    new_pick, new_qty, repaired = repair_budget(problem, pick, qty, budget)
+    assert repaired and float(new_qty @ problem.price[new_pick]) <= budget
+    assert (new_qty >= problem.moq[new_pick]).all()
+    assert problem.service(new_pick, new_qty) > 0.9 * problem.service(pick, qty)
+
+
+def test_milp_full_budget_serves_everything():
+    fc, offers = _plan_inputs(n_skus=15)
+    res = optimize_plan(fc, offers, service_target=0.9, budget=1e9, method="milp", time_limit=5)
+    assert res["summary"]["expected_service"] == 1.0
+    merged = res["allocation"].merge(offers, on=["sku", "supplier"])
+    assert (merged["qty"] >= merged["moq"]).all()
+
+
+def test_milp_scipy_solver_and_lead_time_filter():
+    from dkernel.optimization.milp import milp_allocate
+
+    fc, offers = _plan_inputs(n_skus=15)
+    alloc, summary = milp_allocate(fc, offers, 0.9, budget=1e9, max_lead_time=10, solver="scipy", time_limit=5)
+    assert summary["solver"] == "scipy" and summary["status"] == "optimal"
+    assert (alloc["lead_time_days"] <= 10).all()
+
+
+def test_milp_ortools_bulk_model_matches_scipy():
+    pytest.importorskip("ortools")
+    from dkernel.optimization.milp import milp_allocate
+
+    fc, offers = _plan_inputs(n_skus=15)
+    budget = optimize_plan(fc, offers, service_target=0.9, budget=float("inf"))["summary"]["total_cost"] * 0.5
+    _, by_scipy = milp_allocate(fc, offers, 0.9, budget=budget, solver="scipy", time_limit=10)
+    _, by_ortools = milp_allocate(fc, offers, 0.9, budget=budget, solver="ortools", time_limit=10)
+    assert by_scipy["status"] == by_ortools["status"] == "optimal"
+    assert by_ortools["expected_service"] == by_scipy["expected_service"]
+
+
+def test_large_milp_requests_route_to_decomposed(monkeypatch):
+    from dkernel.config import get_settings
+
+    fc, offers = _plan_inputs(n_skus=30)
+    monkeypatch.setenv("MILP_MAX_SKUS", "20")
+    get_settings.cache_clear()
+    try:
+        routed = optimize_plan(fc, offers, service_target=0.95, budget=3000.0, method="milp", n_shards=3)
+    finally:
+        monkeypatch.delenv("MILP_MAX_SKUS")
+        get_settings.cache_clear()
+    decomposed = optimize_plan(fc, offers, service_target=0.95, budget=3000.0, method="decomposed", n_shards=3)
+    assert routed["summary"]["method"] == "decomposed" and routed["summary"]["routed_from"] == "milp"
+    assert routed["allocation"].equals(decomposed["allocation"])
+    small = optimize_plan(fc, offers, service_target=0.95, budget=3000.0, method="milp", time_limit=5)
+    assert small["summary"]["method"] == "milp" and "routed_from" not in small["summary"]
+
+
+def test_frontier_matches_budget_greedy_and_is_monotonic():
+    from dkernel.optimization.frontier import compute_frontier
+    from dkernel.optimization.milp import AllocationProblem, budget_greedy
+
+    fc, offers = _plan_inputs()
+    frontier = compute_frontier(fc, offers)
+    pts = frontier.points(25)
+    assert pts["service"].is_monotonic_increasing and pts["cost"].is_monotonic_increasing
+    assert pts["service"].iloc[0] == 0.0 and pts["service"].iloc[-1] == 1.0
+    assert (pts["cost"] <= pts["budget"] + 1e-6).all()
+    problem = AllocationProblem.build(fc, offers, 1.0)
+    for row in pts.iloc[::5].itertuples():
+        assert abs(row.service - problem.service(*budget_greedy(problem, row.budget))) < 1e-9
+    reach = frontier.cost_for([0.5, 0.9])
+    assert (reach["service"] >= [0.5, 0.9]).all()
+
+
+def test_build_plan_reads_options_off_the_frontier():
+    from dkernel.optimizer import build_plan
+
+    fc, offers = _plan_inputs()
+    goal = {"monthly_budget_gbp": 1e9, "service_level_target": 0.9}
+    options = build_plan(goal, forecast=fc, offers=offers)
+    assert [o["name"] for o in options] == ["cost-focused", "balanced", "quality-focused"]
+    costs = [o["estimated_monthly_cost"] for o in options]
+    services = [o["expected_service_level"] for o in options]
+    assert costs == sorted(costs) and services == sorted(services)
+    assert services[1] >= 0.9
+    # Each option carries the batch score of its materialized allocation
+    assert all("score" in o and 0.0 <= o["supplier_diversity"] <= 1.0 for o in options)
+    # A tight budget caps the balanced option at what the budget buys
+    tight = build_plan({**goal, "monthly_budget_gbp": costs[0] / 2}, forecast=fc, offers=offers)
+    assert tight[1]["estimated_monthly_cost"] <= costs[0] / 2
+    assert tight[1]["expected_service_level"] < 0.9
+    assert len(build_plan(goal)) == 3
+
+
+def test_decomposed_meets_budget_and_merges_shards():
+    from dkernel.optimization.frontier import compute_frontier
+
+    fc, offers = _plan_inputs(n_skus=60)
+    frontier = compute_frontier(fc, offers)
+    budget = frontier.max_cost * 0.5
+    res = optimize_plan(fc, offers, service_target=1.0, budget=budget, method="decomposed", n_shards=4)
+    summary, alloc = res["summary"], res["allocation"]
+    assert summary["within_budget"] and alloc["cost"].sum() <= budget + 1e-6
+    assert alloc["sku"].is_unique and alloc["sku"].is_monotonic_increasing
+    conv = summary["convergence"]
+    assert conv["converged"] and conv["shards"] == 4 and conv["iterations"] == len(conv["history"])
+    # Pricing the budget lands close to the frontier at the same spend
+    assert summary["expected_service"] >= float(frontier.evaluate([budget])["service"].iloc[0]) - 0.05
+
+    by_abc = optimize_plan(fc, offers, service_target=1.0, budget=budget, method="decomposed", shard_by="ABC")
+    assert by_abc["summary"]["convergence"]["shards"] == offers["ABC"].nunique()
+    assert by_abc["summary"]["total_cost"] == summary["total_cost"]
+
+
+def test_decomposed_process_pool_matches_serial():
+    fc, offers = _plan_inputs(n_skus=30)
+    kwargs = dict(service_target=0.95, budget=3000.0, method="decomposed", n_shards=3)
+    serial = optimize_plan(fc, offers, n_workers=1, **kwargs)
+    pooled = optimize_plan(fc, offers, n_workers=2, **kwargs)
+    assert serial["allocation"].equals(pooled["allocation"])
+    assert serial["summary"]["convergence"]["history"] == pooled["summary"]["convergence"]["history"]
+
+
+def test_decomposed_workers_close_shared_memory_and_setup_cleans_up(monkeypatch):
+    from multiprocessing import shared_memory
+
+    from dkernel.optimization import decomposition
+    from dkernel.optimization.milp import AllocationProblem
+
+    fc, offers = _plan_inputs(n_skus=20)
+    problem, bounds = decomposition.shard_problem(AllocationProblem.build(fc, offers, 0.95), 2)
+    closed, unlinked = set(), set()
+    close, unlink = shared_memory.SharedMemory.close, shared_memory.SharedMemory.unlink
+
+    def tracked_close(self):
+        closed.add(self.name)
+        close(self)
+
+    def tracked_unlink(self):
+        unlinked.add(self.name)
+        unlink(self)
+
+    def no_pool(**kwargs):
+        raise OSError("no pool")
+
+    monkeypatch.setattr(shared_memory.SharedMemory, "close", tracked_close)
+    monkeypatch.setattr(shared_memory.SharedMemory, "unlink", tracked_unlink)
+    runner = decomposition._ShardRunner(problem, bounds, 1)
+    serial = runner.run(0.0, detail=True)
+    # A worker attaches for one shard and closes its handles before returning
+    shms = [shared_memory.SharedMemory(create=True, size=runner.arrays[n].nbytes) for n in decomposition._FIELDS]
+    try:
+        spec = {}
+        for name, shm in zip(decomposition._FIELDS, shms):
+            arr = np.ascontiguousarray(runner.arrays[name])
+            np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)[:] = arr
+            spec[name] = (shm.name, arr.shape, arr.dtype.str)
+        decomposition._init_worker(spec)
+        a, b = runner.shards[0]
+        pooled = decomposition._run_shard(a, b, 0.0, True)
+        assert closed == {shm.name for shm in shms}
+        assert pooled[:2] == serial[0][:2] and np.array_equal(pooled[2], serial[0][2])
+    finally:
+        for shm in shms:
+            shm.close()
+            shm.unlink()
+    # Segments created before a failed pool start are released
+    closed.clear(), unlinked.clear()
+    monkeypatch.setattr(decomposition, "ProcessPoolExecutor", no_pool)
+    with pytest.raises(OSError):
+        decomposition._ShardRunner(problem, bounds, 2)
+    assert len(unlinked) == len(decomposition._FIELDS) and closed == unlinked
+
+
+def test_decomposed_handles_free_offers():
+    fc, offers = _plan_inputs(n_skus=20)
+    offers = offers.copy()
+    offers.loc[offers.index[:3], "price"] = 0.0
+    res = optimize_plan(fc, offers, service_target=1.0, budget=500.0, method="decomposed", n_shards=2)
+    summary, alloc = res["summary"], res["allocation"]
+    assert np.isfinite(summary["convergence"]["lambda"]) and summary["convergence"]["converged"]
+    assert np.isfinite(summary["total_cost"]) and summary["within_budget"] and len(alloc)
+    assert not alloc[["qty", "cost"]].isna().any().any()
@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+
+from dkernel.data.synth import make_synthetic_data
+from dkernel.features.pipeline import build_feature_tables
+from dkernel.forecasting.darts_forecaster import forecast_demand
+from dkernel.optimization.ortools_optimizer import optimize_plan
+from dkernel.policies import Policies, apply_policies
+
+
+def test_banned_vendors_are_reassigned_to_cheapest_allowed_offer():
+    s, i, o = make_synthetic_data(n_skus=20, days=20, n_suppliers=3)
+    feats = build_feature_tables(s, i, o)
+    fc = forecast_demand(feats["demand_matrix"], horizon=7)
+    res = optimize_plan(fc, feats["offer_book"], service_target=0.9, budget=1e7)
+    offers = feats["joined_offers"]
+    banned = res["allocation"]["supplier"].value_counts().index[0]
+    plans = [
+        apply_policies({**res, "offers": offers}, {"banned_vendors": [banned]}),
+        apply_policies({**res, "offer_book": feats["offer_book"]}, {"banned_vendors": [banned]}),
+    ]
+    for out in plans:
+        alloc = out["allocation"]
+        assert banned not in set(alloc["supplier"])
+        assert out["summary"]["total_cost"] == round(float(alloc["cost"].sum()), 2)
+        moved = alloc.merge(res["allocation"][["sku", "supplier", "qty"]], on="sku", suffixes=("", "_orig"))
+        moved = moved[moved["supplier_orig"] == banned]
+        for row in moved.itertuples():
+            cand = offers[(offers["sku"] == row.sku) & (offers["supplier"] != banned)]
+            best = cand.sort_values("price", kind="stable").iloc[0]
+            assert (row.supplier, row.price) == (best["supplier"], best["price"])
+            assert row.qty == max(float(best["moq"]), row.qty_orig)
+    pd.testing.assert_frame_equal(plans[0]["allocation"], plans[1]["allocation"])
+
+
+def _catalog_plan():
+    from dkernel.benchmarks import _synthetic_catalog
+
+    fc, offers = _synthetic_catalog(400, offers_per_sku=4, n_suppliers=12)
+    offers["category"] = np.where(np.arange(len(offers)) // 4 % 5 == 0, "Frozen", "Ambient")
+    res = optimize_plan(fc, offers, service_target=0.97, budget=float("inf"))
+    return {**res, "offers": offers}, offers
+
+
+def test_compiled_rules_hold_after_bulk_repair():
+    plan, offers = _catalog_plan()
+    out = apply_policies(
+        plan,
+        {
+            "banned_vendors": ["supplier 0", "Supplier 1"],
+            "excluded_categories": ["frozen"],
+            "max_lead_time": 15,
+            "max_spend_share": 0.15,
+            "min_suppliers": 8,
+        },
+    )
+    alloc, report = out["allocation"], out["summary"]["policy"]
+    info = offers.drop_duplicates(["sku", "supplier"]).set_index(["sku", "supplier"])
+    rows = info.loc[list(zip(alloc["sku"], alloc["supplier"]))]
+    assert not alloc["supplier"].isin(["Supplier 0", "Supplier 1"]).any()
+    assert (rows["category"] != "Frozen").all() and (alloc["lead_time_days"] <= 15).all()
+    assert report["dropped_by_category"] == int(plan["allocation"]["sku"].map(
+        offers.drop_duplicates("sku").set_index("sku")["category"]).eq("Frozen").sum())
+    shares = alloc.groupby("supplier")["cost"].sum() / alloc["cost"].sum()
+    assert shares.max() <= 0.15 + 1e-9 and report["violations"] == []
+    assert alloc["supplier"].nunique() >= 8
+    assert out["summary"]["total_cost"] == round(float(alloc["cost"].sum()), 2)
+
+
+def test_policies_from_goal_and_unenforced_categories():
+    goal = {
+        "excludes": ["Supplier 3"],
+        "categories": ["dairy"],
+        "constraints": [{"name": "max lead time", "details": "10"}],
+    }
+    policies = Policies.from_goal(goal)
+    assert policies.banned_vendors == {"supplier 3"} and policies.max_lead_time == 10
+    plan, offers = _catalog_plan()
+    out = apply_policies({**plan, "offers": offers.drop(columns="category")}, policies)
+    assert out["summary"]["policy"]["unenforced"] == ["categories"]
+    assert (out["allocation"]["lead_time_days"] <= 10).all()
+    assert apply_policies(plan, {}) is plan
@@ -1,8 +1,13 @@
+import numpy as np
+import pandas as pd
+import pytest
+
 from dkernel.data.synth import make_synthetic_data
 from dkernel.features.pipeline import build_feature_tables
-from dkernel.forecasting.darts_forecaster import forecast_demand
+from dkernel.forecasting.darts_forecaster import forecast_demand, forecast_matrix
+from dkernel.forecasting.scenarios import scenarios_for
 from dkernel.optimization.ortools_optimizer import optimize_plan
-from dkernel.scoring import compute_kpis, score_plan
+from dkernel.scoring import batch_score, compute_kpis, demand_vector, scenario_kpis, score_plan
 
 
 def test_scoring_monotonic_with_weights():
@@ -15,3 +20,58 @@ def test_scoring_monotonic_with_weights():
     # Service-weighted score should be higher than cost-weighted since cost term is negative
     assert score_hi_service["score"] > score_hi_cost["score"]
 
+
+
+def test_scenario_risk_kpis_match_per_sample_loop():
+    s, i, o = make_synthetic_data(n_skus=8, days=40, n_suppliers=2)
+    feats = build_feature_tables(s, i, o)
+    fcm = forecast_matrix(feats["demand_matrix"], horizon=10)
+    fc = forecast_demand(feats["demand_matrix"], horizon=10)
+    res = optimize_plan(fc, feats["joined_offers"], service_target=0.9, budget=1e7)
+    scen = scenarios_for(fcm, feats["demand_matrix"], 200, seed=3)
+    kpis, per_sku = scenario_kpis(res, scen, inventory=feats["inventory"], alpha=0.9)
+
+    bought = res["allocation"].groupby("sku")["qty"].sum()
+    stock = feats["inventory"].set_index("sku")["on_hand"]
+    price = (res["allocation"].groupby("sku")["cost"].sum() / bought)
+    lost = []
+    short = {sku: [] for sku in scen.skus}
+    for k in range(scen.n_samples):
+        total = 0.0
+        for row, sku in enumerate(scen.skus):
+            gap = max(0.0, float(scen.samples[row, :, k].astype(float).sum()) - bought.get(sku, 0) - stock.get(sku, 0))
+            short[sku].append(gap)
+            total += gap * price.get(sku, 0.0)
+        lost.append(total)
+    prob = pd.Series({sku: np.mean(np.array(v) > 0) for sku, v in short.items()})
+    assert np.allclose(per_sku.set_index("sku")["stockout_probability"], prob)
+    assert kpis["cost_at_risk"] == pytest.approx(np.quantile(lost, 0.9), rel=1e-6)
+    assert kpis["expected_lost_value"] == pytest.approx(np.mean(lost), rel=1e-5)
+
+    full = compute_kpis(res, fc, inventory=feats["inventory"], scenarios=scen)
+    assert full["stockout_risk"] == full["stockout_probability"]
+    assert full["samples"] == 200
+
+
+def test_batch_score_matches_score_plan_per_plan():
+    s, i, o = make_synthetic_data(n_skus=10, days=30, n_suppliers=3)
+    feats = build_feature_tables(s, i, o)
+    fc = forecast_demand(feats["demand_matrix"], horizon=7)
+    weights = {"cost": 0.1, "service": 0.8, "diversity": 0.1}
+    plans = [
+        optimize_plan(fc, feats["joined_offers"], service_target=slt, budget=budget)["allocation"]
+        for slt in (0.8, 0.97)
+        for budget in (500.0, 5000.0, 1e7)
+    ]
+    empty = plans[0].iloc[:0]
+    extra = pd.concat([plans[1], plans[1].iloc[:1].assign(sku="NOT-FORECAST", qty=3.0)], ignore_index=True)
+    plans += [empty, extra]
+    ranked = batch_score(demand_vector(fc), plans, weights=weights)
+    assert ranked["score"].is_monotonic_decreasing
+    by_name = ranked.set_index("plan")
+    for k, alloc in enumerate(plans):
+        single = score_plan({"allocation": alloc, "offers": feats["joined_offers"]}, fc, weights)
+        row = by_name.loc[f"plan-{k}"]
+        assert row["score"] == pytest.approx(single["score"], abs=1e-3)
+        for key in ("total_cost", "service_level", "supplier_diversity"):
+            assert row[key] == pytest.approx(single["kpis"][key], abs=1e-4)
@@ -13,3 +13,41 @@ def test_voi_ranking_missing():
     vois = [q["voi"] for q in qs]
     assert sorted(vois, reverse=True) == vois
 
+
+def test_voi_without_skus_uses_fixed_weights():
+    s, i, o = make_synthetic_data(n_skus=10, days=15, n_suppliers=2)
+    feats = build_feature_tables(s.iloc[:0], i, o)
+    baseline = pick_questions({})
+    expected = [("sales.csv", 1.0), ("offers.csv", 0.7), ("inventory.csv", 0.6)]
+    assert [(q["id"], q["voi"]) for q in baseline] == expected
+    for key in ("demand_daily", "demand_matrix"):
+        assert pick_questions({}, {key: feats[key]}) == baseline
+
+
+
+def test_voi_engine_incremental_matches_rebuild():
+    import numpy as np
+
+    from dkernel.voi import VoIEngine, VoIInputs
+
+    s, i, o = make_synthetic_data(n_skus=40, days=60, n_suppliers=3)
+    feats = build_feature_tables(s, i, o)
+    provided = {"sales.csv": True}
+    engine = VoIEngine(VoIInputs.from_features(feats, provided), seed=7)
+    before = engine.evpi().set_index("input")
+    assert (before["cost_gain"] > 0).all()
+    # more prior uncertainty about demand makes knowing it worth more
+    blind = VoIEngine(VoIInputs.from_features(feats, {}), seed=7).evpi().set_index("input")
+    assert blind.loc["demand", "cost_gain"] > before.loc["demand", "cost_gain"]
+
+    skus = engine.inputs.skus[:10]
+    assert engine.observe("on_hand", values=np.full(11, 5.0), skus=list(skus) + ["UNKNOWN"]) == 10
+    assert (engine.gain["on_hand"][:10] == 0).all()
+    inputs = VoIInputs.from_features(feats, provided)
+    inputs.on_hand[:10], inputs.on_hand_cv[:10] = 5.0, 0.0
+    rebuilt = VoIEngine(inputs, seed=7)
+    for name in ("demand", "on_hand", "lead_time"):
+        np.testing.assert_allclose(engine.gain[name], rebuilt.gain[name], rtol=1e-6)
+    ranked = pick_questions(provided, engine=engine)
+    assert {"inventory.csv", "offers.csv"} <= {q["id"] for q in ranked}
+    assert any(q["id"].startswith("demand:") for q in ranked)